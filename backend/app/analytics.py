@@ -0,0 +1,408 @@
+"""Kolonnu momentuzņēmums analītikai: `documents` tabula NumPy masīvos.
+
+Atskaišu grupēšana (piem., lasīšanas laiks pa struktūrvienībām un mēnešiem)
+notiek vektorizēti atmiņā, nevis ORM rindu pa rindai. Vārdnīcu lauki glabājas
+kā kategoriju kodi (vārdnīcas id), `created_at` — kā datetime64[D].
+
+Momentuzņēmums tiek izveidots pirmajā pieprasījumā un pēc importa papildināts
+tikai ar mainītajām rindām: `upsert_rows` atzīmē mainītos URL sesijā, un pēc
+apstiprināšanas (`after_commit`) tie tiek nodoti momentuzņēmumam. Dokumenti
+netiek dzēsti, tāpēc pietiek ar rindu atjaunināšanu pēc id un jaunu pievienošanu.
+Momentuzņēmums ir procesa iekšējs — citu procesu importi tajā neparādās.
+
+Konfigurācija no vides mainīgajiem:
+
+    ANALYTICS_SNAPSHOT   1    0 — momentuzņēmums izslēgts, statistika tiek aprēķināta ar SQL
+
+numpy nav obligāts — bez tā statistika arī tiek aprēķināta ar SQL GROUP BY.
+"""
+
+import os
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from sqlalchemy import String, event, func, select, type_coerce
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.lookups import lookup_cache
+from app.metrics import Gauge, registry
+from app.models import LOOKUP_TABLES, Document
+from app.queries import DocumentFilters, apply_filters
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover — numpy nav obligāts
+    np = None
+
+ANALYTICS_SNAPSHOT = os.getenv("ANALYTICS_SNAPSHOT", "1") != "0"
+
+# Grupēšanas lauki; vārdnīcu lauki un `active`/`created_month` kā facetēs
+GROUP_FIELDS = ("responsible_unit", "file_type", "importance", "category", "active", "created_month")
+LOOKUP_FIELDS = tuple(LOOKUP_TABLES)
+
+# Ja mainīto rindu ir vairāk par šo daļu, momentuzņēmums tiek izveidots no jauna
+REBUILD_FRACTION = 0.25
+# Histogrammas agregācijas šūnu skaits, līdz kuram tā tiek izmantota arī mazām kopām
+HISTOGRAM_MIN_CELLS = 1 << 16
+# URL saraksta garums vienā `IN (...)` vaicājumā, papildinot momentuzņēmumu
+PATCH_CHUNK_SIZE = 500
+
+_documents = Document.__table__
+_SNAPSHOT_COLUMNS = (
+    _documents.c.id,
+    # ISO teksts — NumPy to parsē ātrāk nekā Python `date` objektus
+    type_coerce(_documents.c.created_at, String),
+    _documents.c.reading_time_minutes,
+    _documents.c.active,
+    *(_documents.c[f"{field}_id"] for field in LOOKUP_FIELDS),
+)
+
+_CHANGED_URLS = "analytics_changed_urls"
+
+
+def snapshot_enabled() -> bool:
+    return ANALYTICS_SNAPSHOT and np is not None
+
+
+def record_changes(db: Session | AsyncSession, urls: Iterable[str]) -> None:
+    """Atzīmē sesijā mainītos URL; momentuzņēmums tos saņem pēc `commit`."""
+    if snapshot_enabled():
+        db.info.setdefault(_CHANGED_URLS, set()).update(urls)
+
+
+def _engine_key(engine: Engine) -> str:
+    # Sinhronie, aiosqlite, rakstītāja un lasītāja dzinēji vienam failam — viens momentuzņēmums
+    return engine.url.database or ""
+
+
+def _load(db: Session, where=None) -> dict:
+    """Nolasa momentuzņēmuma kolonnas (id secībā) NumPy masīvos."""
+    query = select(*_SNAPSHOT_COLUMNS).order_by(_documents.c.id)
+    if where is not None:
+        query = query.where(where)
+    rows = db.execute(query).all()
+    values = list(zip(*rows)) if rows else [()] * len(_SNAPSHOT_COLUMNS)
+    created_at = np.array(values[1], dtype="datetime64[D]")
+    columns = {
+        "id": np.array(values[0], dtype=np.int64),
+        "created_at": created_at,
+        "created_month": created_at.astype("datetime64[M]").astype(np.int32),
+        "reading_time_minutes": np.array(values[2], dtype=np.int32),
+        "active": np.array(values[3], dtype=np.bool_),
+    }
+    for field, value in zip(LOOKUP_FIELDS, values[4:]):
+        columns[field] = np.array(value, dtype=np.int32)
+    return columns
+
+
+def _load_names(db: Session) -> dict[str, tuple[str | None, ...]]:
+    """Kategoriju nosaukumi pēc koda: indekss ir vārdnīcas id (0 — neizmantots)."""
+    names = {}
+    for field, table in LOOKUP_TABLES.items():
+        by_id = dict(db.execute(select(table.c.id, table.c.name)).all())
+        names[field] = tuple(by_id.get(id_) for id_ in range(max(by_id, default=0) + 1))
+    return names
+
+
+class ColumnarSnapshot:
+    """Nemainīgs `documents` kolonnu komplekts; papildināšana atgriež jaunu objektu.
+
+    Lasītāji var turpināt grupēšanu pa veco momentuzņēmumu, kamēr tiek veidots nākamais.
+    """
+
+    def __init__(self, columns: dict, names: dict[str, tuple[str | None, ...]]):
+        self.columns = columns
+        self.names = names
+        self.built_at = time.time()
+
+    @classmethod
+    def build(cls, db: Session) -> "ColumnarSnapshot":
+        return cls(_load(db), _load_names(db))
+
+    def __len__(self) -> int:
+        return len(self.columns["id"])
+
+    @property
+    def nbytes(self) -> int:
+        """Kolonnu masīvu aizņemtā atmiņa baitos (bez nosaukumu vārdnīcām)."""
+        return sum(array.nbytes for array in self.columns.values())
+
+    def patched(self, db: Session, urls: set[str]) -> "ColumnarSnapshot":
+        """Jauns momentuzņēmums ar atjaunotām/pievienotām rindām norādītajiem URL."""
+        urls = sorted(urls)
+        chunks = [
+            _load(db, _documents.c.url.in_(urls[i : i + PATCH_CHUNK_SIZE]))
+            for i in range(0, len(urls), PATCH_CHUNK_SIZE)
+        ]
+        changed = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in self.columns}
+
+        ids = self.columns["id"]
+        positions = np.searchsorted(ids, changed["id"])
+        existing = positions < len(ids)
+        existing[existing] = ids[positions[existing]] == changed["id"][existing]
+
+        columns = {}
+        for name, array in self.columns.items():
+            array = array.copy()
+            array[positions[existing]] = changed[name][existing]
+            columns[name] = np.concatenate([array, changed[name][~existing]])
+        if not np.all(columns["id"][1:] > columns["id"][:-1]):
+            order = np.argsort(columns["id"], kind="stable")
+            columns = {name: array[order] for name, array in columns.items()}
+        return ColumnarSnapshot(columns, _load_names(db))
+
+    def info(self) -> dict:
+        return {"rows": len(self), "bytes": self.nbytes, "built_at": self.built_at}
+
+    def _code_of(self, field: str, name: str) -> int:
+        names = self.names[field]
+        return names.index(name) if name in names else -1
+
+    def mask(self, filters: DocumentFilters):
+        """Filtru Būla maska (None — visas rindas); nozīme kā `apply_filters`."""
+        c = self.columns
+        conditions = []
+        for field in LOOKUP_FIELDS:
+            value = getattr(filters, field)
+            if value is not None:
+                conditions.append(c[field] == self._code_of(field, value))
+        if filters.active is not None:
+            conditions.append(c["active"] == filters.active)
+        if filters.created_from is not None:
+            conditions.append(c["created_at"] >= np.datetime64(filters.created_from, "D"))
+        if filters.created_to is not None:
+            conditions.append(c["created_at"] <= np.datetime64(filters.created_to, "D"))
+        if not conditions:
+            return None
+        return np.logical_and.reduce(conditions)
+
+    def _group_codes(self, field: str, rows) -> tuple:
+        """Grupēšanas lauka kodi (0..n-1), to skaits un nosaukumi pēc koda."""
+        c = self.columns
+        if field == "active":
+            return c["active"][rows], 2, ("false", "true")
+        if field == "created_month":
+            months = c["created_month"][rows]
+            base = int(months.min())
+            size = int(months.max()) - base + 1
+            labels = np.arange(base, base + size).astype("datetime64[M]").astype(str).tolist()
+            return months - base, size, labels
+        names = self.names[field]
+        return c[field][rows], len(names), names
+
+    def reading_time(self, group_by: tuple[str, ...], filters: DocumentFilters) -> list[dict]:
+        """Lasīšanas laika agregāti katrai grupai (skaits, summa, vidējais, min, max)."""
+        mask = self.mask(filters)
+        rows = slice(None) if mask is None else mask
+        minutes = self.columns["reading_time_minutes"][rows]
+        if not len(minutes):
+            return []
+
+        if not group_by:
+            total = int(minutes.sum(dtype=np.int64))
+            return [_group({}, len(minutes), total, int(minutes.min()), int(minutes.max()))]
+
+        # Jauktas bāzes atslēga ((k0 * n1 + k1) * n2 + k2) …, tāda pati kā np.ravel_multi_index
+        keys = None
+        sizes, labels = [], []
+        for field in group_by:
+            codes, size, label = self._group_codes(field, rows)
+            if keys is None:
+                keys = codes.astype(np.intp)
+            else:
+                keys *= size
+                keys += codes
+            sizes.append(size)
+            labels.append(label)
+
+        groups = int(np.prod(sizes))
+        if groups > 4 * len(minutes):
+            # Retas kombinācijas — blīvā numerācija caur np.unique (kārtošana)
+            uniques, keys = np.unique(keys, return_inverse=True)
+            groups = len(uniques)
+        else:
+            uniques = None
+
+        count, total, lowest, highest = _aggregate(keys, minutes, groups)
+        present = np.flatnonzero(count)
+        flat = present if uniques is None else uniques[present]
+        field_codes = np.unravel_index(flat, sizes)
+        # Grupas nosaukumu secībā (kā SQL ceļā), nevis kodu secībā
+        order = np.lexsort([_name_ranks(labels[j])[codes] for j, codes in enumerate(field_codes)][::-1])
+        present = present[order]
+        keys_by_field = [
+            [labels[j][code] for code in codes[order].tolist()] for j, codes in enumerate(field_codes)
+        ]
+        return [
+            _group(dict(zip(group_by, key)), *values)
+            for key, *values in zip(
+                zip(*keys_by_field),
+                count[present].tolist(),
+                total[present].tolist(),
+                lowest[present].tolist(),
+                highest[present].tolist(),
+            )
+        ]
+
+
+def _name_ranks(labels) -> "np.ndarray":
+    """Katra koda vieta nosaukumu kārtošanas secībā."""
+    order = sorted(range(len(labels)), key=lambda code: str(labels[code]))
+    ranks = np.empty(len(labels), dtype=np.intp)
+    ranks[order] = np.arange(len(labels))
+    return ranks
+
+
+def _aggregate(keys, minutes, groups: int) -> tuple:
+    """Skaits, summa, min un max katrai grupai `0..groups-1`.
+
+    Lasīšanas laikam ir šaurs vērtību diapazons, tāpēc parasti pietiek ar vienu
+    `bincount` pa (grupa, vērtība) šūnām — visi četri agregāti no šīs histogrammas.
+    Platam diapazonam — `bincount` skaitam/summai un `ufunc.at` min/max.
+    """
+    low = int(minutes.min())
+    span = int(minutes.max()) - low + 1
+    if groups * span <= max(len(minutes), HISTOGRAM_MIN_CELLS):
+        cells = keys * span
+        cells += minutes
+        cells -= low
+        histogram = np.bincount(cells, minlength=groups * span).reshape(groups, span)
+        count = histogram.sum(axis=1)
+        total = histogram @ np.arange(low, low + span)
+        seen = histogram > 0
+        lowest = seen.argmax(axis=1) + low
+        highest = low + span - 1 - seen[:, ::-1].argmax(axis=1)
+        return count, total, lowest, highest
+
+    count = np.bincount(keys, minlength=groups)
+    total = np.bincount(keys, weights=minutes, minlength=groups).astype(np.int64)
+    lowest = np.full(groups, np.iinfo(np.int32).max, dtype=np.int32)
+    highest = np.full(groups, np.iinfo(np.int32).min, dtype=np.int32)
+    np.minimum.at(lowest, keys, minutes)
+    np.maximum.at(highest, keys, minutes)
+    return count, total, lowest, highest
+
+
+def _group(key: dict, count: int, total: int, lowest: int, highest: int) -> dict:
+    return {
+        "key": key,
+        "count": count,
+        "total_minutes": total,
+        "avg_minutes": round(total / count, 3),
+        "min_minutes": lowest,
+        "max_minutes": highest,
+    }
+
+
+def _sorted(groups: list[dict], group_by: tuple[str, ...]) -> list[dict]:
+    return sorted(groups, key=lambda group: tuple(str(group["key"][field]) for field in group_by))
+
+
+class SnapshotStore:
+    """Momentuzņēmums katrai DB (pēc URL) un vēl neiestrādātie mainītie URL."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots: dict[str, ColumnarSnapshot] = {}
+        self._pending: dict[str, set[str]] = {}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+            self._pending.clear()
+
+    def mark_changed(self, engine: Engine, urls: set[str]) -> None:
+        key = _engine_key(engine)
+        with self._lock:
+            if key in self._snapshots:
+                self._pending.setdefault(key, set()).update(urls)
+
+    def get(self, db: Session) -> ColumnarSnapshot:
+        """Aktuālais momentuzņēmums: izveido vai papildina ar apstiprinātajām izmaiņām.
+
+        Vienlaicīgi tikai viens pieprasījums to veido; pārējie gaida un izmanto rezultātu.
+        """
+        key = _engine_key(db.get_bind())
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            pending = self._pending.pop(key, set())
+            if snapshot is None or len(pending) > REBUILD_FRACTION * len(snapshot):
+                snapshot = ColumnarSnapshot.build(db)
+            elif pending:
+                snapshot = snapshot.patched(db, pending)
+            self._snapshots[key] = snapshot
+            return snapshot
+
+    def nbytes(self) -> dict[tuple[str, ...], float]:
+        with self._lock:
+            return {(key,): snapshot.nbytes for key, snapshot in self._snapshots.items()}
+
+
+snapshots = SnapshotStore()
+
+
+def _sql_reading_time(db: Session, group_by: tuple[str, ...], filters: DocumentFilters) -> list[dict]:
+    """Tie paši agregāti ar SQL GROUP BY (ja momentuzņēmums nav pieejams)."""
+    columns = {
+        **{field: getattr(Document, f"{field}_id") for field in LOOKUP_FIELDS},
+        "active": Document.active,
+        "created_month": func.substr(Document.created_at, 1, 7),
+    }
+    group_columns = [columns[field] for field in group_by]
+    minutes = Document.reading_time_minutes
+    query = db.query(
+        *group_columns, func.count(), func.sum(minutes), func.min(minutes), func.max(minutes)
+    ).group_by(*group_columns)
+    query = apply_filters(query, filters)
+
+    result = []
+    for row in query:
+        key = {}
+        for field, value in zip(group_by, row):
+            if field in LOOKUP_TABLES:
+                value = lookup_cache.name_of(db, field, value)
+            elif field == "active":
+                value = "true" if value else "false"
+            key[field] = value
+        count, total, lowest, highest = row[len(group_by) :]
+        if count:
+            result.append(_group(key, count, total, lowest, highest))
+    return _sorted(result, group_by)
+
+
+@dataclass
+class ReadingTimeStats:
+    groups: list[dict]
+    engine: str
+    snapshot: dict | None = None
+
+
+def reading_time_stats(db: Session, group_by: tuple[str, ...], filters: DocumentFilters) -> ReadingTimeStats:
+    """Lasīšanas laika agregāti pa `group_by` laukiem; momentuzņēmums vai SQL."""
+    if not snapshot_enabled():
+        return ReadingTimeStats(_sql_reading_time(db, group_by, filters), engine="sql")
+    snapshot = snapshots.get(db)
+    return ReadingTimeStats(snapshot.reading_time(group_by, filters), engine="numpy", snapshot=snapshot.info())
+
+
+def _move_changes_to_snapshot(session, *_args) -> None:
+    urls = session.info.pop(_CHANGED_URLS, None)
+    if urls:
+        snapshots.mark_changed(session.get_bind(), urls)
+
+
+def _drop_changes(session, *_args) -> None:
+    session.info.pop(_CHANGED_URLS, None)
+
+
+event.listen(Session, "after_commit", _move_changes_to_snapshot)
+event.listen(Session, "after_rollback", _drop_changes)
+event.listen(_documents, "after_create", lambda *_args, **_kw: snapshots.clear())
+
+registry.register(
+    Gauge("analytics_snapshot_bytes", "Analītikas kolonnu momentuzņēmuma atmiņa", snapshots.nbytes, ("db",))
+)
@@ -0,0 +1,77 @@
+"""Asinhronā saraksta un importa galapunktu versija (aiosqlite + httpx.AsyncClient).
+
+Ieslēdz ar `ASYNC_DB=1`; pārējie galapunkti ir kopīgi ar `app.routes`.
+"""
+
+import asyncio
+
+import httpx
+from fastapi import APIRouter, Depends, Header, Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.cache import data_generation
+from app.db import get_async_db, get_async_session_factory
+from app.jobs import ImportJob, import_jobs
+from app.multi_import import AsyncWriter, get_http_transport, run_import_job
+from app.profiling import RequestTimer, is_slow, log_slow_query, timing_requested
+from app.routes import (
+    DocumentListParams,
+    cached_documents_response,
+    document_list_params,
+    documents_page_response,
+    explain_statement,
+)
+from app.schemas import DocumentOut, ImportJobOut, ImportResult
+
+router = APIRouter(prefix="/api", tags=["documents"])
+
+
+@router.get("/documents", response_model=list[DocumentOut])
+async def list_documents(
+    request: Request,
+    params: DocumentListParams = Depends(document_list_params),
+    if_none_match: str | None = Header(default=None),
+    debug: bool = Depends(timing_requested),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Asinhronā `app.routes.list_documents` versija ar to pašu kešatmiņu un profilēšanu."""
+    cached = cached_documents_response(request, params, if_none_match, debug)
+    if cached is not None:
+        return cached
+
+    timer = RequestTimer()
+    generation = data_generation()
+    statement = params.statement()
+    with timer.stage("db"):
+        result = await db.execute(statement)
+    with timer.stage("hydrate"):
+        rows = result.all()
+    response = documents_page_response(params, rows, timer, generation, if_none_match, debug)
+    if is_slow(timer):
+        details = await db.run_sync(explain_statement, statement)
+        log_slow_query("/api/documents", params.shape, timer, len(rows), *details)
+    return response
+
+
+async def _run_import_async(
+    job: ImportJob,
+    session_factory: async_sessionmaker,
+    transport: httpx.AsyncBaseTransport | None,
+    force: bool = False,
+) -> ImportResult:
+    """Asinhronā `app.routes._run_import` versija; raksta ar aiosqlite sesiju."""
+    async with session_factory() as db:
+        return await run_import_job(job, AsyncWriter(db), transport, force)
+
+
+@router.post("/import", response_model=ImportJobOut, status_code=202)
+async def trigger_import(
+    force: bool = False,
+    session_factory: async_sessionmaker = Depends(get_async_session_factory),
+    transport: httpx.AsyncBaseTransport | None = Depends(get_http_transport),
+):
+    """Sāk fona importu; darba pavedienā darbojas savs notikumu cikls."""
+    job, _ = import_jobs.submit(
+        lambda job: asyncio.run(_run_import_async(job, session_factory, transport, force))
+    )
+    return job
@@ -0,0 +1,80 @@
+"""Datu paaudzes skaitītājs un ar to sasaistītas procesa iekšējās kešatmiņas.
+
+Katrs imports, kas apstiprina izmaiņas DB, palielina paaudzi; kešatmiņas
+ieraksti no vecākas paaudzes tiek uzskatīti par novecojušiem.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+_lock = threading.Lock()
+_generation = 0
+
+
+def data_generation() -> int:
+    """Atgriež pašreizējo datu paaudzi."""
+    return _generation
+
+
+def bump_generation() -> int:
+    """Palielina datu paaudzi pēc DB izmaiņu apstiprināšanas; atgriež jauno vērtību."""
+    global _generation
+    with _lock:
+        _generation += 1
+        return _generation
+
+
+class GenerationCache:
+    """LRU kešatmiņa, kuras ieraksti ir derīgi tikai tai datu paaudzei, kurā saglabāti."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[int, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        """Atgriež derīgu ierakstu vai None; novecojušu ierakstu izmet."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != _generation:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, generation: int | None = None) -> None:
+        """Saglabā ierakstu paaudzei, kurā vērtība tika aprēķināta (noklusējums — pašreizējā)."""
+        with self._lock:
+            self._entries[key] = (_generation if generation is None else generation, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Atgriež trāpījumu/netrāpījumu statistiku un aizpildījumu."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,24 +1,208 @@
-from sqlalchemy import create_engine
+"""SQLite dzinēji un sesijas: viens rakstītājs importiem, lasītāju pūls saraksta galapunktiem.
+
+Konfigurācija no vides mainīgajiem:
+
+    DATABASE_URL            sqlite:///./data/metadata.db
+    SQLITE_JOURNAL_MODE     WAL
+    SQLITE_SYNCHRONOUS      NORMAL
+    SQLITE_MMAP_SIZE        268435456 (baiti)
+    SQLITE_CACHE_SIZE_KIB   65536
+    SQLITE_BUSY_TIMEOUT_MS  5000
+    DB_READER_POOL_SIZE     8
+    DB_WRITER_POOL_TIMEOUT  5 (sekundes)
+
+Asinhronie dzinēji (aiosqlite) tiek veidoti no tā paša URL pēc pieprasījuma.
+"""
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import NullPool, StaticPool
+
+from app.metrics import instrument_engine
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/metadata.db")
+
+# Savienojumu pūla gaidīšanas laiks beidzies (sqlalchemy.exc.TimeoutError)
+DB_BUSY_MESSAGE = "Datubāze ir aizņemta (notiek cita rakstīšana); mēģiniet vēlāk"
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """SQLite savienojuma iestatījumi, kas tiek piemēroti katram jaunam savienojumam."""
+
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    mmap_size: int = 256 * 1024 * 1024
+    cache_size_kib: int = 64 * 1024
+    busy_timeout_ms: int = 5000
+    reader_pool_size: int = 8
+    writer_pool_timeout: float = 5.0
+
+    @classmethod
+    def from_env(cls) -> "EngineProfile":
+        defaults = cls()
+        return cls(
+            journal_mode=os.getenv("SQLITE_JOURNAL_MODE", defaults.journal_mode),
+            synchronous=os.getenv("SQLITE_SYNCHRONOUS", defaults.synchronous),
+            mmap_size=int(os.getenv("SQLITE_MMAP_SIZE", defaults.mmap_size)),
+            cache_size_kib=int(os.getenv("SQLITE_CACHE_SIZE_KIB", defaults.cache_size_kib)),
+            busy_timeout_ms=int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", defaults.busy_timeout_ms)),
+            reader_pool_size=int(os.getenv("DB_READER_POOL_SIZE", defaults.reader_pool_size)),
+            writer_pool_timeout=float(os.getenv("DB_WRITER_POOL_TIMEOUT", defaults.writer_pool_timeout)),
+        )
+
+    def pragmas(self, read_only: bool = False) -> list[str]:
+        """PRAGMA komandas savienojumam; žurnāla režīmu maina tikai rakstītājs."""
+        statements = [
+            f"PRAGMA synchronous={self.synchronous}",
+            f"PRAGMA mmap_size={self.mmap_size}",
+            # Negatīva vērtība — izmērs KiB, nevis lapās
+            f"PRAGMA cache_size=-{self.cache_size_kib}",
+            f"PRAGMA busy_timeout={self.busy_timeout_ms}",
+        ]
+        if read_only:
+            statements.append("PRAGMA query_only=ON")
+        else:
+            statements.insert(0, f"PRAGMA journal_mode={self.journal_mode}")
+        return statements
+
+
+def _is_memory(url: str) -> bool:
+    return make_url(url).database in (None, "", ":memory:")
+
+
+def create_sqlite_engine(url: str, profile: EngineProfile, read_only: bool = False) -> Engine:
+    """Izveido dzinēju: rakstītājam — viens savienojums, lasītājam — pūls ar query_only.
+
+    SQL izpildes ilgumi tiek mērīti (`app.metrics`) ar dzinēja lomu kā iezīmi.
+    """
+    pool_size = profile.reader_pool_size if read_only else 1
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=pool_size,
+        max_overflow=0,
+        # Ilgus importus serializē single-flight (`app.jobs`); rakstītājs gaida tikai īsi,
+        # un sqlalchemy.exc.TimeoutError kļūst par 503 (`app.main`) vai darba kļūdu
+        pool_timeout=30 if read_only else profile.writer_pool_timeout,
+    )
+
+    _listen_pragmas(engine, profile.pragmas(read_only))
+    instrument_engine(engine, "reader" if read_only else "writer")
+    return engine
 
-DATABASE_URL = "sqlite:///./data/metadata.db"
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _listen_pragmas(engine: Engine, pragmas: list[str]) -> None:
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        for statement in pragmas:
+            cursor.execute(statement)
+        cursor.close()
+
+
+def create_async_sqlite_engine(url: str, profile: EngineProfile, read_only: bool = False) -> AsyncEngine:
+    """Izveido aiosqlite dzinēju ar tiem pašiem PRAGMA iestatījumiem.
+
+    Rakstītājs neizmanto pūlu: fona importi darbojas katrs savā notikumu
+    ciklā, un aiosqlite savienojumu nevar pārnest starp cikliem.
+    """
+    async_url = make_url(url).set(drivername="sqlite+aiosqlite")
+    if _is_memory(url):
+        options = {"poolclass": StaticPool}
+    elif read_only:
+        options = {"pool_size": profile.reader_pool_size, "max_overflow": 0}
+    else:
+        options = {"poolclass": NullPool}
+    engine = create_async_engine(async_url, **options)
+    _listen_pragmas(engine.sync_engine, profile.pragmas(read_only))
+    instrument_engine(engine.sync_engine, "async-reader" if read_only else "async-writer")
+    return engine
+
+
+profile = EngineProfile.from_env()
+writer_engine = create_sqlite_engine(DATABASE_URL, profile)
+# Atmiņas DB katram savienojumam ir atsevišķa — tur lasītājs izmanto rakstītāja dzinēju
+reader_engine = (
+    writer_engine if _is_memory(DATABASE_URL) else create_sqlite_engine(DATABASE_URL, profile, read_only=True)
+)
+
+WriterSession = sessionmaker(autocommit=False, autoflush=False, bind=writer_engine)
+ReaderSession = sessionmaker(autocommit=False, autoflush=False, bind=reader_engine)
+
+# Saderībai ar iepriekšējiem nosaukumiem
+engine = writer_engine
+SessionLocal = WriterSession
+
 Base = declarative_base()
 
 
 def get_db():
-    """Atgriež DB sesiju; automātiski aizver pēc pieprasījuma."""
-    db = SessionLocal()
+    """Atgriež lasīšanas DB sesiju; automātiski aizver pēc pieprasījuma."""
+    db = ReaderSession()
     try:
         yield db
     finally:
         db.close()
 
 
+def get_session_factory():
+    """Atgriež rakstītāja sesiju fabriku fona darbiem, kuru dzīves ilgums pārsniedz pieprasījumu."""
+    return WriterSession
+
+
+@lru_cache(maxsize=1)
+def _async_sessions() -> tuple[async_sessionmaker, async_sessionmaker]:
+    """Asinhronās lasītāja un rakstītāja sesiju fabrikas (izveido pirmajā izsaukumā)."""
+    writer = create_async_sqlite_engine(DATABASE_URL, profile)
+    reader = (
+        writer if _is_memory(DATABASE_URL) else create_async_sqlite_engine(DATABASE_URL, profile, read_only=True)
+    )
+    return (
+        async_sessionmaker(reader, autoflush=False, expire_on_commit=False),
+        async_sessionmaker(writer, autoflush=False, expire_on_commit=False),
+    )
+
+
+async def get_async_db():
+    """Asinhronā `get_db` versija; aizver sesiju pēc pieprasījuma."""
+    reader, _ = _async_sessions()
+    async with reader() as db:
+        yield db
+
+
+def get_async_session_factory():
+    """Atgriež asinhronā rakstītāja sesiju fabriku fona importiem."""
+    return _async_sessions()[1]
+
+
 def init_db():
-    """Izveido visas tabulas, ja tās vēl neeksistē."""
+    """Izveido visas tabulas, ja tās vēl neeksistē.
+
+    Migrāciju nav: DB ar veco `documents` shēmu (teksta kolonnas vārdnīcu
+    lauku vietā) netiek pārveidota — tā jāizdzēš un jāimportē no jauna.
+    Ja `document_rollup` tiek izveidota DB, kurā jau ir dokumenti, tā tiek
+    aizpildīta ar pilnu pārrēķinu.
+    """
     from app import models  # noqa: F401 — importē, lai reģistrētu modeļus
+    from app.rollup import rebuild_rollup
 
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    inspector = inspect(writer_engine)
+    has_documents = inspector.has_table("documents")
+    if has_documents and "category_id" not in {column["name"] for column in inspector.get_columns("documents")}:
+        raise RuntimeError(
+            f"DB shēma ir novecojusi (nav vārdnīcu tabulu): {DATABASE_URL}. "
+            "Izdzēsiet DB failu un palaidiet importu no jauna."
+        )
+    has_rollup = inspector.has_table(models.DocumentRollup.__tablename__)
+    Base.metadata.create_all(bind=writer_engine)
+    if has_documents and not has_rollup:
+        with WriterSession() as db:
+            rebuild_rollup(db)
+            db.commit()
@@ -1,35 +1,322 @@
 """Dokumentu importa serviss: XML ielāde no attālā avota un saglabāšana DB."""
 
+import hashlib
+import os
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+
 import httpx
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.models import Document
-from app.parser import parse_documents_xml
+from app.analytics import record_changes
+from app.cache import bump_generation
+from app.lookups import lookup_cache
+from app.metrics import observe_batch, observe_parse_rate
+from app.models import IMPORTANCE_RANK, UNKNOWN_IMPORTANCE_RANK, Document, FeedState
+from app.parser import iter_documents_xml, iter_xml_file_parallel
+from app.rollup import ROLLUP_KEY_COLUMNS, UPSERT_ROLLUP, RollupDeltas, rollup_key
+from app.schemas import DocumentCreate, ImportResult
 
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
 
-def load_remote_xml(remote_url: str, timeout: float = 10.0) -> str:
-    """Ielādē XML saturu no attālā URL."""
-    response = httpx.get(remote_url, timeout=timeout)
-    response.raise_for_status()
-    return response.text
+_documents = Document.__table__
 
+# INSERT ... ON CONFLICT(url) DO UPDATE — viens paraugs visām partijām
+_upsert = sqlite_insert(_documents)
+UPSERT_DOCUMENTS = _upsert.on_conflict_do_update(
+    index_elements=[_documents.c.url],
+    set_={
+        column.name: _upsert.excluded[column.name]
+        for column in _documents.columns
+        if column.name not in ("id", "url")
+    },
+)
 
-def import_documents(xml_text: str, db: Session) -> int:
-    """Parsē XML un veic upsert pēc URL; atgriež importēto dokumentu skaitu."""
-    parsed = parse_documents_xml(xml_text)
-    count = 0
 
-    for doc_data in parsed:
-        data = doc_data.model_dump()
-        existing = db.query(Document).filter(Document.url == data["url"]).first()
+@dataclass
+class RemoteFeed:
+    """Attālās plūsmas atbilde: baitu bloki un jaunie HTTP validatori."""
+
+    chunks: AsyncIterator[bytes]
+    etag: str | None = None
+    last_modified: str | None = None
+    not_modified: bool = False
+
+
+def _conditional_headers(etag: str | None, last_modified: str | None) -> dict[str, str]:
+    """Veido nosacījuma pieprasījuma galvenes no iepriekš saglabātajiem validatoriem."""
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+@asynccontextmanager
+async def astream_remote_xml(
+    remote_url: str,
+    client: httpx.AsyncClient,
+    timeout: float = 10.0,
+    etag: str | None = None,
+    last_modified: str | None = None,
+) -> AsyncIterator[RemoteFeed]:
+    """Atver straumētu savienojumu ar attālo URL; atgriež atbildes baitu bloku plūsmu.
+
+    Savienojuma un HTTP statusa kļūdas rodas jau atverot; pārraides kļūdas
+    (httpx.HTTPError) var rasties arī, lasot blokus ar `async for`. Ja avots
+    atbild ar 304, plūsma ir tukša un `not_modified` ir True.
+    """
+    async with client.stream(
+        "GET",
+        remote_url,
+        timeout=timeout,
+        headers=_conditional_headers(etag, last_modified),
+    ) as response:
+        if response.status_code == 304:
+            yield RemoteFeed(chunks=_aempty(), etag=etag, last_modified=last_modified, not_modified=True)
+            return
+        response.raise_for_status()
+        yield RemoteFeed(
+            chunks=response.aiter_bytes(),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
 
-        if existing:
-            for key, value in data.items():
-                setattr(existing, key, value)
-        else:
-            db.add(Document(**data))
 
-        count += 1
+async def _aempty() -> AsyncIterator[bytes]:
+    return
+    yield
 
+
+def _validators(state: FeedState | None) -> tuple[str | None, str | None] | None:
+    return None if state is None else (state.etag, state.last_modified)
+
+
+def get_feed_state(db: Session, remote_url: str) -> tuple[str | None, str | None] | None:
+    """Atgriež saglabātos HTTP validatorus (etag, last_modified) attālajam avotam.
+
+    Vērtības, nevis ORM objekts: pēc nākamā commit tas būtu novecojis, un tā
+    atribūtu nolasīšana izpildītu SELECT tajā pavedienā, kas to lasa.
+    """
+    return _validators(db.get(FeedState, remote_url))
+
+
+def save_feed_state(db: Session, feed: RemoteFeed, remote_url: str) -> None:
+    """Saglabā avota validatorus pēc veiksmīga importa (nākamajai nosacījuma ielādei)."""
+    db.merge(FeedState(url=remote_url, etag=feed.etag, last_modified=feed.last_modified))
     db.commit()
-    return count
+
+
+async def aget_feed_state(db: AsyncSession, remote_url: str) -> tuple[str | None, str | None] | None:
+    """Asinhronā `get_feed_state` versija."""
+    return _validators(await db.get(FeedState, remote_url))
+
+
+async def asave_feed_state(db: AsyncSession, feed: RemoteFeed, remote_url: str) -> None:
+    """Asinhronā `save_feed_state` versija."""
+    await db.merge(FeedState(url=remote_url, etag=feed.etag, last_modified=feed.last_modified))
+    await db.commit()
+
+
+def _iter_source(source: str | Path | Iterable[DocumentCreate]) -> Iterable[DocumentCreate]:
+    """Pārveido importa avotu (XML teksts, fails vai jau parsēti dokumenti) par plūsmu."""
+    if isinstance(source, str):
+        return iter_documents_xml(source)
+    if isinstance(source, Path):
+        # PARSE_WORKERS > 1 — parsē vairākos procesos, citādi secīgi
+        return iter_xml_file_parallel(source)
+    return source
+
+
+def content_hash(doc: DocumentCreate) -> str:
+    """Aprēķina dokumenta kanonisko lauku jaucējvērtību izmaiņu noteikšanai."""
+    return hashlib.blake2b(doc.model_dump_json().encode("utf-8"), digest_size=16).hexdigest()
+
+
+def document_row(doc: DocumentCreate) -> dict:
+    """Pārveido dokumentu par DB rindu ar atvasinātajām kolonnām."""
+    return {
+        **doc.model_dump(),
+        "importance_rank": IMPORTANCE_RANK.get(doc.importance, UNKNOWN_IMPORTANCE_RANK),
+        "content_hash": content_hash(doc),
+    }
+
+
+def _batches(documents: Iterable[DocumentCreate], size: int) -> Iterator[list[dict]]:
+    """Sagrupē dokumentus partijās pa `size` rindām (kā DB rindu vārdnīcas)."""
+    it = iter(documents)
+    while batch := [document_row(doc) for doc in islice(it, size)]:
+        yield batch
+
+
+def _known_rows(rows: list[dict]):
+    """SELECT jau saglabātajām partijas URL jaucējvērtībām, rollup atslēgām un lasīšanas laikam."""
+    urls = [row["url"] for row in rows]
+    return select(
+        _documents.c.url,
+        _documents.c.content_hash,
+        *ROLLUP_KEY_COLUMNS,
+        _documents.c.reading_time_minutes,
+    ).where(_documents.c.url.in_(urls))
+
+
+def _known(result) -> dict[str, tuple]:
+    """URL → (jaucējvērtība, rollup atslēga, lasīšanas laiks)."""
+    return {url: (content_hash, tuple(key), minutes) for url, content_hash, *key, minutes in result}
+
+
+def _classify(rows: list[dict], known: dict[str, tuple]) -> tuple[list[str], list[dict], RollupDeltas]:
+    """Katrai rindai nosaka statusu (inserted/updated/unchanged); atgriež arī rakstāmās rindas.
+
+    Rollup deltas: jaunai rindai +1 tās atslēgai, mainītai — vecajai atslēgai −1 un jaunajai +1.
+    """
+    statuses = []
+    changed = []
+    deltas = RollupDeltas()
+    for row in rows:
+        url = row["url"]
+        previous = known.get(url)
+        if previous is None:
+            statuses.append("inserted")
+        elif previous[0] == row["content_hash"]:
+            statuses.append("unchanged")
+            continue
+        else:
+            statuses.append("updated")
+            deltas.remove(previous[1], previous[2])
+        key = rollup_key(row)
+        deltas.add(key, row["reading_time_minutes"])
+        known[url] = (row["content_hash"], key, row["reading_time_minutes"])
+        changed.append(row)
+    return statuses, changed, deltas
+
+
+def _tally(statuses: Iterable[str]) -> ImportResult:
+    result = ImportResult()
+    for status in statuses:
+        setattr(result, status, getattr(result, status) + 1)
+    return result
+
+
+def upsert_rows(rows: list[dict], db: Session) -> list[str]:
+    """Ieraksta vienu partiju ar vienu upsert izpildi; nemainītās rindas izlaiž.
+
+    Vārdnīcu lauki tiek aizstāti ar id no `lookup_cache` (vaicājums tikai
+    jaunām vērtībām). Tajā pašā transakcijā tiek pieskaitītas `document_rollup`
+    deltas, un mainītie URL tiek atzīmēti analītikas momentuzņēmumam.
+    Atgriež katras rindas statusu tādā pašā secībā kā `rows`.
+    """
+    rows = lookup_cache.encode_rows(db, rows)
+    statuses, changed, deltas = _classify(rows, _known(db.execute(_known_rows(rows))))
+    if changed:
+        db.execute(UPSERT_DOCUMENTS, changed)
+        if rollup_rows := deltas.rows():
+            db.execute(UPSERT_ROLLUP, rollup_rows)
+        record_changes(db, (row["url"] for row in changed))
+    return statuses
+
+
+async def aupsert_rows(rows: list[dict], db: AsyncSession) -> list[str]:
+    """Asinhronā `upsert_rows` versija."""
+    rows = await db.run_sync(lookup_cache.encode_rows, rows)
+    statuses, changed, deltas = _classify(rows, _known(await db.execute(_known_rows(rows))))
+    if changed:
+        await db.execute(UPSERT_DOCUMENTS, changed)
+        if rollup_rows := deltas.rows():
+            await db.execute(UPSERT_ROLLUP, rollup_rows)
+        record_changes(db, (row["url"] for row in changed))
+    return statuses
+
+
+def _add(total: ImportResult, result: ImportResult) -> None:
+    total.inserted += result.inserted
+    total.updated += result.updated
+    total.unchanged += result.unchanged
+
+
+def import_documents(
+    source: str | Path | Iterable[DocumentCreate],
+    db: Session,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    progress: Callable[[str, int], None] | None = None,
+) -> ImportResult:
+    """Parsē XML un veic upsert pēc URL partijās; atgriež jauno/atjaunināto/nemainīto skaitu.
+
+    Avots var būt XML teksts, ceļš uz XML failu vai DocumentCreate plūsma
+    (piem., no `iter_documents`). Katra partija tiek apstiprināta atsevišķi.
+    `progress(fāze, apstrādāto_skaits)` tiek izsaukts pirms un pēc katras
+    partijas ieraksta ar fāzi "writing" / "parsing".
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size jābūt pozitīvam: {batch_size}")
+
+    total = ImportResult()
+    for rows in _batches(observe_parse_rate(_iter_source(source)), batch_size):
+        if progress is not None:
+            progress("writing", total.imported + len(rows))
+
+        start = time.perf_counter()
+        statuses = upsert_rows(rows, db)
+        written = time.perf_counter()
+        db.commit()
+        observe_batch(statuses, written - start, time.perf_counter() - written)
+        result = _tally(statuses)
+        if result.inserted or result.updated:
+            bump_generation()
+        _add(total, result)
+
+        if progress is not None:
+            progress("parsing", total.imported)
+
+    return total
+
+
+async def _abatches(documents: AsyncIterable[DocumentCreate], size: int) -> AsyncIterator[list[dict]]:
+    """Asinhronā `_batches` versija."""
+    batch = []
+    async for doc in documents:
+        batch.append(document_row(doc))
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def async_import_documents(
+    documents: AsyncIterable[DocumentCreate],
+    db: AsyncSession,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    progress: Callable[[str, int], None] | None = None,
+) -> ImportResult:
+    """Asinhronā `import_documents` versija dokumentu plūsmai (piem., no `aiter_documents`)."""
+    if batch_size < 1:
+        raise ValueError(f"batch_size jābūt pozitīvam: {batch_size}")
+
+    total = ImportResult()
+    async for rows in _abatches(documents, batch_size):
+        if progress is not None:
+            progress("writing", total.imported + len(rows))
+
+        start = time.perf_counter()
+        statuses = await aupsert_rows(rows, db)
+        written = time.perf_counter()
+        await db.commit()
+        observe_batch(statuses, written - start, time.perf_counter() - written)
+        result = _tally(statuses)
+        if result.inserted or result.updated:
+            bump_generation()
+        _add(total, result)
+
+        if progress is not None:
+            progress("parsing", total.imported)
+
+    return total
@@ -0,0 +1,111 @@
+"""Fona importa darbi: progresa uzskaite un single-flight bloķēšana."""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.db import DB_BUSY_MESSAGE
+from app.schemas import ImportResult
+
+# Darba fāzes secībā; "done" un "failed" ir beigu stāvokļi
+PHASES = ("queued", "fetching", "parsing", "writing", "done", "failed")
+
+# Cik pabeigtu darbu paturēt statusa vaicājumiem
+JOB_HISTORY_SIZE = 20
+
+
+@dataclass
+class ImportJob:
+    id: str
+    phase: str = "queued"
+    processed: int = 0
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: datetime | None = None
+    result: ImportResult | None = None
+    error: str | None = None
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+    _elapsed: float | None = field(default=None, repr=False)
+    _done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def running(self) -> bool:
+        return not self._done.is_set()
+
+    @property
+    def throughput(self) -> float:
+        """Apstrādāto dokumentu skaits sekundē kopš darba sākuma."""
+        elapsed = self._elapsed if self._elapsed is not None else time.perf_counter() - self._started
+        return round(self.processed / elapsed, 1) if elapsed > 0 else 0.0
+
+    def report(self, phase: str, processed: int) -> None:
+        """Progresa atzvans importa servisam: atjauno fāzi un apstrādāto skaitu."""
+        self.phase = phase
+        self.processed = processed
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Gaida darba beigas; atgriež False, ja iestājās taimauts."""
+        return self._done.wait(timeout)
+
+    def _finish(self, result: ImportResult | None = None, error: str | None = None) -> None:
+        self.result = result
+        self.error = error
+        self.phase = "failed" if error is not None else "done"
+        self._elapsed = time.perf_counter() - self._started
+        self.finished_at = datetime.now(timezone.utc)
+        self._done.set()
+
+
+class ImportFailed(Exception):
+    """Importa kļūda ar klientam paredzētu aprakstu."""
+
+
+class ImportJobManager:
+    """Palaiž importu fona pavedienā; vienlaikus darbojas ne vairāk kā viens darbs."""
+
+    def __init__(self, history_size: int = JOB_HISTORY_SIZE):
+        self._lock = threading.Lock()
+        self._jobs: OrderedDict[str, ImportJob] = OrderedDict()
+        self._current: ImportJob | None = None
+        self._history_size = history_size
+
+    def submit(self, target: Callable[[ImportJob], ImportResult]) -> tuple[ImportJob, bool]:
+        """Sāk jaunu darbu vai pievienojas jau notiekošajam; atgriež (darbs, vai_jauns)."""
+        with self._lock:
+            if self._current is not None and self._current.running:
+                return self._current, False
+
+            job = ImportJob(id=uuid4().hex)
+            self._jobs[job.id] = job
+            while len(self._jobs) > self._history_size:
+                self._jobs.popitem(last=False)
+            self._current = job
+
+        threading.Thread(
+            target=self._run, args=(job, target), name=f"import-{job.id}", daemon=True
+        ).start()
+        return job, True
+
+    def get(self, job_id: str) -> ImportJob | None:
+        return self._jobs.get(job_id)
+
+    @staticmethod
+    def _run(job: ImportJob, target: Callable[[ImportJob], ImportResult]) -> None:
+        try:
+            result = target(job)
+        except ImportFailed as e:
+            job._finish(error=str(e))
+        except PoolTimeoutError:
+            job._finish(error=DB_BUSY_MESSAGE)
+        except Exception as e:
+            job._finish(error=f"Neparedzēta importa kļūda: {e}")
+        else:
+            job._finish(result=result)
+
+
+import_jobs = ImportJobManager()
@@ -0,0 +1,129 @@
+"""Vārdnīcu tabulu kešatmiņa: nosaukums ↔ id zemas kardinalitātes laukiem.
+
+Importā katras rindas `responsible_unit`, `file_type`, `importance` un
+`category` tiek aizstāti ar veselu skaitļu atslēgām bez papildu vaicājumiem —
+DB tiek vaicāta tikai pirmajā izsaukumā (visa vārdnīca) un jaunām vērtībām.
+Kešatmiņa ir atsevišķa katram dzinējam; tā tiek notīrīta, kad tabulas tiek
+izveidotas no jauna. Transakcijā ievietoto jauno vērtību id tiek glabāti sesijā
+un nonāk kešatmiņā tikai pēc commit — atceltā vai neapstiprināti aizvērtā
+transakcijā tie tiek izmesti.
+"""
+
+import sys
+import threading
+import weakref
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models import LOOKUP_TABLES
+
+LOOKUP_FIELDS = tuple(LOOKUP_TABLES)
+
+# `Session.info` atslēga transakcijā ievietotajām, vēl neapstiprinātajām vērtībām
+_STAGED = "lookup_cache_staged"
+
+
+class _Vocabulary:
+    """Viena lauka vārdnīca abos virzienos."""
+
+    __slots__ = ("ids", "names")
+
+    def __init__(self, rows=()):
+        self.ids: dict[str, int] = {}
+        self.names: dict[int, str] = {}
+        self.update(rows)
+
+    def update(self, rows) -> None:
+        for id_, name in rows:
+            name = sys.intern(name)
+            self.ids[name] = id_
+            self.names[id_] = name
+
+
+class LookupCache:
+    """Procesa iekšējā vārdnīca katram dzinējam: lauks → nosaukums ↔ id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engines: weakref.WeakKeyDictionary[Engine, dict[str, _Vocabulary]] = weakref.WeakKeyDictionary()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._engines.clear()
+
+    def _vocabularies(self, db: Session, reload: bool = False) -> dict[str, _Vocabulary]:
+        engine = db.get_bind()
+        vocabularies = None if reload else self._engines.get(engine)
+        if vocabularies is None:
+            vocabularies = {
+                field: _Vocabulary(db.execute(select(table.c.id, table.c.name)))
+                for field, table in LOOKUP_TABLES.items()
+            }
+            with self._lock:
+                self._engines[engine] = vocabularies
+        return vocabularies
+
+    def encode_rows(self, db: Session, rows: list[dict]) -> list[dict]:
+        """Aizstāj rindu nosaukumu laukus ar `<lauks>_id`; jaunās vērtības ievieto vārdnīcā.
+
+        Vienlaicīgs ievietotājs (cits process) netraucē — ON CONFLICT DO NOTHING
+        un pēc tam id tiek nolasīti pēc nosaukuma. Jauno vērtību id līdz commit
+        glabājas tikai sesijā (`_merge_staged`).
+        """
+        vocabularies = self._vocabularies(db)
+        staged = db.info.setdefault(_STAGED, {field: _Vocabulary() for field in LOOKUP_FIELDS})
+        for field, table in LOOKUP_TABLES.items():
+            missing = {row[field] for row in rows} - vocabularies[field].ids.keys() - staged[field].ids.keys()
+            if missing:
+                db.execute(sqlite_insert(table).on_conflict_do_nothing(), [{"name": name} for name in missing])
+                staged[field].update(db.execute(select(table.c.id, table.c.name).where(table.c.name.in_(missing))))
+
+        encoded = []
+        for row in rows:
+            row = dict(row)
+            for field in LOOKUP_FIELDS:
+                name = row.pop(field)
+                ids = vocabularies[field].ids
+                row[f"{field}_id"] = ids[name] if name in ids else staged[field].ids[name]
+            encoded.append(row)
+        return encoded
+
+    def _merge_staged(self, db: Session) -> None:
+        """Pēc commit pievieno sesijā ievietotās vērtības kešatmiņai."""
+        staged = db.info.pop(_STAGED, None)
+        if not staged:
+            return
+        with self._lock:
+            vocabularies = self._engines.get(db.get_bind())
+            if vocabularies is not None:
+                for field, vocabulary in staged.items():
+                    vocabularies[field].update((id_, name) for id_, name in vocabulary.names.items())
+
+    def name_of(self, db: Session, field: str, id_: int) -> str | None:
+        """Nosaukums pēc id; nezināmam id (to ievietoja cits process) vārdnīca tiek ielādēta no jauna."""
+        name = self._vocabularies(db)[field].names.get(id_)
+        if name is None:
+            name = self._vocabularies(db, reload=True)[field].names.get(id_)
+        return name
+
+
+lookup_cache = LookupCache()
+
+
+def _merge_staged(session) -> None:
+    lookup_cache._merge_staged(session)
+
+
+def _discard_staged(session, transaction) -> None:
+    # Transakcija beidzās bez commit (rollback, close vai kļūda) — id varēja netikt saglabāti
+    if transaction.parent is None:
+        session.info.pop(_STAGED, None)
+
+
+event.listen(Session, "after_commit", _merge_staged)
+event.listen(Session, "after_transaction_end", _discard_staged)
+for _table in LOOKUP_TABLES.values():
+    event.listen(_table, "after_create", lambda *_args, **_kw: lookup_cache.clear())
@@ -1,9 +1,13 @@
+import os
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
-from app.db import init_db
-from app.routes import router
+from app.db import DB_BUSY_MESSAGE, init_db
+from app.metrics import MetricsMiddleware, registry
+from app.routes import documents_router, router
 
 
 @asynccontextmanager
@@ -12,10 +16,35 @@ async def lifespan(app: FastAPI):
     yield
 
 
-app = FastAPI(title="XML Metadata Service", lifespan=lifespan)
-app.include_router(router)
-
-
-@app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+def db_busy(request: Request, exc: PoolTimeoutError):
+    """Savienojumu pūls nedeva savienojumu laikā — 503, lai klients mēģina vēlreiz."""
+    return JSONResponse(status_code=503, content={"detail": DB_BUSY_MESSAGE}, headers={"Retry-After": "5"})
+
+
+def metrics():
+    """Procesa mērījumi Prometheus teksta formātā."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+def create_app(async_db: bool = os.getenv("ASYNC_DB") == "1") -> FastAPI:
+    """Izveido lietotni; `async_db=True` saraksta un importa galapunktiem izmanto aiosqlite."""
+    app = FastAPI(title="XML Metadata Service", lifespan=lifespan)
+    app.include_router(router)
+    if async_db:
+        from app.async_routes import router as async_documents_router
+
+        app.include_router(async_documents_router)
+    else:
+        app.include_router(documents_router)
+    app.get("/health")(health)
+    app.get("/metrics", include_in_schema=False)(metrics)
+    app.add_exception_handler(PoolTimeoutError, db_busy)
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+
+app = create_app()
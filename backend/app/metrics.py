@@ -0,0 +1,362 @@
+"""Procesa iekšējie mērījumi Prometheus teksta formātā (`GET /metrics`).
+
+Skaitītāji un histogrammas ir vienkārši: viena slēdzene uz metriku un
+`bisect` spaiņa atrašanai, tāpēc tos var atstāt ieslēgtus produkcijā.
+Mērījumi:
+
+    http_request_duration_seconds            pieprasījuma ilgums pa maršrutiem
+    documents_request_duration_seconds       saraksta ilgums pa kārtošanu/filtriem/lapošanu
+    import_fetch_seconds / _bytes            viena avota ielādes laiks un apjoms
+    import_parse_docs_per_second             XML → DocumentCreate caurlaidība
+    import_write_rows_per_second             partijas upsert caurlaidība
+    import_commit_seconds                    partijas COMMIT ilgums
+    db_statement_duration_seconds            SQL izpildes ilgums (SQLAlchemy notikumi)
+    db_file_size_bytes                       DB un WAL faila izmērs
+    analytics_snapshot_bytes                 kolonnu momentuzņēmuma apjoms (reģistrē `app.analytics`)
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator
+from typing import TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+T = TypeVar("T")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SQL_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1, 5)
+IMPORT_SECONDS_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9, 1e10)
+RATE_BUCKETS = (100, 250, 500, 1e3, 2.5e3, 5e3, 1e4, 2.5e4, 5e4, 1e5, 2.5e5, 5e5, 1e6)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotoni augošs skaitītājs ar iezīmēm."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(labels[name] for name in self.labelnames), 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram:
+    """Kumulatīvā histogramma ar fiksētām spaiņu robežām (kā Prometheus klientā)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        labelnames: tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        # Iezīmes → [skaiti pa spaiņiem (bez kumulācijas) + "+Inf", summa]
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(tuple(labels[name] for name in self.labelnames))
+        return sum(series[0]) if series else 0
+
+    def sum(self, **labels: str) -> float:
+        series = self._series.get(tuple(labels[name] for name in self.labelnames))
+        return series[1] if series else 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}"
+
+
+class Gauge:
+    """Mērījums, kura vērtības tiek nolasītas renderēšanas brīdī no funkcijas."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], dict[tuple[str, ...], float]],
+        labelnames: tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._collect = collect
+
+    def clear(self) -> None:
+        pass
+
+    def samples(self) -> Iterator[str]:
+        for key, value in sorted(self._collect().items()):
+            yield f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Registry:
+    """Reģistrēto metriku kopa; `render()` atgriež Prometheus teksta ekspozīciju."""
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram | Gauge] = {}
+
+    def register(self, metric: T) -> T:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metrika jau reģistrēta: '{metric.name}'")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def clear(self) -> None:
+        """Notīra uzkrātās vērtības (testiem)."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP pieprasījuma ilgums līdz pēdējam atbildes baitam",
+        labelnames=("method", "route", "status"),
+    )
+)
+DOCUMENTS_REQUEST_SECONDS = registry.register(
+    Histogram(
+        "documents_request_duration_seconds",
+        "GET /api/documents ilgums pa kārtošanu, filtru kombināciju un lapošanas veidu",
+        labelnames=("sort", "filters", "paging"),
+    )
+)
+IMPORT_FETCH_SECONDS = registry.register(
+    Histogram(
+        "import_fetch_seconds",
+        "Viena avota ielādes laiks (gaidīšana uz tīklu)",
+        buckets=IMPORT_SECONDS_BUCKETS,
+    )
+)
+IMPORT_FETCH_BYTES = registry.register(
+    Histogram("import_fetch_bytes", "Viena avota ielādētie baiti", buckets=BYTES_BUCKETS)
+)
+IMPORT_PARSE_RATE = registry.register(
+    Histogram(
+        "import_parse_docs_per_second",
+        "XML parsēšanas caurlaidība vienam avotam (dokumenti/s)",
+        buckets=RATE_BUCKETS,
+    )
+)
+IMPORT_WRITE_RATE = registry.register(
+    Histogram(
+        "import_write_rows_per_second",
+        "Partijas upsert caurlaidība (rindas/s, bez COMMIT)",
+        buckets=RATE_BUCKETS,
+    )
+)
+IMPORT_COMMIT_SECONDS = registry.register(
+    Histogram("import_commit_seconds", "Partijas COMMIT ilgums", buckets=SQL_BUCKETS)
+)
+IMPORT_ROWS = registry.register(
+    Counter("import_rows_total", "Importētās rindas pa statusiem", labelnames=("status",))
+)
+DB_STATEMENT_SECONDS = registry.register(
+    Histogram(
+        "db_statement_duration_seconds",
+        "SQL izpildes ilgums pa dzinējiem un operācijām",
+        buckets=SQL_BUCKETS,
+        labelnames=("engine", "operation"),
+    )
+)
+
+# Dzinēja loma → DB faila ceļš (aizpilda `instrument_engine`)
+_database_files: dict[str, str] = {}
+
+
+def _file_sizes() -> dict[tuple[str, ...], float]:
+    sizes = {}
+    for path in set(_database_files.values()):
+        for suffix, kind in (("", "main"), ("-wal", "wal")):
+            try:
+                sizes[(kind,)] = sizes.get((kind,), 0) + os.path.getsize(path + suffix)
+            except OSError:
+                continue
+    return sizes
+
+
+registry.register(Gauge("db_file_size_bytes", "SQLite DB un WAL faila izmērs", _file_sizes, ("file",)))
+
+
+def _operation(statement: str) -> str:
+    """Pirmais SQL vārds kā operācijas iezīme (SELECT, INSERT, PRAGMA, ...)."""
+    head = statement.lstrip()[:16].split(None, 1)
+    return head[0].upper() if head else "OTHER"
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Pievieno dzinējam SQL ilguma mērīšanu; faila DB tiek iekļauta izmēra mērījumā."""
+    database = make_url(str(engine.url)).database
+    if database and database != ":memory:":
+        _database_files[name] = database
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_start"].pop()
+        DB_STATEMENT_SECONDS.observe(time.perf_counter() - started, engine=name, operation=_operation(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(context):
+        stack = context.connection.info.get("metrics_start") if context.connection is not None else None
+        if stack:
+            stack.pop()
+
+
+def observe_parse_rate(documents: Iterable[T]) -> Iterator[T]:
+    """Caurlaide dokumentu plūsmai; beigās reģistrē parsēšanas caurlaidību.
+
+    Mēra tikai laiku, kas pavadīts plūsmas `next()` iekšienē — patērētāja
+    darbs (rakstīšana DB) netiek ieskaitīts.
+    """
+    it = iter(documents)
+    count, elapsed = 0, 0.0
+    while True:
+        start = time.perf_counter()
+        try:
+            doc = next(it)
+        except StopIteration:
+            break
+        finally:
+            elapsed += time.perf_counter() - start
+        count += 1
+        yield doc
+    if count and elapsed > 0:
+        IMPORT_PARSE_RATE.observe(count / elapsed)
+
+
+def observe_batch(statuses: list[str], write_seconds: float, commit_seconds: float) -> None:
+    """Reģistrē vienas importa partijas upsert caurlaidību, COMMIT ilgumu un statusus."""
+    if statuses and write_seconds > 0:
+        IMPORT_WRITE_RATE.observe(len(statuses) / write_seconds)
+    IMPORT_COMMIT_SECONDS.observe(commit_seconds)
+    for status in ("inserted", "updated", "unchanged"):
+        if count := statuses.count(status):
+            IMPORT_ROWS.inc(count, status=status)
+
+
+class MetricsMiddleware:
+    """ASGI starpslānis: mēra pieprasījumu līdz pēdējam atbildes baitam (arī straumēm).
+
+    Maršruta iezīme ir ceļa veidne (`/api/import/{job_id}`), nevis faktiskais
+    ceļš, lai iezīmju skaits paliktu ierobežots. Saraksta galapunkts papildus
+    ieraksta `scope["state"]["documents_shape"]` (kārtošana, filtri, lapošana).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                elapsed,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status),
+            )
+            shape = scope.get("state", {}).get("documents_shape")
+            if shape is not None:
+                DOCUMENTS_REQUEST_SECONDS.observe(elapsed, **shape)
@@ -1,26 +1,177 @@
-from sqlalchemy import Boolean, Column, Date, Index, Integer, String
+from sqlalchemy import DDL, Boolean, Column, Date, ForeignKey, Index, Integer, String, Table, event, select
+from sqlalchemy.orm import column_property
 
 from app.db import Base
 
 
+# Svarīguma loģiskā secība; nezināmas vērtības kārtojas beigās
+IMPORTANCE_RANK: dict[str, int] = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+UNKNOWN_IMPORTANCE_RANK = len(IMPORTANCE_RANK)
+
+# Saraksta vaicājuma formas: vienādības filtri un kārtošanas lauki
+LIST_FILTER_COLUMNS = ("importance_rank", "category_id", "active")
+LIST_SORT_COLUMNS = ("created_at", "title", "importance_rank", "active")
+# Kārtošanas ar filtru: nosaukuma kārtošanai filtrēto daļu kārto pagaidu B-kokā
+FILTERED_SORT_COLUMNS = ("created_at", "importance_rank", "active")
+# Selektīvi filtri: viens indekss noklusējuma kārtošanai (created_at)
+SELECTIVE_FILTER_COLUMNS = ("responsible_unit_id", "file_type_id")
+
+
+def _list_indexes() -> list[Index]:
+    """Saliktie indeksi (filtrs, kārtošana, id) un (kārtošana, id) saraksta vaicājumiem.
+
+    Tikai formām, ko `test_query_plans` pārbauda: katrai kārtošanai bez filtra
+    un filtra/kārtošanas kombinācijām no FILTERED_SORT_COLUMNS SQLite nolasa
+    rindas jau sakārtotā secībā — bez pagaidu B-koka kārtošanas.
+    """
+    indexes = [Index(f"ix_documents_{sort}_id", sort, "id") for sort in LIST_SORT_COLUMNS]
+    for column in LIST_FILTER_COLUMNS:
+        for sort in FILTERED_SORT_COLUMNS:
+            if sort != column:
+                indexes.append(Index(f"ix_documents_{column}_{sort}_id", column, sort, "id"))
+    for column in SELECTIVE_FILTER_COLUMNS:
+        indexes.append(Index(f"ix_documents_{column}_created_at_id", column, "created_at", "id"))
+    # Pārklājošais indekss šķautņu skaitīšanai — grupēšana bez tabulas rindu nolasīšanas
+    indexes.append(
+        Index(
+            "ix_documents_facets",
+            "category_id",
+            "importance_rank",
+            "active",
+            "file_type_id",
+            "created_at",
+        )
+    )
+    return indexes
+
+
+def _lookup_table(name: str) -> Table:
+    return Table(
+        name,
+        Base.metadata,
+        Column("id", Integer, primary_key=True),
+        Column("name", String, nullable=False, unique=True),
+    )
+
+
+# Zemas kardinalitātes teksta lauki glabājas vārdnīcu tabulās; `documents` satur tikai
+# veselu skaitļu ārējās atslēgas `<lauks>_id` (mazāks fails un indeksi, ātrāka salīdzināšana)
+LOOKUP_TABLES: dict[str, Table] = {
+    "responsible_unit": _lookup_table("responsible_units"),
+    "file_type": _lookup_table("file_types"),
+    "importance": _lookup_table("importance_levels"),
+    "category": _lookup_table("categories"),
+}
+
+
+def _lookup_id_column(field: str) -> Column:
+    return Column(f"{field}_id", Integer, ForeignKey(LOOKUP_TABLES[field].c.id), nullable=False)
+
+
+def _lookup_name(field: str, id_column: Column):
+    """Nosaukums pēc ārējās atslēgas — korelēts apakšvaicājums pa vārdnīcas primāro atslēgu.
+
+    Tiek izvērtēts tikai atlasītajām rindām (pēc LIMIT), tāpēc neietekmē
+    saraksta vaicājuma plānu un indeksu izvēli.
+    """
+    table = LOOKUP_TABLES[field]
+    return column_property(
+        select(table.c.name).where(table.c.id == id_column).correlate_except(table).scalar_subquery()
+    )
+
+
 class Document(Base):
     __tablename__ = "documents"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     title = Column(String, nullable=False)
     description = Column(String, nullable=True)
-    responsible_unit = Column(String, nullable=False)
+    responsible_unit_id = _lookup_id_column("responsible_unit")
     created_at = Column(Date, nullable=False)
     url = Column(String, nullable=False, unique=True)
-    file_type = Column(String, nullable=False)
+    file_type_id = _lookup_id_column("file_type")
     reading_time_minutes = Column(Integer, nullable=False)
-    importance = Column(String, nullable=False)
-    category = Column(String, nullable=False)
+    importance_id = _lookup_id_column("importance")
+    # IMPORTANCE_RANK vērtība, aizpildīta importā — kārtošanai un filtrēšanai pa indeksu
+    importance_rank = Column(Integer, nullable=False)
+    category_id = _lookup_id_column("category")
     active = Column(Boolean, nullable=False, default=True)
 
-    __table_args__ = (
-        Index("ix_documents_importance", "importance"),
-        Index("ix_documents_category", "category"),
-        Index("ix_documents_active", "active"),
-        Index("ix_documents_created_at", "created_at"),
-    )
+    # Nosaukumi tikai lasīšanai (DocumentOut forma nemainās)
+    responsible_unit = _lookup_name("responsible_unit", responsible_unit_id)
+    file_type = _lookup_name("file_type", file_type_id)
+    importance = _lookup_name("importance", importance_id)
+    category = _lookup_name("category", category_id)
+    # Kanonisko lauku jaucējvērtība — nemainīti dokumenti importā netiek pārrakstīti
+    content_hash = Column(String, nullable=True)
+
+    __table_args__ = tuple(_list_indexes())
+
+
+# --- Pilnteksta meklēšana: FTS5 tabula ar ārēju saturu, sinhronizēta ar trigeriem ---
+# unicode61 + remove_diacritics 2: "drosibas" atrod "Drošības", reģistrs netiek ņemts vērā
+FTS_TABLE = "documents_fts"
+
+_FTS_CREATE = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description,
+        content='documents', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS documents_fts_ai AFTER INSERT ON documents BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS documents_fts_ad AFTER DELETE ON documents BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS documents_fts_au AFTER UPDATE OF title, description ON documents BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS documents_fts_ai",
+    "DROP TRIGGER IF EXISTS documents_fts_ad",
+    "DROP TRIGGER IF EXISTS documents_fts_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+# after_create: izpildās tikai, kad `documents` tiek izveidota no jauna (tukša), tāpēc
+# 'rebuild' nav vajadzīgs; esošā DB bez FTS tabulas netiek papildināta (skat. init_db)
+for _statement in _FTS_CREATE:
+    event.listen(Document.__table__, "after_create", DDL(_statement))
+for _statement in _FTS_DROP:
+    event.listen(Document.__table__, "before_drop", DDL(_statement))
+
+
+class FeedState(Base):
+    """Attālās XML plūsmas HTTP validatori nosacījuma ielādei (If-None-Match / If-Modified-Since)."""
+
+    __tablename__ = "feed_state"
+
+    url = Column(String, primary_key=True)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+
+
+class DocumentRollup(Base):
+    """Mēneša kopsavilkums laika rindām: dokumentu skaits un lasīšanas laika summa.
+
+    Importā tiek uzturēts ar izmaiņu deltām (`app.rollup`); atbilstību pilnam
+    pārrēķinam pārbauda `scripts/check_rollup.py`.
+    """
+
+    __tablename__ = "document_rollup"
+
+    # created_at mēnesis `YYYY-MM`; primārās atslēgas secība — mēnešu diapazonam pa indeksu
+    month = Column(String, primary_key=True)
+    importance_id = Column(Integer, ForeignKey(LOOKUP_TABLES["importance"].c.id), primary_key=True)
+    category_id = Column(Integer, ForeignKey(LOOKUP_TABLES["category"].c.id), primary_key=True)
+    active = Column(Boolean, primary_key=True)
+    doc_count = Column(Integer, nullable=False, default=0)
+    reading_time_total = Column(Integer, nullable=False, default=0)
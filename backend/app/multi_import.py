@@ -0,0 +1,400 @@
+"""Vairāku avotu imports: vienlaicīga ielāde ar ierobežotu paralēlismu un viens rakstītājs.
+
+Avoti tiek ielādēti ar kopīgu `httpx.AsyncClient` savienojumu pūlu un parsēti
+pavedienā, tiklīdz pienāk baiti. Parsētās rindas nonāk vienā rindā (queue), no kuras
+tās partijās ieraksta viens rakstītājs — SQLite redz vienu secīgu rakstītāju.
+
+Konfigurācija no vides mainīgajiem:
+
+    REMOTE_URLS             avotu URL, atdalīti ar komatu vai atstarpi (noklusējums: REMOTE_URL)
+    IMPORT_CONCURRENCY      8    vienlaikus ielādējamo avotu skaits
+    IMPORT_SOURCE_TIMEOUT   30   viena avota kopējais ielādes un parsēšanas laiks (s)
+    IMPORT_RETRIES          3    atkārtojumi pēc neveiksmīga savienojuma
+    IMPORT_BACKOFF          0.5  pirmā atkārtojuma pauze (s); katram nākamajam ×2
+"""
+
+import asyncio
+import os
+import re
+import time
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.cache import bump_generation
+from app.import_service import (
+    IMPORT_BATCH_SIZE,
+    RemoteFeed,
+    aget_feed_state,
+    asave_feed_state,
+    astream_remote_xml,
+    aupsert_rows,
+    document_row,
+    get_feed_state,
+    save_feed_state,
+    upsert_rows,
+)
+from app.jobs import ImportFailed, ImportJob
+from app.metrics import IMPORT_FETCH_BYTES, IMPORT_FETCH_SECONDS, IMPORT_PARSE_RATE, observe_batch
+from app.parser import DocumentStreamParser
+from app.schemas import ImportResult, SourceResult
+
+REMOTE_URL = os.getenv("REMOTE_URL", "http://localhost:8000/api/remote/documents.xml")
+REMOTE_URLS = [url for url in re.split(r"[,\s]+", os.getenv("REMOTE_URLS", "")) if url] or [REMOTE_URL]
+IMPORT_CONCURRENCY = int(os.getenv("IMPORT_CONCURRENCY", "8"))
+IMPORT_SOURCE_TIMEOUT = float(os.getenv("IMPORT_SOURCE_TIMEOUT", "30"))
+IMPORT_RETRIES = int(os.getenv("IMPORT_RETRIES", "3"))
+IMPORT_BACKOFF = float(os.getenv("IMPORT_BACKOFF", "0.5"))
+
+
+@dataclass(frozen=True)
+class Source:
+    url: str
+    timeout: float = IMPORT_SOURCE_TIMEOUT
+    retries: int = IMPORT_RETRIES
+
+
+def configured_sources() -> list[Source]:
+    """Avoti no konfigurācijas ar pašreizējiem taimauta un atkārtojumu iestatījumiem."""
+    return [Source(url, timeout=IMPORT_SOURCE_TIMEOUT, retries=IMPORT_RETRIES) for url in REMOTE_URLS]
+
+
+def get_http_transport() -> httpx.AsyncBaseTransport | None:
+    """HTTP transports importa klientam; None — tīkls (testos tiek aizstāts)."""
+    return None
+
+
+class SyncWriter:
+    """Rakstītājs ar sinhrono sesiju; DB darbi notiek pavedienā, lai neaizturētu ielādi."""
+
+    def __init__(self, db: Session):
+        self._db = db
+
+    async def feed_state(self, url: str) -> tuple[str | None, str | None] | None:
+        return await asyncio.to_thread(get_feed_state, self._db, url)
+
+    async def write(self, rows: list[dict]) -> list[str]:
+        return await asyncio.to_thread(self._write, rows)
+
+    def _write(self, rows: list[dict]) -> list[str]:
+        start = time.perf_counter()
+        statuses = upsert_rows(rows, self._db)
+        written = time.perf_counter()
+        self._db.commit()
+        observe_batch(statuses, written - start, time.perf_counter() - written)
+        return statuses
+
+    async def save_feed_state(self, url: str, feed: RemoteFeed) -> None:
+        await asyncio.to_thread(save_feed_state, self._db, feed, url)
+
+
+class AsyncWriter:
+    """Rakstītājs ar asinhrono (aiosqlite) sesiju."""
+
+    def __init__(self, db: AsyncSession):
+        self._db = db
+
+    async def feed_state(self, url: str) -> tuple[str | None, str | None] | None:
+        return await aget_feed_state(self._db, url)
+
+    async def write(self, rows: list[dict]) -> list[str]:
+        start = time.perf_counter()
+        statuses = await aupsert_rows(rows, self._db)
+        written = time.perf_counter()
+        await self._db.commit()
+        observe_batch(statuses, written - start, time.perf_counter() - written)
+        return statuses
+
+    async def save_feed_state(self, url: str, feed: RemoteFeed) -> None:
+        await asave_feed_state(self._db, feed, url)
+
+
+def _retryable(error: httpx.HTTPError) -> bool:
+    """Savienojuma kļūdas, taimauti, 429 un 5xx atbildes ir pārejošas."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+@dataclass
+class _Timings:
+    """Viena avota laiks, kas pavadīts, gaidot tīklu un rakstītāja rindu."""
+
+    fetch: float = 0.0
+    queue: float = 0.0
+
+
+async def _counted(
+    chunks: AsyncIterator[bytes], result: SourceResult, timings: _Timings
+) -> AsyncIterator[bytes]:
+    while True:
+        start = time.perf_counter()
+        try:
+            chunk = await anext(chunks)
+        except StopAsyncIteration:
+            return
+        finally:
+            timings.fetch += time.perf_counter() - start
+        result.bytes += len(chunk)
+        yield chunk
+
+
+def _observe_source(result: SourceResult, timings: _Timings, docs: int, elapsed: float) -> None:
+    """Reģistrē ielādes laiku/apjomu un parsēšanas caurlaidību (atlikušais laiks)."""
+    IMPORT_FETCH_SECONDS.observe(timings.fetch)
+    IMPORT_FETCH_BYTES.observe(result.bytes)
+    parse = elapsed - timings.fetch - timings.queue
+    if docs and parse > 0:
+        IMPORT_PARSE_RATE.observe(docs / parse)
+
+
+class _ParseThread:
+    """Avota straumes parseris savā pavedienā, lai parsēšana neaizturētu notikumu ciklu.
+
+    Viens pavediens katram avotam (nevis `asyncio.to_thread` pūls): lxml parseri
+    nedrīkst barot no dažādiem pavedieniem — process avarē.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="import-parse")
+        self._parser: DocumentStreamParser | None = None
+
+    def __enter__(self) -> "_ParseThread":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def rows(self, chunk: bytes | None) -> list[dict]:
+        """Parsē bloku (None — plūsmas beigas); atgriež pabeigto dokumentu DB rindas."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._rows, chunk)
+
+    def _rows(self, chunk: bytes | None) -> list[dict]:
+        if self._parser is None:
+            self._parser = DocumentStreamParser()
+        docs = self._parser.close() if chunk is None else self._parser.feed(chunk)
+        return [document_row(doc) for doc in docs]
+
+
+async def _put(queue: asyncio.Queue, item: tuple, timings: _Timings, deadline: asyncio.Timeout) -> None:
+    start = time.perf_counter()
+    await queue.put(item)
+    waited = time.perf_counter() - start
+    timings.queue += waited
+    # Gaidīšana uz rakstītāju nav avota laiks — termiņš tiek pagarināts
+    deadline.reschedule(deadline.when() + waited)
+
+
+async def _fetch_source(
+    index: int,
+    source: Source,
+    client: httpx.AsyncClient,
+    slots: asyncio.Semaphore,
+    queue: asyncio.Queue,
+    result: SourceResult,
+    validators: tuple[str | None, str | None] | None,
+    batch_size: int,
+    backoff: float,
+) -> None:
+    """Ielādē un parsē vienu avotu; rindas partijās liek rakstītāja rindā.
+
+    httpx taimauts attiecas uz katru savienošanos/lasīšanu, tāpēc viss avots
+    (ar atkārtojumiem, bez gaidīšanas uz rakstītāju) ir ierobežots ar
+    `source.timeout`. Kļūda tiek ierakstīta avota rezultātā, nevis izcelta.
+    """
+    async with slots:
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(source.timeout) as deadline:
+                await _fetch_attempts(index, source, client, queue, result, validators, batch_size, backoff, deadline)
+        except TimeoutError:
+            result.error = f"Avota ielāde pārsniedza {source.timeout:g} s taimautu"
+        result.seconds = round(time.perf_counter() - start, 3)
+
+
+async def _fetch_attempts(
+    index: int,
+    source: Source,
+    client: httpx.AsyncClient,
+    queue: asyncio.Queue,
+    result: SourceResult,
+    validators: tuple[str | None, str | None] | None,
+    batch_size: int,
+    backoff: float,
+    deadline: asyncio.Timeout,
+) -> None:
+    """Avota ielādes mēģinājumi: atkārto tikai pārejošas kļūdas, kamēr neviena rinda nav nodota rakstītājam."""
+    etag, last_modified = validators or (None, None)
+    for attempt in range(1, source.retries + 2):
+        result.attempts = attempt
+        result.bytes = 0
+        sent = 0
+        timings = _Timings()
+        started = time.perf_counter()
+        try:
+            async with astream_remote_xml(
+                source.url,
+                client,
+                timeout=source.timeout,
+                etag=etag,
+                last_modified=last_modified,
+            ) as feed:
+                # Savienojums un galvenes arī ir ielādes laiks
+                timings.fetch += time.perf_counter() - started
+                if feed.not_modified:
+                    result.not_modified = True
+                    return
+                chunks = _counted(feed.chunks, result, timings)
+                batch = []
+                with _ParseThread() as parse:
+                    while True:
+                        chunk = await anext(chunks, None)
+                        batch.extend(await parse.rows(chunk))
+                        while len(batch) >= batch_size:
+                            await _put(queue, (index, batch[:batch_size]), timings, deadline)
+                            sent += batch_size
+                            batch = batch[batch_size:]
+                        if chunk is None:
+                            break
+                if batch:
+                    await _put(queue, (index, batch), timings, deadline)
+                    sent += len(batch)
+                _observe_source(result, timings, sent, time.perf_counter() - started)
+                # Avots pabeigts — validatorus saglabā pēc tā rindu ieraksta
+                await _put(queue, (index, feed), timings, deadline)
+            return
+        except (ValueError, SyntaxError) as e:
+            result.error = f"XML parsēšanas kļūda: {e}"
+            return
+        except httpx.HTTPError as e:
+            if sent or attempt > source.retries or not _retryable(e):
+                result.error = f"Neizdevās ielādēt XML: {e}"
+                return
+            await asyncio.sleep(backoff * 2 ** (attempt - 1))
+
+
+async def _write_queue(
+    queue: asyncio.Queue,
+    writer: SyncWriter | AsyncWriter,
+    results: list[SourceResult],
+    batch_size: int,
+    progress: Callable[[str, int], None] | None,
+) -> None:
+    """Vienīgais rakstītājs: apvieno visu avotu rindas partijās pa `batch_size`."""
+    pending: list[tuple[int, dict]] = []
+    processed = 0
+
+    async def flush(count: int) -> None:
+        nonlocal pending, processed
+        batch, pending = pending[:count], pending[count:]
+        if progress is not None:
+            progress("writing", processed + len(batch))
+        statuses = await writer.write([row for _, row in batch])
+        if any(status != "unchanged" for status in statuses):
+            bump_generation()
+        for (index, _), status in zip(batch, statuses):
+            setattr(results[index], status, getattr(results[index], status) + 1)
+        processed += len(batch)
+        if progress is not None:
+            progress("parsing", processed)
+
+    while (item := await queue.get()) is not None:
+        index, payload = item
+        if isinstance(payload, RemoteFeed):
+            if pending:
+                await flush(len(pending))
+            await writer.save_feed_state(results[index].url, payload)
+            continue
+        pending.extend((index, row) for row in payload)
+        while len(pending) >= batch_size:
+            await flush(batch_size)
+    if pending:
+        await flush(len(pending))
+
+
+async def import_sources(
+    sources: list[Source],
+    writer: SyncWriter | AsyncWriter,
+    transport: httpx.AsyncBaseTransport | None = None,
+    concurrency: int | None = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    force: bool = False,
+    progress: Callable[[str, int], None] | None = None,
+    backoff: float | None = None,
+) -> ImportResult:
+    """Importē visus avotus vienlaicīgi; atgriež kopsummu un sadalījumu pa avotiem.
+
+    `force=True` ignorē saglabātos validatorus. Avota kļūda neaptur pārējos.
+    """
+    concurrency = concurrency or IMPORT_CONCURRENCY
+    backoff = IMPORT_BACKOFF if backoff is None else backoff
+    results = [SourceResult(url=source.url) for source in sources]
+    states = {} if force else {source.url: await writer.feed_state(source.url) for source in sources}
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=2 * concurrency)
+    slots = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(transport=transport, limits=limits) as client:
+        writing = asyncio.create_task(_write_queue(queue, writer, results, batch_size, progress))
+        fetching = asyncio.gather(
+            *(
+                _fetch_source(
+                    index,
+                    source,
+                    client,
+                    slots,
+                    queue,
+                    results[index],
+                    states.get(source.url),
+                    batch_size,
+                    backoff,
+                )
+                for index, source in enumerate(sources)
+            )
+        )
+        try:
+            # Ja rakstītājs krīt, ielādes jāpārtrauc — citādi tās gaidītu pilnā rindā
+            await asyncio.wait({writing, fetching}, return_when=asyncio.FIRST_COMPLETED)
+            if writing.done():
+                writing.result()
+            await fetching
+            await queue.put(None)
+            await writing
+        finally:
+            for task in (fetching, writing):
+                task.cancel()
+            await asyncio.gather(fetching, writing, return_exceptions=True)
+
+    total = ImportResult(sources=results)
+    for result in results:
+        total.inserted += result.inserted
+        total.updated += result.updated
+        total.unchanged += result.unchanged
+    total.not_modified = all(result.not_modified for result in results)
+    return total
+
+
+async def run_import_job(
+    job: ImportJob,
+    writer: SyncWriter | AsyncWriter,
+    transport: httpx.AsyncBaseTransport | None = None,
+    force: bool = False,
+) -> ImportResult:
+    """Importa darba ķermenis: visi konfigurētie avoti; kļūda, ja neizdevās neviens."""
+    job.report("fetching", 0)
+    result = await import_sources(
+        configured_sources(), writer, transport=transport, force=force, progress=job.report
+    )
+    failed = [source for source in result.sources if source.error is not None]
+    if failed and len(failed) == len(result.sources):
+        if len(failed) == 1:
+            raise ImportFailed(failed[0].error)
+        raise ImportFailed(
+            "Neizdevās importēt nevienu avotu: "
+            + "; ".join(f"{source.url}: {source.error}" for source in failed)
+        )
+    return result
@@ -1,11 +1,27 @@
-"""XML dokumentu metadatu parsēšana ar latviešu→angļu vērtību kartēšanu."""
+"""XML dokumentu metadatu parsēšana ar latviešu→angļu vērtību kartēšanu.
 
+Parsēšanas aizmugure tiek izvēlēta automātiski: `lxml`, ja tā ir instalēta,
+citādi standarta bibliotēkas `xml.etree`. To var norādīt ar `PARSER_BACKEND`.
+"""
+
+import os
 import xml.etree.ElementTree as ET
+from collections import deque
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from datetime import date
+from itertools import islice
 from pathlib import Path
+from typing import Any, Callable, Protocol
 
 from app.schemas import DocumentCreate
 
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # lxml nav obligāta
+    lxml_etree = None
+
 # --- Kartēšanas vārdnīcas: latviešu XML vērtības → kanoniskās DB vērtības ---
 
 IMPORTANCE_MAP: dict[str, str] = {
@@ -29,13 +45,94 @@ ACTIVE_MAP: dict[str, bool] = {
 
 VALID_FILE_TYPES = {"pdf", "docx", "xlsx", "html"}
 
+# Faila lasīšanas bloka izmērs inkrementālajai parsēšanai (baitos)
+CHUNK_SIZE = 64 * 1024
+
+# Paralēlā parsēšana: procesu skaits (1 — secīgi) un viena diapazona izmērs (baitos)
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "1"))
+PARSE_CHUNK_SIZE = int(os.getenv("PARSE_CHUNK_SIZE", str(4 * 1024 * 1024)))
+
+DOCUMENT_START = b"<document"
+# Baiti aiz `<document`, kas apliecina <document> tagu (ar atribūtiem vai bez), nevis <documents>
+DOCUMENT_START_END = (b">", b"/", b" ", b"\t", b"\r", b"\n")
+
+
+class DocumentFields(Protocol):
+    """<document> lauku teksti pēc taga nosaukuma."""
+
+    def get(self, tag: str) -> str | None: ...
+
+
+class _FindFields:
+    """Katrs lauks ar atsevišķu `find()` — pārskata bērnus katram laukam."""
+
+    def __init__(self, element: ET.Element):
+        self._element = element
+
+    def get(self, tag: str) -> str | None:
+        child = self._element.find(tag)
+        return None if child is None else child.text
+
+
+def _child_texts(element) -> dict[str, str | None]:
+    """Vienā gājienā savāc tiešo bērnu tekstus pēc taga (kā `find()` — pirmais uzvar)."""
+    fields = {}
+    for child in element:
+        fields.setdefault(child.tag, child.text)
+    return fields
+
+
+@dataclass(frozen=True)
+class ParserBackend:
+    """XML aizmugure: straumes parseris (XMLPullParser saskarne) un lauku nolasīšana."""
+
+    name: str
+    pull_parser: Callable[[], Any]
+    fields: Callable[[Any], DocumentFields]
+
 
-def _required_text(element: ET.Element, tag: str) -> str:
+def _lxml_pull_parser():
+    # Kā xml.etree: tikai iekšējās entītijas, bez tīkla pieprasījumiem
+    return lxml_etree.XMLPullParser(events=("start", "end"), no_network=True)
+
+
+BACKENDS: dict[str, ParserBackend] = {
+    # Sākotnējā realizācija: `find()` katram no desmit laukiem
+    "stdlib-find": ParserBackend(
+        "stdlib-find", lambda: ET.XMLPullParser(events=("start", "end")), _FindFields
+    ),
+    "stdlib": ParserBackend(
+        "stdlib", lambda: ET.XMLPullParser(events=("start", "end")), _child_texts
+    ),
+}
+if lxml_etree is not None:
+    BACKENDS["lxml"] = ParserBackend("lxml", _lxml_pull_parser, _child_texts)
+
+
+def get_backend(name: str | None = None) -> ParserBackend:
+    """Atgriež aizmuguri pēc nosaukuma; noklusējumā — ātrāko pieejamo."""
+    name = name or os.getenv("PARSER_BACKEND") or ("lxml" if "lxml" in BACKENDS else "stdlib")
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Nezināma parsera aizmugure: '{name}'. Pieejamās: {', '.join(BACKENDS)}"
+        )
+    return BACKENDS[name]
+
+
+def _required_text(fields: DocumentFields, tag: str) -> str:
     """Nolasa obligāta elementa tekstu; ceļ kļūdu, ja trūkst."""
-    child = element.find(tag)
-    if child is None or not child.text:
+    text = fields.get(tag)
+    if not text:
         raise ValueError(f"Trūkst obligātā lauka: <{tag}>")
-    return child.text.strip()
+    return text.strip()
+
+
+def _optional_text(fields: DocumentFields, tag: str) -> str | None:
+    """Nolasa neobligāta elementa tekstu; trūkstošs vai tukšs elements → None."""
+    text = fields.get(tag)
+    if not text:
+        return None
+    return text.strip() or None
 
 
 def _map_enum(value: str, mapping: dict, field_name: str):
@@ -49,8 +146,8 @@ def _map_enum(value: str, mapping: dict, field_name: str):
     return mapping[value]
 
 
-def _parse_document(elem: ET.Element) -> DocumentCreate:
-    """Parsē vienu <document> elementu; atgriež DocumentCreate ar kanoniskām vērtībām."""
+def _parse_document(elem: DocumentFields) -> DocumentCreate:
+    """Parsē viena <document> lauku tekstus; atgriež DocumentCreate ar kanoniskām vērtībām."""
     file_type = _required_text(elem, "file_type")
     if file_type not in VALID_FILE_TYPES:
         raise ValueError(
@@ -64,7 +161,7 @@ def _parse_document(elem: ET.Element) -> DocumentCreate:
 
     return DocumentCreate(
         title=_required_text(elem, "title"),
-        description=_required_text(elem, "description"),
+        description=_optional_text(elem, "description"),
         responsible_unit=_required_text(elem, "responsible_unit"),
         created_at=date.fromisoformat(_required_text(elem, "created_at")),
         url=_required_text(elem, "url"),
@@ -82,20 +179,245 @@ def _parse_document(elem: ET.Element) -> DocumentCreate:
     )
 
 
-def parse_documents_xml(xml_text: str) -> list[DocumentCreate]:
-    """Parsē XML tekstu; atgriež DocumentCreate sarakstu."""
-    root = ET.fromstring(xml_text)
+class DocumentStreamParser:
+    """Inkrementāls <document> elementu parseris: baro ar blokiem, saņem DocumentCreate.
+
+    Apstrādātie <document> elementi tiek atbrīvoti, tāpēc atmiņas patēriņš
+    nav atkarīgs no plūsmas garuma. Katra `feed` rezultāts jāizlasa pirms
+    nākamā bloka padošanas.
+    """
+
+    def __init__(self, backend: ParserBackend | None = None):
+        self._backend = backend or get_backend()
+        self._parser = self._backend.pull_parser()
+        self._root = None
+        self._depth = 0
+        self.count = 0
+
+    def feed(self, chunk: bytes | str) -> Iterator[DocumentCreate]:
+        # Lieli bloki (piem., viss XML teksts) tiek padoti pa daļām — lxml
+        # atsakās apstrādāt vienu milzīgu buferi un atmiņa paliek ierobežota
+        try:
+            for start in range(0, len(chunk), CHUNK_SIZE):
+                self._parser.feed(chunk[start : start + CHUNK_SIZE])
+                yield from self._drain()
+        except SyntaxError as e:
+            # lxml ceļ kļūdu jau `feed` laikā — vispirms jāatdod līdz tai pabeigtie dokumenti
+            yield from self._drain()
+            raise self._syntax_error(e) from e
+
+    def close(self) -> Iterator[DocumentCreate]:
+        try:
+            self._parser.close()
+            yield from self._drain()
+        except SyntaxError as e:
+            raise self._syntax_error(e) from e
+
+    def _syntax_error(self, error: SyntaxError) -> ET.ParseError:
+        """Abu aizmuguru sintakses kļūda kā ET.ParseError ar dokumenta numuru un pozīciju."""
+        numbered = ET.ParseError(f"Kļūda dokumentā #{self.count + 1}: {error}")
+        numbered.position = getattr(error, "position", None)
+        return numbered
+
+    def _drain(self) -> Iterator[DocumentCreate]:
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = elem
+                self._depth += 1
+                continue
+
+            self._depth -= 1
+            # Tikai saknes tiešie bērni; ligzdotie elementi paliek vecākam
+            if self._depth != 1:
+                continue
+            if elem.tag == "document":
+                self.count += 1
+                try:
+                    yield _parse_document(self._backend.fields(elem))
+                except ValueError as e:
+                    raise ValueError(f"Kļūda dokumentā #{self.count}: {e}") from e
+            self._root.clear()
+
+
+def iter_documents(chunks: Iterable[bytes | str]) -> Iterator[DocumentCreate]:
+    """Inkrementāli parsē XML plūsmu; ģenerē pa vienam DocumentCreate."""
+    stream = DocumentStreamParser()
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+    yield from stream.close()
+
+
+async def aiter_documents(chunks: AsyncIterable[bytes | str]) -> AsyncIterator[DocumentCreate]:
+    """Asinhronais `iter_documents`: parsē blokus, tiklīdz tie pienāk (piem., no httpx.AsyncClient)."""
+    stream = DocumentStreamParser()
+    async for chunk in chunks:
+        for doc in stream.feed(chunk):
+            yield doc
+    for doc in stream.close():
+        yield doc
+
+
+def iter_documents_xml(xml_text: str) -> Iterator[DocumentCreate]:
+    """Parsē XML tekstu; ģenerē DocumentCreate pa vienam."""
+    return iter_documents([xml_text])
+
+
+def iter_xml_file(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[DocumentCreate]:
+    """Parsē XML failu no diska pa blokiem; ģenerē DocumentCreate pa vienam."""
+    with path.open("rb") as f:
+        yield from iter_documents(iter(lambda: f.read(chunk_size), b""))
+
+
+def _find(f, needle: bytes, start: int, end: int | None = None, reverse: bool = False) -> int:
+    """Atrod `needle` pozīciju failā no `start` (vai pēdējo pirms `end`); -1, ja nav."""
+    window = max(CHUNK_SIZE, len(needle) * 2)
+    if reverse:
+        pos = end
+        while pos > start:
+            begin = max(start, pos - window)
+            f.seek(begin)
+            found = f.read(pos - begin + len(needle) - 1).rfind(needle)
+            if found != -1 and begin + found + len(needle) <= end:
+                return begin + found
+            pos = begin
+        return -1
+    pos = start
+    while True:
+        f.seek(pos)
+        block = f.read(window)
+        found = block.find(needle)
+        if found != -1:
+            return pos + found
+        if len(block) < window:
+            return -1
+        # Pārklāšanās, lai neizlaistu uz bloku robežas sadalītu tagu
+        pos += window - len(needle) + 1
+
 
+def _find_document(f, start: int) -> int:
+    """Atrod nākamo `<document>` vai `<document …>` tagu no `start`; -1, ja nav."""
+    while (pos := _find(f, DOCUMENT_START, start)) != -1:
+        f.seek(pos + len(DOCUMENT_START))
+        if f.read(1) in DOCUMENT_START_END:
+            return pos
+        start = pos + 1
+    return -1
+
+
+def split_document_ranges(path: Path, chunk_size: int = PARSE_CHUNK_SIZE) -> tuple[bytes, bytes, list[tuple[int, int]]]:
+    """Sadala XML failu baitu diapazonos, kas sākas ar `<document>` tagu.
+
+    Atgriež saknes atvēršanas daļu (deklarācija + `<documents>`), aizvēršanas
+    daļu un diapazonu sarakstu; katrs diapazons satur veselus <document>
+    elementus, ko var parsēt neatkarīgi. Robežas tiek meklētas baitos, tāpēc
+    `<document>` teksts CDATA vai komentārā var sadalīt elementu — tad
+    diapazons nav korekts XML un `iter_xml_file_parallel` parsē secīgi.
+    """
+    size = path.stat().st_size
+    with path.open("rb") as f:
+        first = _find_document(f, 0)
+        if first == -1:
+            f.seek(0)
+            data = f.read()
+            return data, b"", []
+        tail = _find(f, b"</", first, size, reverse=True)
+        f.seek(0)
+        head = f.read(first)
+        f.seek(tail)
+        foot = f.read()
+
+        ranges = []
+        start = first
+        while start < tail:
+            boundary = _find_document(f, min(start + chunk_size, tail))
+            end = tail if boundary == -1 or boundary >= tail else boundary
+            ranges.append((start, end))
+            start = end
+    return head, foot, ranges
+
+
+def _parse_range(path: Path, start: int, end: int, head: bytes, foot: bytes):
+    """Parsē vienu diapazonu darba procesā; atgriež (dokumenti, skaits, kļūda).
+
+    Kļūdas teksts tiek atgriezts bez dokumenta numura — globālo numuru
+    piešķir izsaucējs, kas zina iepriekšējo diapazonu dokumentu skaitu.
+    Ja diapazons nav korekts XML, dokumentu vietā ir None.
+    """
+    with path.open("rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    stream = DocumentStreamParser()
     documents = []
-    for i, elem in enumerate(root.findall("document"), start=1):
+    try:
+        for piece in (head, data, foot):
+            documents.extend(stream.feed(piece))
+        documents.extend(stream.close())
+    except SyntaxError:
+        # Pozīcija ir relatīva pret diapazonu, un lxml XMLSyntaxError nav
+        # serializējama — kļūdu ziņo izsaucēja secīgā parsēšana
+        return None, stream.count, None
+    except ValueError as e:
+        return documents, stream.count, str(e.__cause__ or e)
+    return documents, stream.count, None
+
+
+def iter_xml_file_parallel(
+    path: Path,
+    workers: int = PARSE_WORKERS,
+    chunk_size: int = PARSE_CHUNK_SIZE,
+) -> Iterator[DocumentCreate]:
+    """Parsē XML failu vairākos procesos; ģenerē DocumentCreate faila secībā.
+
+    Fails tiek sadalīts pa `<document>` robežām; vienlaikus apstrādē ir ne
+    vairāk kā 2 × `workers` diapazonu, tāpēc atmiņas patēriņš ir ierobežots.
+    Kļūdu ziņojumos saglabājas dokumenta numurs visā failā. Ja diapazons nav
+    korekts XML, parsēšana turpinās secīgi no šī diapazona dokumenta. Ja
+    `workers` ≤ 1, tiek izmantots secīgais `iter_xml_file`.
+    """
+    if workers <= 1:
+        yield from iter_xml_file(path)
+        return
+
+    head, foot, ranges = split_document_ranges(path, chunk_size)
+    if not ranges:
+        yield from iter_documents([head])
+        return
+
+    fallback = False
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        ranges = iter(ranges)
+        number = 0
         try:
-            documents.append(_parse_document(elem))
-        except ValueError as e:
-            raise ValueError(f"Kļūda dokumentā #{i}: {e}") from e
+            while True:
+                while len(pending) < 2 * workers and (span := next(ranges, None)) is not None:
+                    pending.append(pool.submit(_parse_range, path, *span, head, foot))
+                if not pending:
+                    break
+                documents, count, error = pending.popleft().result()
+                if documents is None:
+                    fallback = True
+                    break
+                yield from documents
+                if error is not None:
+                    raise ValueError(f"Kļūda dokumentā #{number + count}: {error}")
+                number += count
+        finally:
+            for future in pending:
+                future.cancel()
 
-    return documents
+    if fallback:
+        # Vai nu fails ir bojāts, vai robeža trāpīja `<document>` tekstā CDATA vai
+        # komentārā; secīgā parsēšana izšķir abus un ziņo kļūdas pozīciju failā
+        yield from islice(iter_xml_file(path), number, None)
+
+
+def parse_documents_xml(xml_text: str) -> list[DocumentCreate]:
+    """Parsē XML tekstu; atgriež DocumentCreate sarakstu."""
+    return list(iter_documents_xml(xml_text))
 
 
 def parse_xml_file(path: Path) -> list[DocumentCreate]:
     """Parsē XML failu no diska."""
-    return parse_documents_xml(path.read_text(encoding="utf-8"))
+    return list(iter_xml_file(path))
@@ -0,0 +1,104 @@
+"""Viena pieprasījuma profilēšana: Server-Timing galvene un lēno vaicājumu žurnāls.
+
+Konfigurācija no vides mainīgajiem:
+
+    SLOW_QUERY_MS              500                      saraksta vaicājuma slieksnis (ms); <0 — izslēgts
+    SLOW_QUERY_LOG             data/slow-queries.log    žurnāla fails (JSON rinda uz ierakstu)
+    SLOW_QUERY_LOG_MAX_BYTES   10485760                 faila izmērs, pēc kura tas tiek rotēts
+    SLOW_QUERY_LOG_BACKUPS     5                        paturēto rotēto failu skaits
+"""
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from fastapi import Header, Query
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+SLOW_QUERY_LOG = os.getenv(
+    "SLOW_QUERY_LOG", str(Path(__file__).resolve().parent.parent / "data" / "slow-queries.log")
+)
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+
+
+class RequestTimer:
+    """Uzkrāj nosauktu posmu ilgumus (ms) vienam pieprasījumam."""
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    @property
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def server_timing(self, rows: int, cache: str) -> str:
+        """Server-Timing galvenes vērtība: posmu ilgumi, rindu skaits un kešatmiņas statuss."""
+        metrics = [f"{name};dur={duration:.3f}" for name, duration in self.stages.items()]
+        metrics.append(f'rows;desc="{rows}"')
+        metrics.append(f'cache;desc="{cache}"')
+        metrics.append(f"total;dur={self.total_ms:.3f}")
+        return ", ".join(metrics)
+
+
+def timing_requested(
+    debug: bool = Query(default=False, description="Pievienot Server-Timing galveni (profilēšana)"),
+    x_debug_timing: str | None = Header(default=None),
+) -> bool:
+    """Profilēšanas režīms: `?debug=true` vai galvene `X-Debug-Timing: 1`."""
+    return debug or (x_debug_timing or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def is_slow(timer: RequestTimer) -> bool:
+    return SLOW_QUERY_MS >= 0 and timer.total_ms >= SLOW_QUERY_MS
+
+
+@lru_cache(maxsize=None)
+def _slow_query_logger(path: str, max_bytes: int, backups: int) -> logging.Logger:
+    """Atsevišķs (nereģistrēts) žurnālists katram failam; fails tiek atvērts pirmajā ierakstā."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    logger = logging.Logger("slow_queries", level=logging.INFO)
+    handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    return logger
+
+
+def log_slow_query(
+    route: str,
+    shape: dict[str, str],
+    timer: RequestTimer,
+    rows: int,
+    sql: str,
+    params: tuple,
+    plan: list[str],
+) -> None:
+    """Ieraksta lēnā vaicājuma SQL, parametrus, plānu un posmu ilgumus (viena JSON rinda)."""
+    entry = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "route": route,
+        "shape": shape,
+        "total_ms": round(timer.total_ms, 3),
+        "stages_ms": {name: round(duration, 3) for name, duration in timer.stages.items()},
+        "rows": rows,
+        "sql": sql,
+        "params": list(params),
+        "plan": plan,
+    }
+    logger = _slow_query_logger(SLOW_QUERY_LOG, SLOW_QUERY_LOG_MAX_BYTES, SLOW_QUERY_LOG_BACKUPS)
+    logger.info(json.dumps(entry, ensure_ascii=False, default=str))
@@ -0,0 +1,255 @@
+"""Dokumentu saraksta vaicājums: filtri, kārtošana un kursora (keyset) lapošana."""
+
+import base64
+import binascii
+import json
+import re
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy import Select, column, false, func, literal_column, select, table, tuple_
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.expression import UnaryExpression
+
+from app.lookups import lookup_cache
+from app.models import FTS_TABLE, IMPORTANCE_RANK, LOOKUP_TABLES, Document
+from app.serialization import DOCUMENT_OUT_COLUMNS
+
+IMPORTANCE_BY_RANK = {rank: name for name, rank in IMPORTANCE_RANK.items()}
+
+VALID_SORT_FIELDS = {"created_at", "title", "importance", "active"}
+
+# Kārtošana pēc atbilstības (bm25) — tikai kopā ar meklēšanu `q`, bez kursora lapošanas
+RELEVANCE_SORT = "relevance"
+
+# API kārtošanas lauks → DB kolonna (svarīgumam — loģiskā secība, nevis alfabētiskā)
+SORT_COLUMNS = {
+    "created_at": Document.created_at,
+    "title": Document.title,
+    "importance": Document.importance_rank,
+    "active": Document.active,
+}
+
+# Kursora atslēgas JSON tips katram kārtošanas laukam (created_at — ISO datums tekstā)
+CURSOR_VALUE_TYPES = {"created_at": str, "title": str, "importance": int, "active": bool}
+
+# FTS5 tabula (models.FTS_TABLE); virsraksta atbilstība svērta augstāk par aprakstu
+documents_fts = table(FTS_TABLE, column("rowid"))
+_fts = literal_column(FTS_TABLE)
+RELEVANCE = -func.bm25(_fts, 10.0, 1.0)
+
+
+@dataclass(frozen=True)
+class DocumentFilters:
+    q: str | None = None
+    importance: str | None = None
+    category: str | None = None
+    active: bool | None = None
+    created_from: date | None = None
+    created_to: date | None = None
+    responsible_unit: str | None = None
+    file_type: str | None = None
+
+
+def _without_index(column):
+    """Unārais `+` liedz SQLite izmantot kolonnas indeksu šim nosacījumam."""
+    return UnaryExpression(column, operator=operators.custom_op("+"), type_=column.type)
+
+
+def lookup_id(field: str, name: str):
+    """Vārdnīcas id pēc nosaukuma kā konstants apakšvaicājums (nezināmam — NULL, nav rindu).
+
+    SQLite to izvērtē vienreiz, un salīdzinājums ar `<lauks>_id` izmanto indeksu.
+    """
+    table = LOOKUP_TABLES[field]
+    return select(table.c.id).where(table.c.name == name).scalar_subquery()
+
+
+def fts_match_query(q: str) -> str:
+    """Pārveido meklēšanas tekstu drošā FTS5 vaicājumā: katrs vārds kā prefikss, jāsakrīt visiem.
+
+    Prefiksi aptver latviešu locījumu galotnes ("politik" → "politika", "politikas").
+    """
+    words = re.findall(r"\w+", q)
+    if not words:
+        raise ValueError(f"Meklēšanas vaicājumā nav neviena vārda: '{q}'")
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def apply_filters(query: Query, filters: DocumentFilters, sort: str | None = None) -> Query:
+    """Pievieno vaicājumam WHERE nosacījumus no norādītajiem filtriem.
+
+    Ja kārtošana nav pēc `created_at`, datumu diapazons tiek pārbaudīts,
+    nolasot rindas kārtošanas indeksā, nevis meklēts `created_at` indeksā —
+    citādi SQLite atlasītu diapazonu un kārtotu to pagaidu B-kokā.
+    Meklēšana `q` pievieno FTS5 tabulu (nepieciešama arī kārtošanai pēc atbilstības).
+    """
+    if filters.q is not None:
+        query = query.join(documents_fts, documents_fts.c.rowid == Document.id).filter(
+            _fts.op("MATCH")(fts_match_query(filters.q))
+        )
+    if filters.importance is not None:
+        rank = IMPORTANCE_RANK.get(filters.importance)
+        query = query.filter(Document.importance_rank == rank if rank is not None else false())
+    if filters.category is not None:
+        query = query.filter(Document.category_id == lookup_id("category", filters.category))
+    if filters.responsible_unit is not None:
+        query = query.filter(
+            Document.responsible_unit_id == lookup_id("responsible_unit", filters.responsible_unit)
+        )
+    if filters.file_type is not None:
+        query = query.filter(Document.file_type_id == lookup_id("file_type", filters.file_type))
+    if filters.active is not None:
+        query = query.filter(Document.active == filters.active)
+
+    created_at = Document.created_at
+    if sort is not None and sort != "created_at":
+        created_at = _without_index(created_at)
+    if filters.created_from is not None:
+        query = query.filter(created_at >= filters.created_from)
+    if filters.created_to is not None:
+        query = query.filter(created_at <= filters.created_to)
+    return query
+
+
+def sort_expression(sort: str):
+    """Atgriež API kārtošanas laukam atbilstošo DB kolonnu vai atbilstības izteiksmi."""
+    return RELEVANCE if sort == RELEVANCE_SORT else SORT_COLUMNS[sort]
+
+
+def apply_sort(query: Query, sort: str, order: str) -> Query:
+    """Kārto pēc lauka un `id` (vienādām vērtībām), lai secība būtu noteikta."""
+    columns = (sort_expression(sort), Document.id)
+    return query.order_by(*(c.asc() if order == "asc" else c.desc() for c in columns))
+
+
+def _sort_value(row, sort: str):
+    """Nolasa rindas kārtošanas atslēgu JSON serializējamā formā."""
+    value = getattr(row, sort_expression(sort).key)
+    return value.isoformat() if sort == "created_at" else value
+
+
+def encode_cursor(row, sort: str, order: str) -> str:
+    """Kodē pēdējās lapas rindas kārtošanas atslēgu un `id` necaurredzamā kursorā.
+
+    `row` var būt Document vai vaicājuma rinda ar `id` un kārtošanas kolonnu.
+    """
+    payload = json.dumps([sort, order, _sort_value(row, sort), row.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> tuple:
+    """Atkodē kursoru; ceļ ValueError, ja tas ir bojāts vai izveidots citai kārtošanai."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_order, value, last_id = json.loads(
+            base64.urlsafe_b64decode(padded.encode("ascii"))
+        )
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise ValueError(f"Nederīgs kursors: '{cursor}'") from e
+
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise ValueError(
+            f"Kursors izveidots kārtošanai '{cursor_sort} {cursor_order}', "
+            f"nevis '{sort} {order}'"
+        )
+    # Precīzs tips: bool nav derīgs skaitlis, un vārdnīca vai saraksts nav derīgs teksts
+    if type(last_id) is not int or type(value) is not CURSOR_VALUE_TYPES.get(sort):
+        raise ValueError(f"Nederīgs kursors: '{cursor}'")
+    if sort == "created_at":
+        try:
+            value = date.fromisoformat(value)
+        except ValueError as e:
+            raise ValueError(f"Nederīgs kursors: '{cursor}'") from e
+    return value, last_id
+
+
+def apply_cursor(query: Query, sort: str, order: str, cursor: str) -> Query:
+    """Atlasa rindas aiz kursora: (atslēga, id) > / < (pēdējā atslēga, pēdējais id)."""
+    value, last_id = decode_cursor(cursor, sort, order)
+    key = tuple_(sort_expression(sort), Document.id)
+    return query.filter(key > (value, last_id) if order == "asc" else key < (value, last_id))
+
+
+def documents_page_statement(
+    filters: DocumentFilters,
+    sort: str,
+    order: str,
+    limit: int,
+    offset: int = 0,
+    cursor: str | None = None,
+) -> Select:
+    """Saraksta lapas SELECT: DocumentOut kolonnas + kārtošanas atslēga (kursoram).
+
+    Izpildāms gan ar sinhrono, gan asinhrono sesiju.
+    """
+    stmt = select(*DOCUMENT_OUT_COLUMNS, sort_expression(sort))
+    stmt = apply_sort(apply_filters(stmt, filters, sort), sort, order)
+    if cursor is not None:
+        stmt = apply_cursor(stmt, sort, order, cursor)
+    return stmt.offset(offset).limit(limit)
+
+
+def export_statement(filters: DocumentFilters) -> Select:
+    """Eksporta SELECT: visas filtrētās DocumentOut kolonnas stabilā id secībā."""
+    return apply_filters(select(*DOCUMENT_OUT_COLUMNS), filters).order_by(Document.id)
+
+
+def facet_query(db: Session, filters: DocumentFilters) -> Query:
+    """Viena grupēšana pa pārklājošo indeksu: rindu skaits katrai šķautņu kombinācijai."""
+    month = func.substr(Document.created_at, 1, 7)
+    columns = (
+        Document.importance_rank,
+        Document.category_id,
+        Document.active,
+        Document.file_type_id,
+        month,
+    )
+    query = db.query(*columns, func.count()).group_by(*columns)
+    return apply_filters(query, filters)
+
+
+def document_facets(db: Session, filters: DocumentFilters) -> dict:
+    """Saskaita filtrētos dokumentus kopā un pa svarīgumu, kategoriju, aktivitāti, tipu un mēnesi."""
+    facets = {
+        "total": 0,
+        "importance": {},
+        "category": {},
+        "active": {},
+        "file_type": {},
+        "created_month": {},
+    }
+    for rank, category_id, active, file_type_id, month, count in facet_query(db, filters):
+        facets["total"] += count
+        for facet, value in (
+            ("importance", IMPORTANCE_BY_RANK.get(rank, "unknown")),
+            ("category", lookup_cache.name_of(db, "category", category_id)),
+            ("active", "true" if active else "false"),
+            ("file_type", lookup_cache.name_of(db, "file_type", file_type_id)),
+            ("created_month", month),
+        ):
+            facets[facet][value] = facets[facet].get(value, 0) + count
+
+    for facet in ("importance", "category", "active", "file_type", "created_month"):
+        facets[facet] = dict(sorted(facets[facet].items()))
+    return facets
+
+
+def compile_positional(db: Session, query: Query | Select) -> tuple[str, tuple]:
+    """Kompilē vaicājumu SQLite SQL tekstā ar pozicionāliem parametriem (datumi — ISO teksts)."""
+    statement = query.statement if isinstance(query, Query) else query
+    compiled = statement.compile(dialect=db.get_bind().dialect)
+    params = compiled.construct_params()
+    values = tuple(
+        value.isoformat() if isinstance(value, date) else value
+        for value in (params[name] for name in compiled.positiontup)
+    )
+    return compiled.string, values
+
+
+def explain_query_plan(db: Session, query: Query | Select) -> list[str]:
+    """Atgriež SQLite EXPLAIN QUERY PLAN soļu aprakstus dotajam vaicājumam."""
+    sql, values = compile_positional(db, query)
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", values)
+    return [row[3] for row in rows]
@@ -0,0 +1,186 @@
+"""Mēneša kopsavilkuma (rollup) tabula laika rindu diagrammām.
+
+`document_rollup` glabā dokumentu skaitu un lasīšanas laika summu katram
+(mēnesis, importance, category, active). Imports to uztur ar deltām: katrai
+partijai `upsert_rows` saskaita izmaiņas pa atslēgām (+1 jaunai rindai, −1 vecajai
+un +1 jaunajai atslēgai mainītai rindai) un ieraksta tās vienā upsert izpildē.
+Tāpēc diagrammai nav jāgrupē visa `documents` tabula.
+
+Atbilstību pilnam pārrēķinam pārbauda `check_rollup` (`scripts/check_rollup.py`).
+"""
+
+from dataclasses import dataclass
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.lookups import lookup_cache
+from app.models import Document, DocumentRollup
+from app.queries import lookup_id
+
+_documents = Document.__table__
+_rollup = DocumentRollup.__table__
+
+# Rollup atslēga no `documents` kolonnām (mēnesis kā `YYYY-MM` teksts)
+ROLLUP_KEY_COLUMNS = (
+    func.substr(_documents.c.created_at, 1, 7).label("month"),
+    _documents.c.importance_id,
+    _documents.c.category_id,
+    _documents.c.active,
+)
+
+# Laika rindas var sadalīt pa šiem laukiem (mēnesis ir vienmēr)
+TIMESERIES_GROUP_FIELDS = ("importance", "category", "active")
+
+_upsert = sqlite_insert(_rollup)
+UPSERT_ROLLUP = _upsert.on_conflict_do_update(
+    index_elements=[_rollup.c.month, _rollup.c.importance_id, _rollup.c.category_id, _rollup.c.active],
+    set_={
+        "doc_count": _rollup.c.doc_count + _upsert.excluded.doc_count,
+        "reading_time_total": _rollup.c.reading_time_total + _upsert.excluded.reading_time_total,
+    },
+)
+
+
+def rollup_key(row: dict) -> tuple:
+    """Importa rindas (ar vārdnīcu id) rollup atslēga — tāda pati kā `ROLLUP_KEY_COLUMNS`."""
+    return (row["created_at"].isoformat()[:7], row["importance_id"], row["category_id"], row["active"])
+
+
+class RollupDeltas:
+    """Vienas partijas izmaiņas pa rollup atslēgām: [dokumentu skaits, lasīšanas laiks]."""
+
+    def __init__(self):
+        self._deltas: dict[tuple, list[int]] = {}
+
+    def add(self, key: tuple, minutes: int) -> None:
+        delta = self._deltas.setdefault(key, [0, 0])
+        delta[0] += 1
+        delta[1] += minutes
+
+    def remove(self, key: tuple, minutes: int) -> None:
+        delta = self._deltas.setdefault(key, [0, 0])
+        delta[0] -= 1
+        delta[1] -= minutes
+
+    def rows(self) -> list[dict]:
+        """Nenulles deltas kā `UPSERT_ROLLUP` parametri."""
+        return [
+            {
+                "month": month,
+                "importance_id": importance_id,
+                "category_id": category_id,
+                "active": active,
+                "doc_count": count,
+                "reading_time_total": minutes,
+            }
+            for (month, importance_id, category_id, active), (count, minutes) in self._deltas.items()
+            if count or minutes
+        ]
+
+
+def _recomputed():
+    """Pilns pārrēķins no `documents` — tās pašas kolonnas kā `document_rollup`."""
+    return select(
+        *ROLLUP_KEY_COLUMNS,
+        func.count().label("doc_count"),
+        func.sum(_documents.c.reading_time_minutes).label("reading_time_total"),
+    ).group_by(*ROLLUP_KEY_COLUMNS)
+
+
+def rebuild_rollup(db: Session) -> int:
+    """Aizpilda rollup tabulu no jauna ar pilnu pārrēķinu; atgriež rindu skaitu. Neapstiprina."""
+    db.execute(delete(_rollup))
+    recomputed = _recomputed().subquery()
+    result = db.execute(insert(_rollup).from_select(list(recomputed.c.keys()), select(recomputed)))
+    return result.rowcount
+
+
+@dataclass
+class RollupMismatch:
+    """Atslēga, kuras rollup vērtības (skaits, lasīšanas laiks) atšķiras no pārrēķinātajām."""
+
+    key: tuple
+    expected: tuple[int, int]
+    actual: tuple[int, int]
+
+
+def check_rollup(db: Session) -> list[RollupMismatch]:
+    """Salīdzina rollup tabulu ar pilnu pārrēķinu; nulles rindas tiek uzskatītas par neesošām."""
+    expected = {tuple(row[:4]): (row[4], row[5]) for row in db.execute(_recomputed())}
+    actual = {
+        tuple(row[:4]): (row[4], row[5])
+        for row in db.execute(
+            select(
+                _rollup.c.month,
+                _rollup.c.importance_id,
+                _rollup.c.category_id,
+                _rollup.c.active,
+                _rollup.c.doc_count,
+                _rollup.c.reading_time_total,
+            ).where((_rollup.c.doc_count != 0) | (_rollup.c.reading_time_total != 0))
+        )
+    }
+    return [
+        RollupMismatch(key, expected.get(key, (0, 0)), actual.get(key, (0, 0)))
+        for key in sorted(expected.keys() | actual.keys(), key=str)
+        if expected.get(key) != actual.get(key)
+    ]
+
+
+@dataclass(frozen=True)
+class TimeseriesFilters:
+    """Laika rindu filtri: mēnešu diapazons (`YYYY-MM`, ieskaitot) un vienādības filtri."""
+
+    month_from: str | None = None
+    month_to: str | None = None
+    importance: str | None = None
+    category: str | None = None
+    active: bool | None = None
+
+
+def timeseries(db: Session, group_by: tuple[str, ...], filters: TimeseriesFilters) -> list[dict]:
+    """Dokumentu skaits un lasīšanas laiks pa mēnešiem (un `group_by` laukiem) no rollup tabulas."""
+    columns = {
+        "importance": _rollup.c.importance_id,
+        "category": _rollup.c.category_id,
+        "active": _rollup.c.active,
+    }
+    group_columns = [_rollup.c.month, *(columns[field] for field in group_by)]
+    count = func.sum(_rollup.c.doc_count)
+    query = (
+        select(*group_columns, count, func.sum(_rollup.c.reading_time_total))
+        .group_by(*group_columns)
+        .having(count > 0)
+        .order_by(*group_columns)
+    )
+    if filters.month_from is not None:
+        query = query.where(_rollup.c.month >= filters.month_from)
+    if filters.month_to is not None:
+        query = query.where(_rollup.c.month <= filters.month_to)
+    if filters.importance is not None:
+        query = query.where(_rollup.c.importance_id == lookup_id("importance", filters.importance))
+    if filters.category is not None:
+        query = query.where(_rollup.c.category_id == lookup_id("category", filters.category))
+    if filters.active is not None:
+        query = query.where(_rollup.c.active == filters.active)
+
+    points = []
+    for month, *values, count, minutes in db.execute(query):
+        key = {}
+        for field, value in zip(group_by, values):
+            if field == "active":
+                key[field] = "true" if value else "false"
+            else:
+                key[field] = lookup_cache.name_of(db, field, value)
+        points.append(
+            {
+                "month": month,
+                "key": key,
+                "count": count,
+                "total_minutes": minutes,
+                "avg_minutes": round(minutes / count, 3),
+            }
+        )
+    return points
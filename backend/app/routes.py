@@ -1,32 +1,172 @@
+import asyncio
+import hashlib
 import os
+from dataclasses import dataclass
 from datetime import date
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import Response
-from sqlalchemy import case
-from sqlalchemy.orm import Session
+import httpx
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.orm import Session, sessionmaker
 
-from app.db import get_db
-from app.import_service import import_documents, load_remote_xml
-from app.models import Document
-from app.schemas import DocumentOut
+from app.analytics import GROUP_FIELDS, reading_time_stats
+from app.db import get_db, get_session_factory
+from app.cache import GenerationCache, data_generation
+from app.jobs import ImportJob, import_jobs
+from app.multi_import import SyncWriter, get_http_transport, run_import_job
+from app.profiling import RequestTimer, is_slow, log_slow_query, timing_requested
+from app.queries import (
+    RELEVANCE_SORT,
+    VALID_SORT_FIELDS,
+    DocumentFilters,
+    compile_positional,
+    decode_cursor,
+    document_facets,
+    documents_page_statement,
+    encode_cursor,
+    explain_query_plan,
+    export_statement,
+    fts_match_query,
+)
+from app.rollup import TIMESERIES_GROUP_FIELDS, TimeseriesFilters, timeseries
+from app.schemas import (
+    DocumentOut,
+    FacetsOut,
+    ImportJobOut,
+    ImportResult,
+    QueryPlanOut,
+    ReadingTimeStatsOut,
+    TimeseriesOut,
+)
+from app.serialization import (
+    XML_FOOTER,
+    XML_HEADER,
+    csv_header,
+    dump_csv_rows,
+    dump_document_rows,
+    dump_ndjson_rows,
+    dump_xml_rows,
+    gzip_stream,
+)
 
+# Kopīgie galapunkti; saraksts un imports ir `documents_router` (sinhronā)
+# vai `app.async_routes.router` (asinhronā) versijā
 router = APIRouter(prefix="/api", tags=["documents"])
+documents_router = APIRouter(prefix="/api", tags=["documents"])
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
-REMOTE_URL = os.getenv(
-    "REMOTE_URL", "http://localhost:8000/api/remote/documents.xml"
-)
 
-VALID_SORT_FIELDS = {"created_at", "title", "importance", "active"}
+# Šķautņu skaiti katrai filtru kombinācijai; derīgi līdz nākamajam importam
+facets_cache = GenerationCache(maxsize=256)
 
-# Svarīguma loģiskā secība SQL CASE izteiksmei
-IMPORTANCE_ORDER = case(
-    {"low": 0, "medium": 1, "high": 2, "critical": 3},
-    value=Document.importance,
-    else_=4,
-)
+# Serializētas saraksta lapas pēc normalizētajiem parametriem
+documents_cache = GenerationCache(maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")))
+
+# Eksporta rindas tiek lasītas no servera puses kursora partijās pa tik rindām
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Formāts → (media tips, sākums, rindu serializētājs, beigas)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", b"", dump_ndjson_rows, b""),
+    "csv": ("text/csv; charset=utf-8", csv_header(), dump_csv_rows, b""),
+    "xml": ("application/xml", XML_HEADER, dump_xml_rows, XML_FOOTER),
+}
+
+
+@dataclass(frozen=True)
+class DocumentsPage:
+    body: bytes
+    etag: str
+    next_cursor: str | None
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Pārbauda If-None-Match galveni (vairākas vērtības, vājie validatori, `*`)."""
+    if if_none_match is None:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _accepts_gzip(accept_encoding: str | None) -> bool:
+    """Pārbauda, vai Accept-Encoding atļauj gzip (arī `*`; `q=0` — aizliegts)."""
+    for item in (accept_encoding or "").split(","):
+        name, *params = (part.strip() for part in item.split(";"))
+        if name.lower() not in ("gzip", "*"):
+            continue
+        q = next((param[2:] for param in params if param.lower().startswith("q=")), "1")
+        try:
+            return float(q) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def render_documents_page(rows: list, params: "DocumentListParams") -> DocumentsPage:
+    """Serializē saraksta lapas kolonnu kortežus JSON baitos.
+
+    Rindas ir kolonnu korteži (bez ORM objektiem un identitātes kartes),
+    tāpēc tie tiek serializēti tieši, bez atkārtotas Pydantic validācijas.
+    """
+    body = dump_document_rows(rows)
+    return DocumentsPage(
+        body=body,
+        etag=f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"',
+        # Pilna lapa — iespējams, ir vēl rindas
+        next_cursor=(
+            encode_cursor(rows[-1], params.sort, params.order)
+            if len(rows) == params.limit and params.sort != RELEVANCE_SORT
+            else None
+        ),
+    )
+
+
+def documents_response(
+    page: DocumentsPage, cache_status: str, if_none_match: str | None, server_timing: str | None = None
+) -> Response:
+    """Veido saraksta atbildi ar ETag/X-Cache/X-Next-Cursor (un Server-Timing) galvenēm vai 304."""
+    headers = {"ETag": page.etag, "X-Cache": cache_status}
+    if page.next_cursor is not None:
+        headers["X-Next-Cursor"] = page.next_cursor
+    if server_timing is not None:
+        headers["Server-Timing"] = server_timing
+    if _etag_matches(if_none_match, page.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=page.body, media_type="application/json", headers=headers)
+
+
+def cached_documents_response(
+    request: Request, params: "DocumentListParams", if_none_match: str | None, debug: bool
+) -> Response | None:
+    """Saraksta pieprasījuma sākums: atzīmē vaicājuma formu un atgriež kešoto lapu, ja tā ir."""
+    # Nolasa `app.metrics.MetricsMiddleware` pēc atbildes nosūtīšanas (tikai saraksts, ne explain)
+    request.state.documents_shape = params.shape
+    page = None if debug else documents_cache.get(params)
+    return None if page is None else documents_response(page, "HIT", if_none_match)
+
+
+def documents_page_response(
+    params: "DocumentListParams",
+    rows: list,
+    timer: RequestTimer,
+    generation: int,
+    if_none_match: str | None,
+    debug: bool,
+) -> Response:
+    """Saraksta pieprasījuma beigas: serializē lapu un saglabā kešatmiņā (profilēšanā — apiet)."""
+    with timer.stage("serialize"):
+        page = render_documents_page(rows, params)
+    if debug:
+        return documents_response(page, "BYPASS", if_none_match, timer.server_timing(len(rows), "BYPASS"))
+    documents_cache.set(params, page, generation)
+    return documents_response(page, "MISS", if_none_match)
+
+
+def explain_statement(db: Session, statement) -> tuple[str, tuple, list[str]]:
+    """Atgriež vaicājuma SQL, pozicionālos parametrus un EXPLAIN QUERY PLAN."""
+    sql, values = compile_positional(db, statement)
+    return sql, values, explain_query_plan(db, statement)
 
 
 def _parse_date(value: str, field_name: str) -> date:
@@ -40,6 +180,115 @@ def _parse_date(value: str, field_name: str) -> date:
         )
 
 
+def _parse_month(value: str, field_name: str) -> str:
+    """Validē mēnesi `YYYY-MM`; atgriež 400, ja formāts nederīgs."""
+    try:
+        if len(value) != 7:
+            raise ValueError(value)
+        date.fromisoformat(f"{value}-01")
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Nederīgs mēneša formāts laukam '{field_name}': '{value}'. Gaidīts: YYYY-MM",
+        )
+    return value
+
+
+def document_filters(
+    q: str | None = Query(default=None, description="Pilnteksta meklēšana virsrakstā un aprakstā"),
+    importance: str | None = None,
+    category: str | None = None,
+    active: bool | None = None,
+    created_from: str | None = None,
+    created_to: str | None = None,
+    responsible_unit: str | None = None,
+    file_type: str | None = None,
+) -> DocumentFilters:
+    """Kopīgie saraksta filtru parametri; datumi un meklēšana tiek validēti (400 kļūdas gadījumā)."""
+    if q is not None:
+        try:
+            fts_match_query(q)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+    return DocumentFilters(
+        q=q,
+        importance=importance,
+        category=category,
+        active=active,
+        created_from=_parse_date(created_from, "created_from") if created_from is not None else None,
+        created_to=_parse_date(created_to, "created_to") if created_to is not None else None,
+        responsible_unit=responsible_unit,
+        file_type=file_type,
+    )
+
+
+@dataclass(frozen=True)
+class DocumentListParams:
+    """Validēti saraksta parametri; kalpo arī kā lapu kešatmiņas atslēga."""
+
+    filters: DocumentFilters
+    sort: str
+    order: str
+    limit: int
+    offset: int
+    cursor: str | None
+
+    def statement(self):
+        return documents_page_statement(
+            self.filters, self.sort, self.order, self.limit, self.offset, self.cursor
+        )
+
+    @property
+    def shape(self) -> dict[str, str]:
+        """Vaicājuma forma mērījumu iezīmēm: kārtošana, lietotie filtri, lapošanas veids."""
+        used = [name for name, value in vars(self.filters).items() if value is not None]
+        if self.cursor is not None:
+            paging = "cursor"
+        else:
+            paging = "offset" if self.offset else "first"
+        return {"sort": self.sort, "filters": ",".join(used) or "none", "paging": paging}
+
+
+def document_list_params(
+    filters: DocumentFilters = Depends(document_filters),
+    sort: str = "created_at",
+    order: str = "desc",
+    limit: int = Query(default=50, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+    cursor: str | None = None,
+) -> DocumentListParams:
+    """Saraksta kārtošanas un lapošanas parametri; nederīgas kombinācijas — 400."""
+    if sort not in VALID_SORT_FIELDS and not (sort == RELEVANCE_SORT and filters.q is not None):
+        allowed = sorted(VALID_SORT_FIELDS) + [f"{RELEVANCE_SORT} (ar q)"]
+        raise HTTPException(
+            status_code=400,
+            detail=f"Nederīgs kārtošanas lauks: '{sort}'. Atļautie: {', '.join(allowed)}",
+        )
+    if order not in ("asc", "desc"):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Nederīga kārtošanas secība: '{order}'. Atļautās: asc, desc",
+        )
+    if cursor is not None and offset:
+        raise HTTPException(
+            status_code=400,
+            detail="Parametrus 'cursor' un 'offset' nevar izmantot vienlaikus",
+        )
+    if cursor is not None and sort == RELEVANCE_SORT:
+        raise HTTPException(
+            status_code=400,
+            detail="Kārtošanai pēc atbilstības kursora lapošana nav pieejama; izmantojiet 'offset'",
+        )
+    if cursor is not None:
+        try:
+            decode_cursor(cursor, sort, order)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+    return DocumentListParams(filters, sort, order, limit, offset, cursor)
+
+
 @router.get("/remote/documents.xml")
 def serve_xml():
     """Simulē attālo XML avotu — atgriež lokālo failu."""
@@ -52,65 +301,198 @@ def serve_xml():
     )
 
 
-@router.post("/import")
-def trigger_import(db: Session = Depends(get_db)):
-    """Ielādē XML no attālā URL un importē dokumentus DB."""
-    try:
-        xml_text = load_remote_xml(REMOTE_URL)
-    except Exception as e:
-        raise HTTPException(
-            status_code=502, detail=f"Neizdevās ielādēt XML: {e}"
-        ) from e
+def _run_import(
+    job: ImportJob,
+    session_factory: sessionmaker,
+    transport: httpx.AsyncBaseTransport | None,
+    force: bool = False,
+) -> ImportResult:
+    """Importē visus konfigurētos avotus; raksta ar vienu sinhrono sesiju."""
+    with session_factory() as db:
+        return asyncio.run(run_import_job(job, SyncWriter(db), transport, force))
 
-    try:
-        count = import_documents(xml_text, db)
-    except ValueError as e:
-        raise HTTPException(
-            status_code=422, detail=f"XML parsēšanas kļūda: {e}"
-        ) from e
 
-    return {"imported": count}
+@documents_router.post("/import", response_model=ImportJobOut, status_code=202)
+def trigger_import(
+    force: bool = False,
+    session_factory: sessionmaker = Depends(get_session_factory),
+    transport: httpx.AsyncBaseTransport | None = Depends(get_http_transport),
+):
+    """Sāk fona importu no visiem avotiem; ja imports jau notiek, atgriež esošo darbu.
+
+    `force=true` ignorē saglabātos validatorus un ielādē plūsmas pilnībā.
+    """
+    job, _ = import_jobs.submit(lambda job: _run_import(job, session_factory, transport, force))
+    return job
 
 
-@router.get("/documents", response_model=list[DocumentOut])
+@router.get("/import/{job_id}", response_model=ImportJobOut)
+def get_import_job(job_id: str):
+    """Atgriež importa darba fāzi, progresu un rezultātu vai kļūdu."""
+    job = import_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Importa darbs nav atrasts: '{job_id}'")
+    return job
+
+
+@documents_router.get("/documents", response_model=list[DocumentOut])
 def list_documents(
-    importance: str | None = None,
-    category: str | None = None,
-    active: bool | None = None,
-    created_from: str | None = None,
-    created_to: str | None = None,
-    sort: str = "created_at",
-    order: str = "desc",
-    limit: int = Query(default=50, ge=1, le=200),
-    offset: int = Query(default=0, ge=0),
+    request: Request,
+    params: DocumentListParams = Depends(document_list_params),
+    if_none_match: str | None = Header(default=None),
+    debug: bool = Depends(timing_requested),
     db: Session = Depends(get_db),
 ):
-    if sort not in VALID_SORT_FIELDS:
+    """Atgriež dokumentu lapu; nākamās lapas kursors ir galvenē `X-Next-Cursor`.
+
+    Serializētās lapas tiek kešotas līdz nākamajam importam; `ETag` ļauj
+    klientam saņemt 304, ja lapa nav mainījusies. Profilēšanas režīmā
+    (`?debug=true`) kešatmiņa tiek apieta un atbildē ir `Server-Timing`.
+    """
+    cached = cached_documents_response(request, params, if_none_match, debug)
+    if cached is not None:
+        return cached
+
+    timer = RequestTimer()
+    generation = data_generation()
+    statement = params.statement()
+    with timer.stage("db"):
+        result = db.execute(statement)
+    with timer.stage("hydrate"):
+        rows = result.all()
+    response = documents_page_response(params, rows, timer, generation, if_none_match, debug)
+    if is_slow(timer):
+        log_slow_query("/api/documents", params.shape, timer, len(rows), *explain_statement(db, statement))
+    return response
+
+
+@router.get("/documents/explain", response_model=QueryPlanOut)
+def explain_documents(
+    params: DocumentListParams = Depends(document_list_params),
+    db: Session = Depends(get_db),
+):
+    """Atgriež saraksta vaicājuma SQL, parametrus un EXPLAIN QUERY PLAN dotajiem parametriem."""
+    sql, values, plan = explain_statement(db, params.statement())
+    return QueryPlanOut(sql=sql, params=list(values), plan=plan)
+
+
+@router.get("/documents/export")
+def export_documents(
+    export_format: str = Query(default="ndjson", alias="format", description="ndjson, csv vai xml"),
+    filters: DocumentFilters = Depends(document_filters),
+    accept_encoding: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+):
+    """Straumē visus filtrētos dokumentus NDJSON, CSV vai avota XML formātā (id secībā).
+
+    Rindas tiek lasītas ar servera puses kursoru (`yield_per`), tāpēc atmiņas
+    patēriņš nav atkarīgs no kataloga izmēra. Ja klients pieņem gzip,
+    plūsma tiek saspiesta.
+    """
+    if export_format not in EXPORT_FORMATS:
         raise HTTPException(
             status_code=400,
-            detail=f"Nederīgs kārtošanas lauks: '{sort}'. Atļautie: {', '.join(sorted(VALID_SORT_FIELDS))}",
+            detail=f"Nederīgs eksporta formāts: '{export_format}'. Atļautie: {', '.join(EXPORT_FORMATS)}",
         )
-    if order not in ("asc", "desc"):
+    media_type, header, dump, footer = EXPORT_FORMATS[export_format]
+    result = db.execute(export_statement(filters).execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+    def body():
+        try:
+            if header:
+                yield header
+            for partition in result.partitions():
+                yield dump(partition)
+            if footer:
+                yield footer
+        finally:
+            result.close()
+
+    chunks = body()
+    headers = {
+        "Content-Disposition": f'attachment; filename="documents.{export_format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if _accepts_gzip(accept_encoding):
+        chunks = gzip_stream(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
+@router.get("/documents/facets", response_model=FacetsOut)
+def get_document_facets(
+    filters: DocumentFilters = Depends(document_filters),
+    db: Session = Depends(get_db),
+):
+    """Atgriež kopējo skaitu un skaitus pa šķautnēm tiem pašiem filtriem kā sarakstam."""
+    facets = facets_cache.get(filters)
+    if facets is None:
+        generation = data_generation()
+        facets = document_facets(db, filters)
+        facets_cache.set(filters, facets, generation)
+    return facets
+
+
+def _group_fields(group_by: str, allowed: tuple[str, ...]) -> tuple[str, ...]:
+    """Parsē grupēšanas laukus ar komatu (bez atkārtojumiem); nezināms lauks — 400."""
+    fields = tuple(dict.fromkeys(name.strip() for name in group_by.split(",") if name.strip()))
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
         raise HTTPException(
             status_code=400,
-            detail=f"Nederīga kārtošanas secība: '{order}'. Atļautās: asc, desc",
+            detail=f"Nederīgs grupēšanas lauks: '{unknown[0]}'. Atļautie: {', '.join(allowed)}",
         )
+    return fields
+
+
+@router.get("/stats/reading-time", response_model=ReadingTimeStatsOut)
+def get_reading_time_stats(
+    group_by: str = Query(default="", description=f"Grupēšanas lauki ar komatu: {', '.join(GROUP_FIELDS)}"),
+    filters: DocumentFilters = Depends(document_filters),
+    db: Session = Depends(get_db),
+):
+    """Lasīšanas laika agregāti (skaits, summa, vidējais, min, max) pa grupām.
+
+    Tiek aprēķināti no atmiņas kolonnu momentuzņēmuma (`app.analytics`);
+    pieņem tos pašus filtrus kā saraksts, izņemot pilnteksta meklēšanu.
+    """
+    fields = _group_fields(group_by, GROUP_FIELDS)
+    if filters.q is not None:
+        raise HTTPException(status_code=400, detail="Statistikā pilnteksta meklēšana 'q' netiek atbalstīta")
 
-    query = db.query(Document)
+    stats = reading_time_stats(db, fields, filters)
+    return {"group_by": list(fields), "engine": stats.engine, "snapshot": stats.snapshot, "groups": stats.groups}
 
-    if importance is not None:
-        query = query.filter(Document.importance == importance)
-    if category is not None:
-        query = query.filter(Document.category == category)
-    if active is not None:
-        query = query.filter(Document.active == active)
-    if created_from is not None:
-        query = query.filter(Document.created_at >= _parse_date(created_from, "created_from"))
-    if created_to is not None:
-        query = query.filter(Document.created_at <= _parse_date(created_to, "created_to"))
 
-    # Svarīgumam izmanto loģisko secību, nevis alfabētisko
-    sort_expr = IMPORTANCE_ORDER if sort == "importance" else getattr(Document, sort)
-    query = query.order_by(sort_expr.asc() if order == "asc" else sort_expr.desc())
+@router.get("/stats/timeseries", response_model=TimeseriesOut)
+def get_timeseries(
+    group_by: str = Query(
+        default="", description=f"Papildu grupēšana ar komatu: {', '.join(TIMESERIES_GROUP_FIELDS)}"
+    ),
+    month_from: str | None = Query(default=None, description="Sākuma mēnesis (YYYY-MM, ieskaitot)"),
+    month_to: str | None = Query(default=None, description="Beigu mēnesis (YYYY-MM, ieskaitot)"),
+    importance: str | None = None,
+    category: str | None = None,
+    active: bool | None = None,
+    db: Session = Depends(get_db),
+):
+    """Dokumentu skaits un lasīšanas laiks pa mēnešiem no rollup tabulas (bez `documents` grupēšanas)."""
+    fields = _group_fields(group_by, TIMESERIES_GROUP_FIELDS)
+    filters = TimeseriesFilters(
+        month_from=_parse_month(month_from, "month_from") if month_from is not None else None,
+        month_to=_parse_month(month_to, "month_to") if month_to is not None else None,
+        importance=importance,
+        category=category,
+        active=active,
+    )
+    return {"group_by": list(fields), "points": timeseries(db, fields, filters)}
+
 
-    return query.offset(offset).limit(limit).all()
+@router.get("/cache/stats")
+def get_cache_stats():
+    """Atgriež kešatmiņu trāpījumu/netrāpījumu statistiku un pašreizējo datu paaudzi."""
+    return {
+        "generation": data_generation(),
+        "documents": documents_cache.stats(),
+        "facets": facets_cache.stats(),
+    }
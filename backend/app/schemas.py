@@ -1,6 +1,6 @@
-from datetime import date
+from datetime import date, datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, computed_field
 
 
 class DocumentBase(BaseModel):
@@ -24,3 +24,95 @@ class DocumentOut(DocumentBase):
     id: int
 
     model_config = {"from_attributes": True}
+
+
+class ImportCounts(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    # Avots atbildēja ar 304 — imports netika veikts
+    not_modified: bool = False
+
+    @computed_field
+    @property
+    def imported(self) -> int:
+        return self.inserted + self.updated + self.unchanged
+
+
+class SourceResult(ImportCounts):
+    """Viena avota daļa vairāku avotu importā."""
+
+    url: str
+    # Lejupielādētie (atkodētie) baiti pēdējā mēģinājumā
+    bytes: int = 0
+    attempts: int = 0
+    seconds: float = 0.0
+    error: str | None = None
+
+
+class ImportResult(ImportCounts):
+    sources: list[SourceResult] = []
+
+
+class ImportJobOut(BaseModel):
+    id: str
+    phase: str
+    processed: int
+    throughput: float
+    started_at: datetime
+    finished_at: datetime | None = None
+    result: ImportResult | None = None
+    error: str | None = None
+
+    model_config = {"from_attributes": True}
+
+
+class FacetsOut(BaseModel):
+    total: int
+    importance: dict[str, int]
+    category: dict[str, int]
+    active: dict[str, int]
+    file_type: dict[str, int]
+    created_month: dict[str, int]
+
+
+class QueryPlanOut(BaseModel):
+    sql: str
+    params: list[str | int | float | bool | None]
+    plan: list[str]
+
+
+class ReadingTimeGroup(BaseModel):
+    key: dict[str, str]
+    count: int
+    total_minutes: int
+    avg_minutes: float
+    min_minutes: int
+    max_minutes: int
+
+
+class SnapshotInfo(BaseModel):
+    rows: int
+    bytes: int
+    built_at: datetime
+
+
+class ReadingTimeStatsOut(BaseModel):
+    group_by: list[str]
+    # "numpy" — kolonnu momentuzņēmums, "sql" — GROUP BY (momentuzņēmums izslēgts)
+    engine: str
+    snapshot: SnapshotInfo | None = None
+    groups: list[ReadingTimeGroup]
+
+
+class TimeseriesPoint(BaseModel):
+    month: str
+    key: dict[str, str]
+    count: int
+    total_minutes: int
+    avg_minutes: float
+
+
+class TimeseriesOut(BaseModel):
+    group_by: list[str]
+    points: list[TimeseriesPoint]
@@ -0,0 +1,126 @@
+"""Ātrā dokumentu saraksta serializācija: kolonnu korteži → JSON baiti bez ORM un Pydantic.
+
+Izvade baitu līmenī sakrīt ar `TypeAdapter(list[DocumentOut]).dump_json`
+(lauku secība, kompakti atdalītāji, UTF-8 bez \\u aizstājējiem). Eksportam
+ir arī NDJSON, CSV un avota XML (latviešu vērtības) formāti.
+"""
+
+import csv
+import io
+import json
+import zlib
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import date
+from xml.sax.saxutils import escape
+
+from app.models import Document
+from app.parser import ACTIVE_MAP, CATEGORY_MAP, IMPORTANCE_MAP
+from app.schemas import DocumentOut
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover — orjson nav obligāts
+    orjson = None
+
+# DocumentOut lauki to JSON secībā un atbilstošās DB kolonnas
+DOCUMENT_OUT_FIELDS: tuple[str, ...] = tuple(DocumentOut.model_fields)
+DOCUMENT_OUT_COLUMNS = tuple(getattr(Document, name) for name in DOCUMENT_OUT_FIELDS)
+
+
+def _dumps_stdlib(rows: list[dict]) -> bytes:
+    return json.dumps(
+        rows, ensure_ascii=False, separators=(",", ":"), default=date.isoformat
+    ).encode("utf-8")
+
+
+dumps = orjson.dumps if orjson is not None else _dumps_stdlib
+
+
+def rows_to_dicts(rows: Iterable[Sequence]) -> list[dict]:
+    """Pārveido kolonnu kortežus (DOCUMENT_OUT_COLUMNS secībā) par DocumentOut formas vārdnīcām.
+
+    Papildu kolonnas korteža beigās (piem., kursora atslēga) tiek ignorētas.
+    """
+    return [dict(zip(DOCUMENT_OUT_FIELDS, row)) for row in rows]
+
+
+def dump_document_rows(rows: Iterable[Sequence]) -> bytes:
+    """Serializē kolonnu kortežus JSON masīvā."""
+    return dumps(rows_to_dicts(rows))
+
+
+def dump_ndjson_rows(rows: Iterable[Sequence]) -> bytes:
+    """Serializē kolonnu kortežus NDJSON rindās (viens DocumentOut objekts rindā)."""
+    return b"".join(dumps(row) + b"\n" for row in rows_to_dicts(rows))
+
+
+def csv_header() -> bytes:
+    return ",".join(DOCUMENT_OUT_FIELDS).encode("utf-8") + b"\r\n"
+
+
+def _csv_value(value):
+    # Kā JSON izvadē: true/false, nevis Python True/False
+    return ("true" if value else "false") if isinstance(value, bool) else value
+
+
+def dump_csv_rows(rows: Iterable[Sequence]) -> bytes:
+    """Serializē kolonnu kortežus CSV rindās (bez galvenes)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [_csv_value(value) for value in row[: len(DOCUMENT_OUT_FIELDS)]] for row in rows
+    )
+    return buffer.getvalue().encode("utf-8")
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Saspiež baitu bloku plūsmu vienā gzip straumē, bloku pa blokam."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+    yield compressor.flush()
+
+
+# --- Avota XML formāts: kanoniskās vērtības → latviešu ---
+
+XML_HEADER = b'<?xml version="1.0" encoding="UTF-8"?>\n<documents>\n'
+XML_FOOTER = b"</documents>\n"
+
+# <document> lauki importa shēmas secībā (bez DB id)
+XML_FIELDS: tuple[str, ...] = tuple(name for name in DOCUMENT_OUT_FIELDS if name != "id")
+
+XML_VALUE_MAPS: dict[str, dict] = {
+    "importance": {value: key for key, value in IMPORTANCE_MAP.items()},
+    "category": {value: key for key, value in CATEGORY_MAP.items()},
+    "active": {value: key for key, value in ACTIVE_MAP.items()},
+}
+
+# \r parsētājs pārvērstu par \n — saglabā kā rakstzīmes atsauci
+_XML_ENTITIES = {"\r": "&#13;"}
+
+
+def _xml_value(field: str, value) -> str:
+    if field in XML_VALUE_MAPS:
+        try:
+            value = XML_VALUE_MAPS[field][value]
+        except KeyError:
+            raise ValueError(f"Vērtībai laukā '{field}' nav XML atbilsmes: '{value}'") from None
+    elif isinstance(value, date):
+        value = value.isoformat()
+    return escape(str(value), _XML_ENTITIES)
+
+
+def dump_xml_rows(rows: Iterable[Sequence]) -> bytes:
+    """Serializē kolonnu kortežus <document> elementos avota (latviešu) formātā."""
+    parts = []
+    for doc in rows_to_dicts(rows):
+        parts.append("  <document>\n")
+        # None (piem., bez apraksta) — elements tiek izlaists, imports to nolasa kā None
+        parts.extend(
+            f"    <{field}>{_xml_value(field, doc[field])}</{field}>\n"
+            for field in XML_FIELDS
+            if doc[field] is not None
+        )
+        parts.append("  </document>\n")
+    return "".join(parts).encode("utf-8")
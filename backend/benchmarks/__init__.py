@@ -0,0 +1 @@
+"""Veiktspējas mērījumi (palaist no backend/ ar `python -m benchmarks.<modulis>`)."""
@@ -0,0 +1,83 @@
+"""Importa etalons: partiju upsert pret veco rindu-pa-rindai ceļu.
+
+Palaišana (no backend/):
+
+    python -m benchmarks.bench_import -n 100000 --batch-size 1000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db import Base
+from app.import_service import document_row, import_documents
+from app.lookups import lookup_cache
+from app.models import Document
+from app.parser import parse_documents_xml
+from scripts.generate_xml import generate_xml
+
+
+def import_documents_per_row(documents, db: Session) -> int:
+    """Sākotnējais ceļš: SELECT pēc URL un ORM setattr/add katrai rindai."""
+    count = 0
+    for doc_data in documents:
+        data = lookup_cache.encode_rows(db, [document_row(doc_data)])[0]
+        existing = db.query(Document).filter(Document.url == data["url"]).first()
+        if existing:
+            for key, value in data.items():
+                setattr(existing, key, value)
+        else:
+            db.add(Document(**data))
+        count += 1
+    db.commit()
+    return count
+
+
+def _run(label: str, fn, documents, db_path: Path) -> float:
+    """Izpilda importu divreiz (jauns + atkārtots) svaigā DB; izdrukā rindas/s."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    Session_ = sessionmaker(bind=engine, autoflush=False)
+
+    timings = []
+    for phase in ("insert", "reimport"):
+        with Session_() as db:
+            start = time.perf_counter()
+            fn(documents, db)
+            timings.append(time.perf_counter() - start)
+        print(
+            f"{label:<10} {phase:<9} {timings[-1]:8.2f} s "
+            f"{len(documents) / timings[-1]:12,.0f} rindas/s"
+        )
+
+    engine.dispose()
+    return sum(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa etalons")
+    parser.add_argument("-n", type=int, default=50_000, help="Dokumentu skaits")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Upsert partijas izmērs")
+    parser.add_argument("--seed", type=int, default=42, help="Nejaušības sēkla")
+    args = parser.parse_args()
+
+    documents = parse_documents_xml(generate_xml(args.n, args.seed))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        per_row = _run("per-row", import_documents_per_row, documents, Path(tmp) / "per_row.db")
+        batched = _run(
+            "batched",
+            lambda docs, db: import_documents(docs, db, batch_size=args.batch_size),
+            documents,
+            Path(tmp) / "batched.db",
+        )
+
+    print(f"Paātrinājums: {per_row / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
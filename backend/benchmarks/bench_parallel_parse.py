@@ -0,0 +1,58 @@
+"""Paralēlās parsēšanas mērogošanās etalons: dokumenti/s pret procesu skaitu.
+
+Palaišana (no backend/):
+
+    python -m benchmarks.bench_parallel_parse -n 200000 --workers 1 2 4 8 16
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from app.parser import PARSE_CHUNK_SIZE, iter_xml_file, iter_xml_file_parallel
+from scripts.generate_xml import write_xml
+
+
+def measure(fn) -> tuple[float, int]:
+    """Atgriež (sekundes, dokumentu skaits) vienai pilnai faila parsēšanai."""
+    start = time.perf_counter()
+    count = sum(1 for _ in fn())
+    return time.perf_counter() - start, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paralēlās parsēšanas etalons")
+    parser.add_argument("-n", type=int, default=100_000, help="Dokumentu skaits plūsmā")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+        help="Pārbaudāmie procesu skaiti",
+    )
+    parser.add_argument("--chunk-size", type=int, default=PARSE_CHUNK_SIZE, help="Diapazona izmērs (baiti)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "feed.xml"
+        write_xml(path, args.n, seed=42, workers=os.cpu_count() or 1)
+        print(f"Plūsma: {args.n} dokumenti, {path.stat().st_size / 1e6:.1f} MB, CPU: {os.cpu_count()}")
+
+        baseline, count = measure(lambda: iter_xml_file(path))
+        print(f"{'secīgi':<10} {baseline:8.2f} s  {count / baseline:10.0f} dok./s")
+
+        for workers in args.workers:
+            elapsed, parsed = measure(
+                lambda: iter_xml_file_parallel(path, workers=workers, chunk_size=args.chunk_size)
+            )
+            assert parsed == count
+            print(
+                f"{workers:>3} proc.  {elapsed:8.2f} s  {count / elapsed:10.0f} dok./s"
+                f"  {baseline / elapsed:5.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Saraksta serializācijas mikroetalons: ORM + Pydantic pret kolonnu kortežiem + ātro kodētāju.
+
+Palaišana (no backend/):
+
+    python -m benchmarks.bench_serialization -n 20000 --limit 200
+
+Paātrinājums ir atkarīgs no kodētāja un lapas izmēra (n=20000, Python 3.11,
+pydantic 2.14, orjson 3.8, viens kodols):
+
+    kodētājs          limit=200   limit=50 (API noklusējums)
+    orjson            2.0x        1.5x
+    json (stdlib)     1.3x        1.2x
+
+Izmantoto kodētāju izdrukā pirmā izvades rinda.
+"""
+
+import argparse
+import tempfile
+import timeit
+from pathlib import Path
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.import_service import import_documents
+from app.models import Document
+from app.schemas import DocumentOut
+from app.serialization import DOCUMENT_OUT_COLUMNS, dump_document_rows, orjson
+from scripts.generate_xml import generate_xml
+
+adapter = TypeAdapter(list[DocumentOut])
+
+
+def orm_page(db, limit: int, offset: int) -> bytes:
+    """Iepriekšējais ceļš: ORM objekti → Pydantic from_attributes → JSON."""
+    documents = (
+        db.query(Document)
+        .order_by(Document.created_at.desc(), Document.id.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    return adapter.dump_json(adapter.validate_python(documents, from_attributes=True))
+
+
+def fast_page(db, limit: int, offset: int) -> bytes:
+    """Ātrais ceļš: kolonnu korteži → JSON baiti."""
+    rows = (
+        db.query(*DOCUMENT_OUT_COLUMNS)
+        .order_by(Document.created_at.desc(), Document.id.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    return dump_document_rows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serializācijas mikroetalons")
+    parser.add_argument("-n", type=int, default=20_000, help="Dokumentu skaits DB")
+    parser.add_argument("--limit", type=int, default=200, help="Lapas izmērs")
+    parser.add_argument("--repeat", type=int, default=200, help="Atkārtojumu skaits")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(bind=engine)
+        Session_ = sessionmaker(bind=engine)
+        with Session_() as db:
+            import_documents(generate_xml(args.n, seed=42), db)
+
+        with Session_() as db:
+            assert orm_page(db, args.limit, 0) == fast_page(db, args.limit, 0)
+
+        def run(fn):
+            # Jauna sesija katram pieprasījumam — kā API, bez siltas identitātes kartes
+            with Session_() as db:
+                return fn(db, args.limit, 0)
+
+        print(f"Kodētājs: {'orjson' if orjson is not None else 'json (stdlib)'}")
+        results = {}
+        for label, fn in (("orm+pydantic", orm_page), ("columns+fast", fast_page)):
+            best = min(timeit.repeat(lambda: run(fn), number=args.repeat, repeat=3)) / args.repeat
+            results[label] = best
+            print(f"{label:<14} {best * 1000:8.3f} ms/lapa (limit={args.limit})")
+
+        engine.dispose()
+
+    print(f"Paātrinājums: {results['orm+pydantic'] / results['columns+fast']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
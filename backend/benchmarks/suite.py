@@ -0,0 +1,207 @@
+"""Etalonu komplekts: parsēšana, imports un saraksta vaicājumi uz deterministiskām plūsmām.
+
+Rezultāti tiek ierakstīti JSON failā; ar `--compare` tos salīdzina ar
+iepriekšējo palaišanu un ziņo par regresijām (izejas kods 1).
+
+Palaišana (no backend/):
+
+    python -m benchmarks.suite --sizes 1k 100k 1M --output bench.json
+    python -m benchmarks.suite --sizes 1k --compare bench.json --threshold 0.15
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base, get_db
+from app.import_service import import_documents
+from app.main import create_app
+from app.parser import get_backend, iter_xml_file
+from app.queries import VALID_SORT_FIELDS
+from app.routes import documents_cache
+from scripts.generate_xml import write_xml
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000}
+
+# Saraksta filtru kombinācijas; katra tiek mērīta ar katru kārtošanas lauku
+LIST_FILTERS = {
+    "none": {},
+    "importance": {"importance": "high"},
+    "category": {"category": "internal"},
+    "active": {"active": "true"},
+    "date_range": {"created_from": "2021-01-01", "created_to": "2023-12-31"},
+    "search": {"q": "plāns"},
+}
+LIST_LIMIT = 50
+
+
+def _result(name: str, size: int, value: float, unit: str, better: str, **params) -> dict:
+    return {"name": name, "size": size, "params": params, "value": value, "unit": unit, "better": better}
+
+
+def bench_parse(feed: Path, size: int) -> list[dict]:
+    """Parsēšanas caurlaidspēja (tas pats parseris, ko `parse_documents_xml`, bez saraksta)."""
+    start = time.perf_counter()
+    count = sum(1 for _ in iter_xml_file(feed))
+    elapsed = time.perf_counter() - start
+    return [_result("parse", size, count / elapsed, "docs/s", "higher", backend=get_backend().name)]
+
+
+def bench_import(feed: Path, db_path: Path, size: int) -> list[dict]:
+    """`import_documents` rindas/s jaunai ievietošanai un atkārtotam importam no faila."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    Session_ = sessionmaker(bind=engine, autoflush=False)
+
+    results = []
+    for phase in ("insert", "reimport"):
+        with Session_() as db:
+            start = time.perf_counter()
+            imported = import_documents(feed, db).imported
+            elapsed = time.perf_counter() - start
+        results.append(_result(f"import_{phase}", size, imported / elapsed, "rows/s", "higher"))
+    engine.dispose()
+    return results
+
+
+def bench_list(db_path: Path, size: int, repeat: int) -> list[dict]:
+    """`GET /api/documents` latentums katrai filtra/kārtošanas kombinācijai.
+
+    Mēra seklu (offset=0) un dziļu (pēdējā lapa) nobīdi; lapu kešatmiņa
+    tiek notīrīta pirms katra pieprasījuma, lai mērītu vaicājumu, nevis kešu.
+    """
+    engine = create_engine(f"sqlite:///{db_path}")
+    Session_ = sessionmaker(bind=engine)
+
+    def override_get_db():
+        with Session_() as db:
+            yield db
+
+    app = create_app(async_db=False)
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+
+    results = []
+    for filter_name, filters in LIST_FILTERS.items():
+        total = client.get("/api/documents/facets", params=filters).json()["total"]
+        offsets = {"shallow": 0, "deep": max(0, total - LIST_LIMIT)}
+        for sort in sorted(VALID_SORT_FIELDS):
+            for depth, offset in offsets.items():
+                params = {**filters, "sort": sort, "limit": LIST_LIMIT, "offset": offset}
+                timings = []
+                for _ in range(repeat):
+                    documents_cache.clear()
+                    start = time.perf_counter()
+                    resp = client.get("/api/documents", params=params)
+                    timings.append(time.perf_counter() - start)
+                    resp.raise_for_status()
+                results.append(
+                    _result(
+                        "list",
+                        size,
+                        statistics.median(timings) * 1000,
+                        "ms",
+                        "lower",
+                        filter=filter_name,
+                        sort=sort,
+                        depth=depth,
+                    )
+                )
+    engine.dispose()
+    return results
+
+
+def _metadata() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+    }
+
+
+def _key(result: dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['name']}[{result['size']}]({params})"
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Atgriež regresiju aprakstus: rezultāti, kas pasliktinājušies vairāk par `threshold`."""
+    previous = {_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = previous.get(_key(result))
+        if old is None or not old["value"]:
+            continue
+        change = (result["value"] - old["value"]) / old["value"]
+        worse = -change if result["better"] == "higher" else change
+        if worse > threshold:
+            regressions.append(
+                f"{_key(result)}: {old['value']:.3f} → {result['value']:.3f} {result['unit']} "
+                f"({worse:+.0%} sliktāk)"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Etalonu komplekts")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES), help="Plūsmu izmēri")
+    parser.add_argument("--seed", type=int, default=42, help="Nejaušības sēkla")
+    parser.add_argument("--repeat", type=int, default=5, help="Saraksta pieprasījumu atkārtojumi")
+    parser.add_argument("--output", type=Path, default=Path("bench-results.json"), help="Rezultātu JSON fails")
+    parser.add_argument("--compare", type=Path, help="Iepriekšējo rezultātu JSON salīdzināšanai")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Pieļaujamā pasliktināšanās daļa")
+    args = parser.parse_args()
+
+    report = {"meta": {**_metadata(), "seed": args.seed}, "results": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label in args.sizes:
+            size = SIZES[label]
+            feed = Path(tmp) / f"feed-{label}.xml"
+            write_xml(feed, size, args.seed, workers=os.cpu_count() or 1)
+            db_path = Path(tmp) / f"bench-{label}.db"
+
+            for results in (
+                bench_parse(feed, size),
+                bench_import(feed, db_path, size),
+                bench_list(db_path, size, args.repeat),
+            ):
+                for result in results:
+                    print(f"{_key(result):<70} {result['value']:14.3f} {result['unit']}")
+                report["results"].extend(results)
+
+    args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Rezultāti: {args.output}")
+
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(baseline, report, args.threshold)
+        for line in regressions:
+            print(f"REGRESIJA {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"Regresiju nav (slieksnis {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
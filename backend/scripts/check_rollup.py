@@ -0,0 +1,63 @@
+"""`document_rollup` atbilstības pārbaude pret pilnu pārrēķinu no `documents`.
+
+Palaišana (no backend/, DB pēc `DATABASE_URL`):
+
+    python -m scripts.check_rollup            # izejas kods 1, ja ir atšķirības
+    python -m scripts.check_rollup --repair   # atšķirību gadījumā pārrēķina rollup no jauna
+"""
+
+import argparse
+import sys
+import time
+
+from app.db import DATABASE_URL, WriterSession, init_db
+from app.lookups import lookup_cache
+from app.rollup import RollupMismatch, check_rollup, rebuild_rollup
+
+# Tik daudz atšķirību tiek izdrukātas; pārējās tikai saskaitītas
+MAX_REPORTED = 20
+
+
+def _describe(db, mismatch: RollupMismatch) -> str:
+    month, importance_id, category_id, active = mismatch.key
+    importance = lookup_cache.name_of(db, "importance", importance_id)
+    category = lookup_cache.name_of(db, "category", category_id)
+    return (
+        f"{month} {importance}/{category}/{'aktīvs' if active else 'neaktīvs'}: "
+        f"gaidīts {mismatch.expected[0]} dok. / {mismatch.expected[1]} min, "
+        f"rollup {mismatch.actual[0]} dok. / {mismatch.actual[1]} min"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Pārbauda document_rollup pret pilnu pārrēķinu")
+    parser.add_argument(
+        "--repair", action="store_true", help="Atšķirību gadījumā pārrēķināt rollup no jauna"
+    )
+    args = parser.parse_args(argv)
+
+    init_db()
+    with WriterSession() as db:
+        start = time.perf_counter()
+        mismatches = check_rollup(db)
+        elapsed = time.perf_counter() - start
+        if not mismatches:
+            print(f"Rollup atbilst pārrēķinam ({DATABASE_URL}, {elapsed:.2f} s)")
+            return 0
+
+        for mismatch in mismatches[:MAX_REPORTED]:
+            print(_describe(db, mismatch))
+        if len(mismatches) > MAX_REPORTED:
+            print(f"… un vēl {len(mismatches) - MAX_REPORTED}")
+        print(f"Atšķirīgas atslēgas: {len(mismatches)}")
+
+        if args.repair:
+            rows = rebuild_rollup(db)
+            db.commit()
+            print(f"Rollup pārrēķināts: {rows} rindas")
+            return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,21 @@
-"""XML dokumentu metadatu ģenerators."""
+"""XML dokumentu metadatu ģenerators.
+
+Dokumenti tiek rakstīti straumē pa daļām (shard) ar fiksētu izmēru; katrai
+daļai ir sava no `--seed` atvasināta sēkla, tāpēc izvade nav atkarīga no
+procesu skaita, un daļas var ģenerēt paralēli.
+"""
 
 import argparse
+import gzip
+import os
 import random
-import xml.dom.minidom as minidom
-import xml.etree.ElementTree as ET
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, timedelta
 from pathlib import Path
+from xml.sax.saxutils import escape
 
 TITLES = [
     "Gada pārskats",
@@ -41,54 +51,134 @@ IMPORTANCE_LEVELS = ["zems", "vidējs", "augsts", "kritisks"]
 CATEGORIES = ["publisks", "iekšējs", "ierobežotas pieejamības", "konfidenciāls"]
 
 
-def generate_document(doc_id: int, rng: random.Random) -> ET.Element:
-    doc = ET.Element("document")
+# Dokumentu skaits vienā daļā; nosaka sēklu sadalījumu, tāpēc nav maināms
+SHARD_SIZE = 10_000
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n<documents>\n'
+XML_FOOTER = "</documents>\n"
+
+FIELD_ORDER = (
+    "title",
+    "description",
+    "responsible_unit",
+    "created_at",
+    "url",
+    "file_type",
+    "reading_time_minutes",
+    "importance",
+    "category",
+    "active",
+)
+
 
+def generate_document(doc_id: int, rng: random.Random) -> dict[str, str]:
+    """Ģenerē viena dokumenta lauku vērtības (XML teksts latviski)."""
     title_base = rng.choice(TITLES)
     # Pievieno gadu virsrakstam, lai katrs dokuments būtu unikālāks
     year = rng.randint(2019, 2026)
-    ET.SubElement(doc, "title").text = f"{title_base} {year}"
-
-    ET.SubElement(doc, "description").text = (
-        f"Dokuments nr. {doc_id}: {title_base.lower()} — "
-        f"sagatavots {year}. gadā."
-    )
-
-    ET.SubElement(doc, "responsible_unit").text = rng.choice(UNITS)
+    unit = rng.choice(UNITS)
 
     start = date(2019, 1, 1)
     offset = rng.randint(0, (date(2026, 1, 1) - start).days)
     created = start + timedelta(days=offset)
-    ET.SubElement(doc, "created_at").text = created.isoformat()
-
     file_type = rng.choice(FILE_TYPES)
-    ET.SubElement(doc, "url").text = (
-        f"https://example.com/docs/{doc_id:04d}.{file_type}"
-    )
-    ET.SubElement(doc, "file_type").text = file_type
 
-    ET.SubElement(doc, "reading_time_minutes").text = str(rng.randint(1, 120))
-    ET.SubElement(doc, "importance").text = rng.choice(IMPORTANCE_LEVELS)
-    ET.SubElement(doc, "category").text = rng.choice(CATEGORIES)
-    ET.SubElement(doc, "active").text = rng.choice(["jā", "nē"])
+    return {
+        "title": f"{title_base} {year}",
+        "description": (
+            f"Dokuments nr. {doc_id}: {title_base.lower()} — "
+            f"sagatavots {year}. gadā."
+        ),
+        "responsible_unit": unit,
+        "created_at": created.isoformat(),
+        "url": f"https://example.com/docs/{doc_id:04d}.{file_type}",
+        "file_type": file_type,
+        "reading_time_minutes": str(rng.randint(1, 120)),
+        "importance": rng.choice(IMPORTANCE_LEVELS),
+        "category": rng.choice(CATEGORIES),
+        "active": rng.choice(["jā", "nē"]),
+    }
 
-    return doc
 
+def render_document(fields: dict[str, str]) -> str:
+    """Formatē vienu <document> elementu ar atkāpēm."""
+    lines = [f"    <{tag}>{escape(fields[tag])}</{tag}>\n" for tag in FIELD_ORDER]
+    return "  <document>\n" + "".join(lines) + "  </document>\n"
 
-def generate_xml(n: int, seed: int | None = None) -> str:
-    rng = random.Random(seed)
-    root = ET.Element("documents")
 
-    for i in range(1, n + 1):
-        root.append(generate_document(i, rng))
+def _shard_rng(seed: int, shard: int) -> random.Random:
+    # Pirmā daļa izmanto pašu sēklu — mazas plūsmas sakrīt ar iepriekšējo ģeneratoru
+    return random.Random(seed if shard == 0 else f"{seed}:{shard}")
+
+
+def render_shard(n: int, seed: int, shard: int) -> str:
+    """Ģenerē vienas daļas dokumentus kā XML fragmentu."""
+    rng = _shard_rng(seed, shard)
+    first = shard * SHARD_SIZE + 1
+    last = min(n, first + SHARD_SIZE - 1)
+    return "".join(render_document(generate_document(i, rng)) for i in range(first, last + 1))
+
 
-    raw = ET.tostring(root, encoding="unicode", xml_declaration=False)
-    # minidom formatē XML ar atkāpēm lasāmībai
-    pretty = minidom.parseString(raw).toprettyxml(indent="  ", encoding=None)
-    # Noņem minidom pievienoto XML deklarāciju — pievienosim savu
-    lines = pretty.splitlines()
-    body = "\n".join(lines[1:])
-    return f'<?xml version="1.0" encoding="UTF-8"?>\n{body}\n'
+def _shard_bytes(n: int, seed: int, shard: int, compress: bool) -> bytes:
+    data = render_shard(n, seed, shard).encode("utf-8")
+    # Katra daļa ir atsevišķs gzip loceklis; to virkne ir derīgs gzip fails
+    return gzip.compress(data, compresslevel=6) if compress else data
+
+
+def _resolve_seed(seed: int | None) -> int:
+    return seed if seed is not None else random.SystemRandom().randrange(2**32)
+
+
+def iter_xml(n: int, seed: int | None = None) -> Iterator[str]:
+    """Ģenerē XML pa daļām: deklarācija, dokumentu fragmenti, noslēgums."""
+    seed = _resolve_seed(seed)
+    yield XML_HEADER
+    for shard in range((n + SHARD_SIZE - 1) // SHARD_SIZE):
+        yield render_shard(n, seed, shard)
+    yield XML_FOOTER
+
+
+def generate_xml(n: int, seed: int | None = None) -> str:
+    return "".join(iter_xml(n, seed))
+
+
+def write_xml(
+    path: Path,
+    n: int,
+    seed: int | None = None,
+    workers: int = 1,
+    compress: bool | None = None,
+) -> None:
+    """Raksta XML failā straumē; `workers` > 1 — daļas ģenerē paralēli.
+
+    `compress=None` ieslēdz gzip, ja faila nosaukums beidzas ar `.gz`.
+    Izvade ir vienāda jebkuram procesu skaitam.
+    """
+    seed = _resolve_seed(seed)
+    compress = path.suffix == ".gz" if compress is None else compress
+    shards = range((n + SHARD_SIZE - 1) // SHARD_SIZE)
+
+    def frame(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return gzip.compress(data, compresslevel=6) if compress else data
+
+    with path.open("wb") as out:
+        out.write(frame(XML_HEADER))
+        if workers <= 1:
+            for shard in shards:
+                out.write(_shard_bytes(n, seed, shard, compress))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                shards = iter(shards)
+                # Ne vairāk kā 2 × workers daļu atmiņā vienlaikus
+                while True:
+                    while len(pending) < 2 * workers and (shard := next(shards, None)) is not None:
+                        pending.append(pool.submit(_shard_bytes, n, seed, shard, compress))
+                    if not pending:
+                        break
+                    out.write(pending.popleft().result())
+        out.write(frame(XML_FOOTER))
 
 
 def main():
@@ -102,18 +192,36 @@ def main():
         default=None,
         help="Izvades faila ceļš (noklusējums: backend/data/documents.xml)",
     )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=1,
+        help=f"Paralēlo procesu skaits (0 — visi CPU: {os.cpu_count()})",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="Saspiest izvadi ar gzip (arī automātiski, ja fails beidzas ar .gz)",
+    )
     args = parser.parse_args()
 
-    xml_content = generate_xml(args.n, args.seed)
-
     if args.output:
         out_path = Path(args.output)
     else:
         out_path = Path(__file__).resolve().parent.parent / "data" / "documents.xml"
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text(xml_content, encoding="utf-8")
-    print(f"Generated {args.n} documents -> {out_path}")
+    start = time.perf_counter()
+    write_xml(
+        out_path,
+        args.n,
+        args.seed,
+        workers=args.workers or os.cpu_count() or 1,
+        compress=True if args.gzip else None,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"Generated {args.n} documents -> {out_path} ({elapsed:.1f} s)")
 
 
 if __name__ == "__main__":
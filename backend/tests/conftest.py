@@ -0,0 +1,62 @@
+"""Kopīgās testu fiksācijas: pagaidu DB fails, sesiju fabrikas un API klients."""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.cache import bump_generation
+from app.db import Base, get_async_db, get_async_session_factory, get_db, get_session_factory
+from app.main import create_app
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Jauns DB fails katram testam; importa darbi to lieto no sava pavediena."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    # Jauna tukša DB — kešatmiņas no iepriekšējiem testiem vairs nav derīgas
+    bump_generation()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def Session(engine):
+    return sessionmaker(bind=engine, autoflush=False)
+
+
+@pytest.fixture
+def AsyncSession(engine):
+    """aiosqlite sesiju fabrika tam pašam DB failam."""
+    # NullPool — TestClient un importa darbi katrs izmanto savu notikumu ciklu
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{engine.url.database}", poolclass=NullPool)
+    yield async_sessionmaker(async_engine, expire_on_commit=False)
+    asyncio.run(async_engine.dispose())
+
+
+@pytest.fixture(params=[False, True], ids=["sync", "async"])
+def client(request, Session):
+    """API klients abām saraksta un importa galapunktu versijām: `create_app(async_db=…)`."""
+
+    def override_get_db():
+        with Session() as db:
+            yield db
+
+    app = create_app(async_db=request.param)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: Session
+    if request.param:
+        AsyncSession = request.getfixturevalue("AsyncSession")
+
+        async def override_get_async_db():
+            async with AsyncSession() as db:
+                yield db
+
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        app.dependency_overrides[get_async_session_factory] = lambda: AsyncSession
+    return TestClient(app)
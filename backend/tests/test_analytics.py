@@ -0,0 +1,174 @@
+"""Analītikas kolonnu momentuzņēmuma testi: agregāti sakrīt ar SQL, papildināšana pēc importa."""
+
+import asyncio
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from app import analytics
+from app.analytics import ColumnarSnapshot, reading_time_stats, snapshots
+from app.import_service import async_import_documents, import_documents
+from app.parser import iter_documents_xml
+from app.queries import DocumentFilters
+from scripts.generate_xml import generate_xml
+
+pytest.importorskip("numpy")
+
+
+@pytest.fixture(autouse=True)
+def clear_snapshots():
+    yield
+    snapshots.clear()
+
+
+def _import(Session, xml: str):
+    with Session() as db:
+        return import_documents(xml, db, batch_size=50)
+
+
+def _sql(db, group_by, filters=DocumentFilters()):
+    with patch.object(analytics, "ANALYTICS_SNAPSHOT", False):
+        return reading_time_stats(db, group_by, filters)
+
+
+GROUPINGS = [
+    (),
+    ("responsible_unit",),
+    ("responsible_unit", "importance"),
+    ("category", "created_month"),
+    ("file_type", "active", "importance"),
+]
+
+
+@pytest.mark.parametrize("group_by", GROUPINGS, ids=lambda g: "+".join(g) or "none")
+def test_snapshot_matches_sql(Session, group_by):
+    _import(Session, generate_xml(300, seed=11))
+    with Session() as db:
+        stats = reading_time_stats(db, group_by, DocumentFilters())
+        assert stats.engine == "numpy"
+        assert stats.groups == _sql(db, group_by).groups
+    assert sum(group["count"] for group in stats.groups) == 300
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        DocumentFilters(category="internal", active=True),
+        DocumentFilters(importance="high", created_from=date(2022, 1, 1), created_to=date(2023, 6, 30)),
+        DocumentFilters(file_type="pdf", responsible_unit="IT nodaļa"),
+        DocumentFilters(category="nav-tādas"),
+    ],
+)
+def test_snapshot_filters_match_sql(Session, filters):
+    _import(Session, generate_xml(300, seed=12))
+    with Session() as db:
+        groups = reading_time_stats(db, ("responsible_unit",), filters).groups
+        assert groups == _sql(db, ("responsible_unit",), filters).groups
+
+
+def test_wide_groupings_fall_back_to_generic_aggregation(Session):
+    _import(Session, generate_xml(120, seed=13))
+    with Session() as db, patch.object(analytics, "HISTOGRAM_MIN_CELLS", 0):
+        group_by = analytics.GROUP_FIELDS
+        assert reading_time_stats(db, group_by, DocumentFilters()).groups == _sql(db, group_by).groups
+
+
+def test_import_patches_snapshot_incrementally(Session):
+    xml = generate_xml(200, seed=14)
+    _import(Session, xml)
+    with Session() as db:
+        before = snapshots.get(db)
+
+    # Divi jauni dokumenti un viens mainīts (ar jaunu struktūrvienību) — papildināšana, nevis pārbūve
+    docs = xml.split("</document>")
+    docs[0] = docs[0].replace("/docs/0001.", "/docs/jauns-0001.")
+    docs[1] = docs[1].replace("/docs/0002.", "/docs/jauns-0002.")
+    unit_start = docs[2].index("<responsible_unit>") + len("<responsible_unit>")
+    unit_end = docs[2].index("</responsible_unit>")
+    docs[2] = docs[2][:unit_start] + "Jaunā nodaļa" + docs[2][unit_end:]
+    result = _import(Session, "</document>".join(docs))
+    assert (result.inserted, result.updated) == (2, 1)
+
+    with Session() as db, patch.object(ColumnarSnapshot, "build", wraps=ColumnarSnapshot.build) as build:
+        after = snapshots.get(db)
+        build.assert_not_called()
+        fresh = ColumnarSnapshot.build(db)
+
+    assert len(after) == len(before) + 2
+    assert after.names == fresh.names
+    for name, column in fresh.columns.items():
+        assert (after.columns[name] == column).all(), name
+    groups = after.reading_time(("responsible_unit",), DocumentFilters())
+    assert {"responsible_unit": "Jaunā nodaļa"} in [group["key"] for group in groups]
+
+
+def test_async_import_patches_snapshot(Session, AsyncSession):
+    _import(Session, generate_xml(100, seed=20))
+    with Session() as db:
+        snapshots.get(db)
+
+    async def run():
+        async def documents():
+            xml = generate_xml(10, seed=21).replace("example.com", "mirror.example.com")
+            for doc in iter_documents_xml(xml):
+                yield doc
+
+        async with AsyncSession() as db:
+            await async_import_documents(documents(), db, batch_size=10)
+
+    asyncio.run(run())
+    with Session() as db, patch.object(ColumnarSnapshot, "build") as build:
+        assert len(snapshots.get(db)) == 110
+        build.assert_not_called()
+
+
+def test_rolled_back_changes_are_not_applied(Session):
+    _import(Session, generate_xml(20, seed=15))
+    with Session() as db:
+        snapshots.get(db)
+        analytics.record_changes(db, ["https://example.com/docs/0001.pdf"])
+        db.rollback()
+    assert snapshots._pending == {}
+
+
+class TestEndpoint:
+    def test_groups_and_snapshot_footprint(self, client, Session):
+        _import(Session, generate_xml(100, seed=16))
+        resp = client.get("/api/stats/reading-time", params={"group_by": "responsible_unit,importance"})
+
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["group_by"] == ["responsible_unit", "importance"]
+        assert data["engine"] == "numpy"
+        assert data["snapshot"]["rows"] == 100
+        assert data["snapshot"]["bytes"] > 0
+        assert sum(group["count"] for group in data["groups"]) == 100
+        assert set(data["groups"][0]["key"]) == {"responsible_unit", "importance"}
+
+    def test_footprint_exported_as_metric(self, client, Session):
+        _import(Session, generate_xml(10, seed=17))
+        client.get("/api/stats/reading-time")
+        assert "analytics_snapshot_bytes{db=" in client.get("/metrics").text
+
+    def test_without_grouping_returns_single_total(self, client, Session):
+        _import(Session, generate_xml(10, seed=18))
+        groups = client.get("/api/stats/reading-time").json()["groups"]
+        assert len(groups) == 1
+        assert groups[0]["key"] == {} and groups[0]["count"] == 10
+
+    def test_sql_engine_when_snapshot_disabled(self, client, Session):
+        _import(Session, generate_xml(10, seed=19))
+        with patch.object(analytics, "ANALYTICS_SNAPSHOT", False):
+            data = client.get("/api/stats/reading-time", params={"group_by": "category"}).json()
+        assert data["engine"] == "sql"
+        assert data["snapshot"] is None
+
+    def test_unknown_group_field_returns_400(self, client):
+        resp = client.get("/api/stats/reading-time", params={"group_by": "category,title"})
+        assert resp.status_code == 400
+        assert "title" in resp.json()["detail"]
+
+    def test_search_filter_rejected(self, client):
+        resp = client.get("/api/stats/reading-time", params={"q": "plāns"})
+        assert resp.status_code == 400
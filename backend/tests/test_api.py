@@ -1,38 +1,25 @@
 """API galapunktu integrācijas testi."""
 
+import asyncio
+import base64
+import csv
+import gzip
+import io
+import json
+import threading
 from pathlib import Path
 from unittest.mock import patch
 
+import httpx
 import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
-from app.db import Base, get_db
-from app.main import app
+from app.db import DB_BUSY_MESSAGE, get_async_db, get_async_session_factory, get_db, get_session_factory
 from app.import_service import import_documents
-
-# --- Testa DB atmiņā; StaticPool nodrošina vienu koplietotu savienojumu ---
-
-test_engine = create_engine(
-    "sqlite:///:memory:",
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestSession = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
-
-
-def override_get_db():
-    db = TestSession()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-app.dependency_overrides[get_db] = override_get_db
-client = TestClient(app)
+from app.jobs import import_jobs
+from app.multi_import import get_http_transport
+from app.parser import parse_documents_xml
+from scripts.generate_xml import generate_xml
 
 SAMPLE_XML = """\
 <?xml version="1.0" encoding="UTF-8"?>
@@ -89,129 +76,557 @@ SAMPLE_XML = """\
 """
 
 
-@pytest.fixture(autouse=True)
-def setup_db():
-    """Izveido tabulas pirms katra testa un notīra pēc."""
-    Base.metadata.create_all(bind=test_engine)
-    yield
-    Base.metadata.drop_all(bind=test_engine)
-
-
-def _seed_db():
+def _seed_db(Session):
     """Importē testa datus tieši caur servisu."""
-    db = TestSession()
-    try:
+    with Session() as db:
         import_documents(SAMPLE_XML, db)
-    finally:
-        db.close()
 
 
 class TestGetDocuments:
-    def test_returns_imported_documents(self):
-        _seed_db()
+    def test_returns_imported_documents(self, client, Session):
+        _seed_db(Session)
         resp = client.get("/api/documents")
         assert resp.status_code == 200
         assert len(resp.json()) == 4
 
-    def test_empty_db_returns_empty_list(self):
+    def test_empty_db_returns_empty_list(self, client):
         resp = client.get("/api/documents")
         assert resp.status_code == 200
         assert resp.json() == []
 
-    def test_filter_by_active_true(self):
-        _seed_db()
+    def test_filter_by_active_true(self, client, Session):
+        _seed_db(Session)
         resp = client.get("/api/documents", params={"active": "true"})
         data = resp.json()
         assert len(data) == 3
         assert all(d["active"] is True for d in data)
 
-    def test_filter_by_active_false(self):
-        _seed_db()
+    def test_filter_by_active_false(self, client, Session):
+        _seed_db(Session)
         resp = client.get("/api/documents", params={"active": "false"})
         data = resp.json()
         assert len(data) == 1
         assert data[0]["active"] is False
 
-    def test_filter_by_importance(self):
-        _seed_db()
+    def test_filter_by_importance(self, client, Session):
+        _seed_db(Session)
         resp = client.get("/api/documents", params={"importance": "high"})
         data = resp.json()
         assert len(data) == 1
         assert data[0]["importance"] == "high"
 
-    def test_filter_by_category(self):
-        _seed_db()
+    def test_filter_by_category(self, client, Session):
+        _seed_db(Session)
         resp = client.get("/api/documents", params={"category": "public"})
         data = resp.json()
         assert len(data) == 1
         assert data[0]["category"] == "public"
 
-    def test_combined_filters(self):
-        _seed_db()
+    def test_filter_by_responsible_unit(self, client, Session):
+        _seed_db(Session)
+        data = client.get("/api/documents", params={"responsible_unit": "Juridiskā nodaļa"}).json()
+        assert [d["url"] for d in data] == ["https://example.com/docs/b.docx"]
+        assert data[0]["responsible_unit"] == "Juridiskā nodaļa"
+
+    def test_filter_by_file_type(self, client, Session):
+        _seed_db(Session)
+        data = client.get("/api/documents", params={"file_type": "pdf", "active": "true"}).json()
+        assert len(data) == 1
+        assert data[0]["file_type"] == "pdf"
+
+    def test_unknown_lookup_value_returns_empty(self, client, Session):
+        _seed_db(Session)
+        assert client.get("/api/documents", params={"file_type": "odt"}).json() == []
+        assert client.get("/api/documents", params={"responsible_unit": "Nav tādas"}).json() == []
+
+    def test_combined_filters(self, client, Session):
+        _seed_db(Session)
         resp = client.get(
             "/api/documents",
             params={"category": "internal", "active": "true"},
         )
         assert len(resp.json()) == 2
 
-    def test_sort_created_at_desc_default(self):
-        _seed_db()
+    def test_sort_created_at_desc_default(self, client, Session):
+        _seed_db(Session)
         data = client.get("/api/documents").json()
         dates = [d["created_at"] for d in data]
         assert dates == sorted(dates, reverse=True)
 
-    def test_sort_created_at_asc(self):
-        _seed_db()
+    def test_sort_created_at_asc(self, client, Session):
+        _seed_db(Session)
         data = client.get(
             "/api/documents", params={"sort": "created_at", "order": "asc"}
         ).json()
         dates = [d["created_at"] for d in data]
         assert dates == sorted(dates)
 
-    def test_sort_title_asc(self):
-        _seed_db()
+    def test_sort_title_asc(self, client, Session):
+        _seed_db(Session)
         data = client.get(
             "/api/documents", params={"sort": "title", "order": "asc"}
         ).json()
         titles = [d["title"] for d in data]
         assert titles == sorted(titles)
 
-    def test_limit(self):
-        _seed_db()
+    def test_limit(self, client, Session):
+        _seed_db(Session)
         resp = client.get("/api/documents", params={"limit": 1})
         assert len(resp.json()) == 1
 
-    def test_offset(self):
-        _seed_db()
+    def test_offset(self, client, Session):
+        _seed_db(Session)
         all_docs = client.get("/api/documents").json()
         offset_docs = client.get("/api/documents", params={"offset": 1}).json()
         assert len(offset_docs) == 3
         assert offset_docs[0]["id"] == all_docs[1]["id"]
 
-    def test_documents_have_id(self):
-        _seed_db()
+    def test_documents_have_id(self, client, Session):
+        _seed_db(Session)
         data = client.get("/api/documents").json()
         assert all("id" in d for d in data)
 
-    def test_filter_no_match_returns_empty(self):
-        _seed_db()
+    def test_filter_no_match_returns_empty(self, client, Session):
+        _seed_db(Session)
         resp = client.get("/api/documents", params={"importance": "nonexistent"})
         assert resp.json() == []
 
 
+def _seed_generated(Session, n: int = 60, seed: int = 7):
+    """Importē ģenerētus testa datus (ar atkārtotām kārtošanas vērtībām)."""
+    with Session() as db:
+        import_documents(generate_xml(n, seed), db)
+
+
+class TestCursorPagination:
+    @pytest.mark.parametrize("sort", ["created_at", "title", "importance", "active"])
+    @pytest.mark.parametrize("order", ["asc", "desc"])
+    def test_cursor_pages_match_offset_pages(self, client, Session, sort, order):
+        _seed_generated(Session)
+        params = {"sort": sort, "order": order, "limit": 7}
+        expected = client.get("/api/documents", params={**params, "limit": 200}).json()
+
+        seen, cursor = [], None
+        while True:
+            resp = client.get(
+                "/api/documents", params={**params, **({"cursor": cursor} if cursor else {})}
+            )
+            assert resp.status_code == 200
+            seen += resp.json()
+            cursor = resp.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+
+        assert [d["id"] for d in seen] == [d["id"] for d in expected]
+
+    def test_cursor_combines_with_filters(self, client, Session):
+        _seed_generated(Session)
+        params = {"category": "internal", "sort": "title", "order": "asc", "limit": 3}
+        first = client.get("/api/documents", params=params)
+        second = client.get(
+            "/api/documents", params={**params, "cursor": first.headers["X-Next-Cursor"]}
+        ).json()
+        assert second
+        assert all(d["category"] == "internal" for d in second)
+        assert second[0]["title"] >= first.json()[-1]["title"]
+
+    def test_no_next_cursor_on_last_page(self, client, Session):
+        _seed_db(Session)
+        resp = client.get("/api/documents", params={"limit": 10})
+        assert "X-Next-Cursor" not in resp.headers
+
+    def test_invalid_cursor_returns_400(self, client, Session):
+        _seed_db(Session)
+        resp = client.get("/api/documents", params={"cursor": "not-a-cursor"})
+        assert resp.status_code == 400
+        assert "kursors" in resp.json()["detail"]
+
+    @pytest.mark.parametrize(
+        "sort, value",
+        [
+            ("created_at", 123),
+            ("created_at", "nav-datums"),
+            ("title", {"a": 1}),
+            ("title", ["a"]),
+            ("importance", "augsts"),
+            ("importance", True),
+            ("active", 1),
+        ],
+    )
+    def test_cursor_with_wrong_value_type_returns_400(self, client, Session, sort, value):
+        _seed_db(Session)
+        payload = json.dumps([sort, "asc", value, 1]).encode("utf-8")
+        cursor = base64.urlsafe_b64encode(payload).decode("ascii")
+        resp = client.get("/api/documents", params={"cursor": cursor, "sort": sort, "order": "asc"})
+        assert resp.status_code == 400
+        assert "kursors" in resp.json()["detail"]
+
+    def test_cursor_for_other_sort_returns_400(self, client, Session):
+        _seed_db(Session)
+        cursor = client.get("/api/documents", params={"limit": 1}).headers["X-Next-Cursor"]
+        resp = client.get("/api/documents", params={"cursor": cursor, "sort": "title"})
+        assert resp.status_code == 400
+
+    def test_cursor_with_offset_returns_400(self, client, Session):
+        _seed_db(Session)
+        cursor = client.get("/api/documents", params={"limit": 1}).headers["X-Next-Cursor"]
+        resp = client.get("/api/documents", params={"cursor": cursor, "offset": 1})
+        assert resp.status_code == 400
+
+
+class TestFacets:
+    def test_counts_all_documents(self, client, Session):
+        _seed_db(Session)
+        resp = client.get("/api/documents/facets")
+        assert resp.status_code == 200
+        assert resp.json() == {
+            "total": 4,
+            "importance": {"critical": 1, "high": 1, "low": 1, "medium": 1},
+            "category": {"confidential": 1, "internal": 2, "public": 1},
+            "active": {"false": 1, "true": 3},
+            "file_type": {"docx": 1, "html": 1, "pdf": 1, "xlsx": 1},
+            "created_month": {"2023-01": 1, "2024-03": 1, "2024-06": 1, "2025-02": 1},
+        }
+
+    def test_total_matches_filtered_list(self, client, Session):
+        _seed_generated(Session)
+        params = {"category": "internal", "active": "true", "created_from": "2021-01-01"}
+        facets = client.get("/api/documents/facets", params=params).json()
+        docs = client.get("/api/documents", params={**params, "limit": 200}).json()
+        assert facets["total"] == len(docs)
+        assert facets["category"] == {"internal": len(docs)}
+        assert sum(facets["importance"].values()) == len(docs)
+
+    def test_empty_db(self, client):
+        data = client.get("/api/documents/facets").json()
+        assert data["total"] == 0
+        assert data["importance"] == {}
+
+    def test_invalid_date_returns_400(self, client):
+        resp = client.get("/api/documents/facets", params={"created_to": "x"})
+        assert resp.status_code == 400
+
+    def test_cache_invalidated_by_import(self, client, Session):
+        _seed_db(Session)
+        assert client.get("/api/documents/facets").json()["total"] == 4
+
+        extra = SAMPLE_XML.replace("docs/a.pdf", "docs/a2.pdf")
+        with Session() as db:
+            import_documents(extra, db)
+        assert client.get("/api/documents/facets").json()["total"] == 5
+
+    def test_cache_kept_when_import_changes_nothing(self, client, Session):
+        _seed_db(Session)
+        client.get("/api/documents/facets")
+        with patch("app.routes.document_facets") as compute:
+            _seed_db(Session)
+            client.get("/api/documents/facets")
+        compute.assert_not_called()
+
+
+class TestExport:
+    def test_ndjson_matches_list(self, client, Session):
+        _seed_generated(Session)
+        resp = client.get("/api/documents/export", params={"category": "internal"})
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/x-ndjson"
+        exported = [json.loads(line) for line in resp.text.splitlines()]
+
+        listed = client.get(
+            "/api/documents", params={"category": "internal", "limit": 200}
+        ).json()
+        assert exported == sorted(listed, key=lambda d: d["id"])
+
+    def test_streams_in_batches(self, client, Session):
+        _seed_generated(Session)
+        with patch("app.routes.EXPORT_BATCH_SIZE", 7):
+            lines = client.get("/api/documents/export").text.splitlines()
+        assert len(lines) == 60
+        assert [json.loads(line)["id"] for line in lines] == list(range(1, 61))
+
+    def test_csv(self, client, Session):
+        _seed_db(Session)
+        resp = client.get("/api/documents/export", params={"format": "csv", "active": "false"})
+        assert resp.headers["content-type"] == "text/csv; charset=utf-8"
+        rows = list(csv.DictReader(io.StringIO(resp.text)))
+        assert len(rows) == 1
+        assert rows[0]["title"] == "Beta dokuments"
+        assert rows[0]["active"] == "false"
+        assert rows[0]["created_at"] == "2023-01-15"
+
+    def test_gzip_when_accepted(self, client, Session):
+        _seed_db(Session)
+        plain = client.get("/api/documents/export", headers={"Accept-Encoding": "identity"})
+        with client.stream(
+            "GET", "/api/documents/export", headers={"Accept-Encoding": "gzip"}
+        ) as resp:
+            assert resp.headers["content-encoding"] == "gzip"
+            body = b"".join(resp.iter_raw())
+        assert gzip.decompress(body) == plain.content
+        assert len(plain.text.splitlines()) == 4
+
+    def test_identity_when_gzip_refused(self, client, Session):
+        _seed_db(Session)
+        resp = client.get(
+            "/api/documents/export", headers={"Accept-Encoding": "gzip;q=0, identity"}
+        )
+        assert "content-encoding" not in resp.headers
+        assert len(resp.text.splitlines()) == 4
+
+    def test_empty_csv_has_header(self, client):
+        resp = client.get("/api/documents/export", params={"format": "csv"})
+        assert resp.text.strip() == (
+            "title,description,responsible_unit,created_at,url,file_type,"
+            "reading_time_minutes,importance,category,active,id"
+        )
+
+    def test_xml_reproduces_source_feed(self, client, Session):
+        _seed_generated(Session)
+        resp = client.get("/api/documents/export", params={"format": "xml"})
+        assert resp.headers["content-type"] == "application/xml"
+        # Ģenerētā plūsma ir tieši avota formātā — eksports to atjauno baitu līmenī
+        assert resp.text == generate_xml(60, 7)
+        assert parse_documents_xml(resp.text) == parse_documents_xml(generate_xml(60, 7))
+
+    def test_invalid_format_returns_400(self, client):
+        resp = client.get("/api/documents/export", params={"format": "xls"})
+        assert resp.status_code == 400
+
+
+class TestProfiling:
+    """Server-Timing profilēšanas režīms, EXPLAIN galapunkts un lēno vaicājumu žurnāls."""
+
+    @staticmethod
+    def _timings(resp) -> dict[str, str]:
+        metrics = {}
+        for item in resp.headers["Server-Timing"].split(","):
+            name, _, value = item.strip().partition(";")
+            metrics[name] = value
+        return metrics
+
+    def test_debug_flag_adds_server_timing(self, client, Session):
+        _seed_db(Session)
+        resp = client.get("/api/documents", params={"debug": "true"})
+        assert resp.status_code == 200
+        metrics = self._timings(resp)
+        assert list(metrics) == ["db", "hydrate", "serialize", "rows", "cache", "total"]
+        assert metrics["rows"] == 'desc="4"'
+        assert all(float(metrics[name].removeprefix("dur=")) >= 0 for name in ("db", "hydrate", "total"))
+
+    def test_debug_header_bypasses_cache(self, client, Session):
+        _seed_db(Session)
+        client.get("/api/documents")
+        resp = client.get("/api/documents", headers={"X-Debug-Timing": "1"})
+        assert resp.headers["X-Cache"] == "BYPASS"
+        assert "Server-Timing" in resp.headers
+        assert len(resp.json()) == 4
+
+        plain = client.get("/api/documents")
+        assert plain.headers["X-Cache"] == "HIT"
+        assert "Server-Timing" not in plain.headers
+
+    def test_explain_returns_plan_for_params(self, client):
+        resp = client.get(
+            "/api/documents/explain",
+            params={"importance": "high", "sort": "title", "order": "asc", "limit": 10, "offset": 20},
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["sql"].startswith("SELECT")
+        assert data["params"] == [2, 10, 20]  # importance_rank("high")
+        assert data["plan"]
+
+    def test_explain_validates_params(self, client):
+        assert client.get("/api/documents/explain", params={"sort": "nav"}).status_code == 400
+
+    def test_slow_query_log(self, client, Session, tmp_path):
+        _seed_db(Session)
+        log = tmp_path / "slow.log"
+        with patch("app.profiling.SLOW_QUERY_MS", 0), patch("app.profiling.SLOW_QUERY_LOG", str(log)):
+            client.get("/api/documents", params={"category": "internal", "limit": 3})
+
+        entry = json.loads(log.read_text(encoding="utf-8").splitlines()[-1])
+        assert entry["route"] == "/api/documents"
+        assert entry["shape"] == {"sort": "created_at", "filters": "category", "paging": "first"}
+        assert entry["rows"] == 2
+        assert entry["params"] == ["internal", 3, 0]
+        assert entry["sql"].startswith("SELECT")
+        assert entry["plan"]
+        assert set(entry["stages_ms"]) == {"db", "hydrate", "serialize"}
+
+    def test_fast_queries_are_not_logged(self, client, tmp_path):
+        log = tmp_path / "slow.log"
+        with patch("app.profiling.SLOW_QUERY_MS", 60_000), patch("app.profiling.SLOW_QUERY_LOG", str(log)):
+            client.get("/api/documents")
+        assert not log.exists()
+
+
+class TestResponseCache:
+    def test_repeat_request_is_cache_hit(self, client, Session):
+        _seed_db(Session)
+        first = client.get("/api/documents", params={"category": "internal"})
+        second = client.get("/api/documents", params={"category": "internal"})
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.content == first.content
+        assert second.headers["ETag"] == first.headers["ETag"]
+
+    def test_param_order_does_not_matter(self, client, Session):
+        _seed_db(Session)
+        client.get("/api/documents?category=internal&active=true")
+        resp = client.get("/api/documents?active=true&category=internal")
+        assert resp.headers["X-Cache"] == "HIT"
+
+    def test_if_none_match_returns_304(self, client, Session):
+        _seed_db(Session)
+        etag = client.get("/api/documents").headers["ETag"]
+        resp = client.get("/api/documents", headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.content == b""
+        assert resp.headers["ETag"] == etag
+
+    def test_stale_etag_returns_200(self, client, Session):
+        _seed_db(Session)
+        resp = client.get("/api/documents", headers={"If-None-Match": '"old"'})
+        assert resp.status_code == 200
+        assert len(resp.json()) == 4
+
+    def test_import_invalidates_cache(self, client, Session):
+        _seed_db(Session)
+        before = client.get("/api/documents")
+        with Session() as db:
+            import_documents(SAMPLE_XML.replace("Alfa dokuments", "Alfa v2"), db)
+
+        after = client.get("/api/documents", headers={"If-None-Match": before.headers["ETag"]})
+        assert after.status_code == 200
+        assert after.headers["X-Cache"] == "MISS"
+        assert "Alfa v2" in [d["title"] for d in after.json()]
+
+    def test_cached_page_keeps_next_cursor(self, client, Session):
+        _seed_db(Session)
+        first = client.get("/api/documents", params={"limit": 2})
+        second = client.get("/api/documents", params={"limit": 2})
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+
+    def test_stats(self, client, Session):
+        _seed_db(Session)
+        before = client.get("/api/cache/stats").json()
+        client.get("/api/documents", params={"sort": "title"})
+        client.get("/api/documents", params={"sort": "title"})
+        stats = client.get("/api/cache/stats").json()
+        assert stats["documents"]["misses"] == before["documents"]["misses"] + 1
+        assert stats["documents"]["hits"] == before["documents"]["hits"] + 1
+        assert stats["generation"] >= 1
+
+
+SEARCH_XML = (
+    SAMPLE_XML.replace("Alfa dokuments", "Drošības politika")
+    .replace("Apraksts B", "Iekšējie drošības noteikumi")
+    .replace("Gamma dokuments", "Personāla rokasgrāmata")
+)
+
+
+def _seed_search_db(Session):
+    with Session() as db:
+        import_documents(SEARCH_XML, db)
+
+
+class TestFullTextSearch:
+    def _titles(self, client, **params):
+        resp = client.get("/api/documents", params=params)
+        assert resp.status_code == 200
+        return [d["title"] for d in resp.json()]
+
+    def test_search_with_diacritics(self, client, Session):
+        _seed_search_db(Session)
+        assert set(self._titles(client, q="Drošības")) == {"Drošības politika", "Beta dokuments"}
+
+    def test_search_without_diacritics_and_case(self, client, Session):
+        _seed_search_db(Session)
+        assert set(self._titles(client, q="DROSIBAS")) == {"Drošības politika", "Beta dokuments"}
+
+    def test_prefix_matches_inflections(self, client, Session):
+        _seed_search_db(Session)
+        assert self._titles(client, q="rokasgrāmat") == ["Personāla rokasgrāmata"]
+
+    def test_all_words_must_match(self, client, Session):
+        _seed_search_db(Session)
+        assert self._titles(client, q="drošības politika") == ["Drošības politika"]
+
+    def test_search_combines_with_filters(self, client, Session):
+        _seed_search_db(Session)
+        assert self._titles(client, q="drošības", active="false") == ["Beta dokuments"]
+
+    def test_relevance_sort_prefers_title_match(self, client, Session):
+        _seed_search_db(Session)
+        titles = self._titles(client, q="drošības", sort="relevance")
+        assert titles == ["Drošības politika", "Beta dokuments"]
+
+    def test_relevance_sort_with_offset(self, client, Session):
+        _seed_search_db(Session)
+        assert self._titles(client, q="drošības", sort="relevance", offset=1) == ["Beta dokuments"]
+
+    def test_search_with_cursor_pagination(self, client, Session):
+        _seed_search_db(Session)
+        first = client.get("/api/documents", params={"q": "drošības", "sort": "title", "limit": 1})
+        second = client.get(
+            "/api/documents",
+            params={"q": "drošības", "sort": "title", "limit": 1, "cursor": first.headers["X-Next-Cursor"]},
+        )
+        assert [d["title"] for d in first.json() + second.json()] == [
+            "Drošības politika",
+            "Beta dokuments",
+        ]
+
+    def test_index_follows_reimport(self, client, Session):
+        _seed_search_db(Session)
+        with Session() as db:
+            import_documents(SEARCH_XML.replace("Drošības politika", "Ugunsdrošības plāns"), db)
+        assert self._titles(client, q="politika") == []
+        assert self._titles(client, q="ugunsdrošības") == ["Ugunsdrošības plāns"]
+
+    def test_search_facets(self, client, Session):
+        _seed_search_db(Session)
+        facets = client.get("/api/documents/facets", params={"q": "drošības"}).json()
+        assert facets["total"] == 2
+
+    def test_query_without_words_returns_400(self, client, Session):
+        _seed_search_db(Session)
+        resp = client.get("/api/documents", params={"q": '"*()'})
+        assert resp.status_code == 400
+
+    def test_fts_syntax_is_not_interpreted(self, client, Session):
+        _seed_search_db(Session)
+        assert self._titles(client, q='politika OR "NEAR(') == []
+
+    def test_relevance_without_q_returns_400(self, client, Session):
+        _seed_search_db(Session)
+        resp = client.get("/api/documents", params={"sort": "relevance"})
+        assert resp.status_code == 400
+
+    def test_relevance_with_cursor_returns_400(self, client, Session):
+        _seed_search_db(Session)
+        cursor = client.get("/api/documents", params={"limit": 1}).headers["X-Next-Cursor"]
+        resp = client.get(
+            "/api/documents", params={"q": "drošības", "sort": "relevance", "cursor": cursor}
+        )
+        assert resp.status_code == 400
+
+
 class TestImportanceSorting:
     """Svarīguma kārtošana pēc loģiskās prioritātes: low < medium < high < critical."""
 
-    def test_importance_sort_asc(self):
-        _seed_db()
+    def test_importance_sort_asc(self, client, Session):
+        _seed_db(Session)
         data = client.get(
             "/api/documents", params={"sort": "importance", "order": "asc"}
         ).json()
         levels = [d["importance"] for d in data]
         assert levels == ["low", "medium", "high", "critical"]
 
-    def test_importance_sort_desc(self):
-        _seed_db()
+    def test_importance_sort_desc(self, client, Session):
+        _seed_db(Session)
         data = client.get(
             "/api/documents", params={"sort": "importance", "order": "desc"}
         ).json()
@@ -220,24 +635,24 @@ class TestImportanceSorting:
 
 
 class TestDateRangeFiltering:
-    def test_created_from(self):
-        _seed_db()
+    def test_created_from(self, client, Session):
+        _seed_db(Session)
         data = client.get(
             "/api/documents", params={"created_from": "2024-01-01"}
         ).json()
         assert all(d["created_at"] >= "2024-01-01" for d in data)
         assert len(data) == 3
 
-    def test_created_to(self):
-        _seed_db()
+    def test_created_to(self, client, Session):
+        _seed_db(Session)
         data = client.get(
             "/api/documents", params={"created_to": "2024-01-01"}
         ).json()
         assert all(d["created_at"] <= "2024-01-01" for d in data)
         assert len(data) == 1
 
-    def test_date_range_both(self):
-        _seed_db()
+    def test_date_range_both(self, client, Session):
+        _seed_db(Session)
         data = client.get(
             "/api/documents",
             params={"created_from": "2024-01-01", "created_to": "2024-12-31"},
@@ -245,55 +660,291 @@ class TestDateRangeFiltering:
         assert len(data) == 2
         assert all("2024-01-01" <= d["created_at"] <= "2024-12-31" for d in data)
 
-    def test_date_range_no_match(self):
-        _seed_db()
+    def test_date_range_no_match(self, client, Session):
+        _seed_db(Session)
         data = client.get(
             "/api/documents",
             params={"created_from": "2026-01-01", "created_to": "2026-12-31"},
         ).json()
         assert data == []
 
-    def test_invalid_date_format_returns_400(self):
-        _seed_db()
+    def test_invalid_date_format_returns_400(self, client, Session):
+        _seed_db(Session)
         resp = client.get("/api/documents", params={"created_from": "01-2024-15"})
         assert resp.status_code == 400
         assert "created_from" in resp.json()["detail"]
 
-    def test_invalid_date_to_returns_400(self):
-        _seed_db()
+    def test_invalid_date_to_returns_400(self, client, Session):
+        _seed_db(Session)
         resp = client.get("/api/documents", params={"created_to": "not-a-date"})
         assert resp.status_code == 400
         assert "created_to" in resp.json()["detail"]
 
 
 class TestValidation:
-    def test_invalid_sort_field_returns_400(self):
-        _seed_db()
+    def test_invalid_sort_field_returns_400(self, client, Session):
+        _seed_db(Session)
         resp = client.get("/api/documents", params={"sort": "nonexistent"})
         assert resp.status_code == 400
         assert "nonexistent" in resp.json()["detail"]
 
-    def test_invalid_order_returns_400(self):
-        _seed_db()
+    def test_invalid_order_returns_400(self, client, Session):
+        _seed_db(Session)
         resp = client.get("/api/documents", params={"order": "random"})
         assert resp.status_code == 400
 
-    def test_sort_by_active_works(self):
-        _seed_db()
+    def test_sort_by_active_works(self, client, Session):
+        _seed_db(Session)
         data = client.get(
             "/api/documents", params={"sort": "active", "order": "asc"}
         ).json()
         assert data[0]["active"] is False
 
 
+XML_PATH = Path(__file__).resolve().parent.parent / "data" / "documents.xml"
+
+
+def _feed_handler(
+    content: bytes, chunk_size: int = 1024, etag: str | None = None, requests: list | None = None
+):
+    """HTTP apstrādātājs, kas atdod `content` blokos; pieprasījumus pieraksta `requests`."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if requests is not None:
+            requests.append(request)
+
+        async def chunks():
+            for i in range(0, len(content), chunk_size):
+                yield content[i : i + chunk_size]
+
+        return httpx.Response(200, content=chunks(), headers={"ETag": etag} if etag else {})
+
+    return handler
+
+
+def _not_modified_handler(requests: list | None = None):
+    """HTTP apstrādātājs, kas vienmēr atbild ar 304."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if requests is not None:
+            requests.append(request)
+        return httpx.Response(304)
+
+    return handler
+
+
+@pytest.fixture(autouse=True)
+def fast_retries():
+    """Importa atkārtojumi bez pauzes."""
+    with patch("app.multi_import.IMPORT_BACKOFF", 0):
+        yield
+
+
+def _start_import(client, handler, **params) -> str:
+    """Sāk importa darbu ar doto HTTP apstrādātāju; atgriež darba ID."""
+    client.app.dependency_overrides[get_http_transport] = lambda: httpx.MockTransport(handler)
+    resp = client.post("/api/import", params=params)
+    assert resp.status_code == 202
+    return resp.json()["id"]
+
+
+def _run_import_job(client, handler, **params) -> dict:
+    """Palaiž importa darbu ar aizstātu HTTP avotu; gaida beigas un atgriež statusu."""
+    job_id = _start_import(client, handler, **params)
+    assert import_jobs.get(job_id).wait(timeout=10)
+
+    resp = client.get(f"/api/import/{job_id}")
+    assert resp.status_code == 200
+    return resp.json()
+
+
 class TestImportEndpoint:
-    def test_import_via_local_xml(self):
-        """Simulē attālo XML ielādi, aizstājot HTTP izsaukumu ar lokālo failu."""
-        xml_path = Path(__file__).resolve().parent.parent / "data" / "documents.xml"
-        xml_content = xml_path.read_text(encoding="utf-8")
+    def test_import_via_local_xml(self, client):
+        """Simulē attālo XML ielādi, aizstājot HTTP avotu ar lokālo failu."""
+        status = _run_import_job(client, _feed_handler(XML_PATH.read_bytes()))
 
-        with patch("app.routes.load_remote_xml", return_value=xml_content):
-            resp = client.post("/api/import")
+        assert status["phase"] == "done"
+        assert status["error"] is None
+        assert status["result"]["imported"] > 0
+        assert status["processed"] == status["result"]["imported"]
+        assert status["throughput"] > 0
+        assert status["finished_at"] is not None
 
-        assert resp.status_code == 200
-        assert resp.json()["imported"] > 0
+    def test_post_returns_job_immediately(self, client):
+        release = threading.Event()
+
+        def slow_handler(request: httpx.Request) -> httpx.Response:
+            async def chunks():
+                await asyncio.to_thread(release.wait, 10)
+                yield SAMPLE_XML.encode()
+
+            return httpx.Response(200, content=chunks())
+
+        job = import_jobs.get(_start_import(client, slow_handler))
+        try:
+            status = client.get(f"/api/import/{job.id}").json()
+            assert status["phase"] in ("queued", "fetching", "parsing")
+            assert status["finished_at"] is None
+        finally:
+            release.set()
+            assert job.wait(timeout=10)
+
+        assert client.get(f"/api/import/{job.id}").json()["result"]["inserted"] == 4
+
+    def test_concurrent_post_attaches_to_running_job(self, client):
+        release = threading.Event()
+        requests = []
+
+        def slow_handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+
+            async def chunks():
+                await asyncio.to_thread(release.wait, 10)
+                yield SAMPLE_XML.encode()
+
+            return httpx.Response(200, content=chunks())
+
+        first = _start_import(client, slow_handler)
+        second = client.post("/api/import").json()
+        release.set()
+        assert import_jobs.get(first).wait(timeout=10)
+
+        assert second["id"] == first
+        assert len(requests) == 1
+
+    def test_unknown_job_returns_404(self, client):
+        resp = client.get("/api/import/nonexistent")
+        assert resp.status_code == 404
+
+    def test_fetch_error_fails_job(self, client):
+        def refused(request: httpx.Request) -> httpx.Response:
+            raise httpx.ConnectError("connection refused")
+
+        status = _run_import_job(client, refused)
+        assert status["phase"] == "failed"
+        assert "Neizdevās ielādēt XML" in status["error"]
+        assert status["result"] is None
+
+    def test_transfer_error_mid_stream_fails_job(self, client):
+        def broken(request: httpx.Request) -> httpx.Response:
+            async def chunks():
+                yield SAMPLE_XML.encode()[:200]
+                raise httpx.ReadError("connection reset")
+
+            return httpx.Response(200, content=chunks())
+
+        status = _run_import_job(client, broken)
+        assert status["phase"] == "failed"
+        assert "Neizdevās ielādēt XML" in status["error"]
+
+    def test_busy_writer_fails_job(self, client):
+        def busy_factory():
+            raise PoolTimeoutError("QueuePool limit reached")
+
+        client.app.dependency_overrides[get_session_factory] = lambda: busy_factory
+        client.app.dependency_overrides[get_async_session_factory] = lambda: busy_factory
+        status = _run_import_job(client, _feed_handler(SAMPLE_XML.encode()))
+
+        assert status["phase"] == "failed"
+        assert status["error"] == DB_BUSY_MESSAGE
+
+    def test_busy_pool_returns_503(self, client):
+        def busy_db():
+            raise PoolTimeoutError("QueuePool limit reached")
+
+        client.app.dependency_overrides[get_db] = busy_db
+        client.app.dependency_overrides[get_async_db] = busy_db
+        resp = client.get("/api/documents")
+
+        assert resp.status_code == 503
+        assert resp.json()["detail"] == DB_BUSY_MESSAGE
+        assert resp.headers["Retry-After"] == "5"
+
+    def test_invalid_document_fails_job(self, client):
+        bad = SAMPLE_XML.replace("augsts", "ļoti augsts").encode()
+        status = _run_import_job(client, _feed_handler(bad))
+
+        assert status["phase"] == "failed"
+        assert "XML parsēšanas kļūda" in status["error"]
+        assert "Kļūda dokumentā #1" in status["error"]
+
+
+class TestImportDocuments:
+    """Partiju upsert pēc URL caur import_documents."""
+
+    def test_fresh_import_counts_inserted(self, Session):
+        with Session() as db:
+            result = import_documents(SAMPLE_XML, db, batch_size=3)
+        assert (result.inserted, result.updated, result.imported) == (4, 0, 4)
+
+    def test_reimport_unchanged_skips_write(self, client, Session):
+        _seed_db(Session)
+        with Session() as db:
+            result = import_documents(SAMPLE_XML, db, batch_size=2)
+        assert (result.inserted, result.updated, result.unchanged) == (0, 0, 4)
+        assert result.imported == 4
+        assert len(client.get("/api/documents").json()) == 4
+
+    def test_reimport_counts_only_changed_as_updated(self, Session):
+        _seed_db(Session)
+        changed = SAMPLE_XML.replace("Apraksts B", "Apraksts B v2")
+        with Session() as db:
+            result = import_documents(changed, db, batch_size=2)
+        assert (result.inserted, result.updated, result.unchanged) == (0, 1, 3)
+
+    def test_reimport_overwrites_fields(self, client, Session):
+        _seed_db(Session)
+        changed = SAMPLE_XML.replace("Alfa dokuments", "Alfa v2").replace(
+            "<importance>augsts</importance>", "<importance>zems</importance>", 1
+        )
+        with Session() as db:
+            import_documents(changed, db)
+        data = client.get("/api/documents", params={"sort": "title", "order": "asc"}).json()
+        assert data[0]["title"] == "Alfa v2"
+        assert data[0]["importance"] == "low"
+
+    def test_duplicate_url_within_batch(self, client, Session):
+        dup = SAMPLE_XML.replace("docs/b.docx", "docs/a.pdf")
+        with Session() as db:
+            result = import_documents(dup, db)
+        assert (result.inserted, result.updated) == (3, 1)
+        assert len(client.get("/api/documents").json()) == 3
+
+    def test_invalid_batch_size_raises(self, Session):
+        with Session() as db:
+            with pytest.raises(ValueError, match="batch_size"):
+                import_documents(SAMPLE_XML, db, batch_size=0)
+
+
+class TestConditionalFetch:
+    """ETag / Last-Modified saglabāšana un 304 īsslēgums."""
+
+    def test_second_import_sends_validators_and_short_circuits(self, client):
+        first = _run_import_job(client, _feed_handler(SAMPLE_XML.encode(), etag='"v1"'))
+        assert first["result"]["inserted"] == 4
+
+        requests = []
+        status = _run_import_job(client, _not_modified_handler(requests))
+
+        assert requests[0].headers["If-None-Match"] == '"v1"'
+        assert status["phase"] == "done"
+        assert status["result"]["not_modified"] is True
+        assert status["result"]["imported"] == 0
+
+    def test_force_ignores_validators(self, client):
+        _run_import_job(client, _feed_handler(SAMPLE_XML.encode(), etag='"v1"'))
+
+        requests = []
+        result = _run_import_job(client, _feed_handler(SAMPLE_XML.encode(), requests=requests), force="true")["result"]
+
+        assert "If-None-Match" not in requests[0].headers
+        assert result["unchanged"] == 4
+
+    def test_failed_import_keeps_old_validators(self, client):
+        _run_import_job(client, _feed_handler(SAMPLE_XML.encode(), etag='"v1"'))
+        bad = SAMPLE_XML.replace("augsts", "ļoti augsts").encode()
+        _run_import_job(client, _feed_handler(bad, etag='"v2"'))
+
+        requests = []
+        _run_import_job(client, _not_modified_handler(requests))
+        assert requests[0].headers["If-None-Match"] == '"v1"'
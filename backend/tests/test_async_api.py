@@ -0,0 +1,42 @@
+"""Asinhronā importa servisa testi (aiosqlite + httpx.AsyncClient).
+
+API galapunktu testi (`test_api.py`) tiek izpildīti ar abām lietotnes
+versijām — `client` fiksācija ir parametrizēta pār `create_app(async_db=…)`.
+"""
+
+import asyncio
+
+import httpx
+
+from app.import_service import astream_remote_xml, async_import_documents
+from app.parser import aiter_documents
+from scripts.generate_xml import generate_xml
+
+XML = generate_xml(30, seed=11)
+
+
+class TestAsyncImport:
+    def test_async_import_counts(self, AsyncSession):
+        async def chunks(content):
+            yield content
+
+        async def run(content):
+            async with AsyncSession() as db:
+                return await async_import_documents(aiter_documents(chunks(content)), db, batch_size=8)
+
+        assert asyncio.run(run(XML.encode())).inserted == 30
+        assert asyncio.run(run(XML.encode())).unchanged == 30
+
+    def test_astream_remote_xml_conditional_request(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, content=XML.encode(), headers={"ETag": '"v1"'})
+
+        async def fetch(etag):
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+                async with astream_remote_xml("http://feed/documents.xml", http, etag=etag) as feed:
+                    return feed.not_modified, feed.etag, b"".join([c async for c in feed.chunks])
+
+        assert asyncio.run(fetch(None)) == (False, '"v1"', XML.encode())
+        assert asyncio.run(fetch('"v1"')) == (True, '"v1"', b"")
@@ -0,0 +1,91 @@
+"""SQLite dzinēja profila testi: PRAGMA iestatījumi un lasītāja/rakstītāja nodalīšana."""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
+
+from app.db import Base, EngineProfile, create_sqlite_engine
+from app.import_service import import_documents
+from scripts.generate_xml import generate_xml
+
+PROFILE = EngineProfile(
+    mmap_size=1024 * 1024, cache_size_kib=2048, busy_timeout_ms=1234, reader_pool_size=2, writer_pool_timeout=0.05
+)
+
+
+@pytest.fixture
+def engines(tmp_path):
+    url = f"sqlite:///{tmp_path / 'metadata.db'}"
+    writer = create_sqlite_engine(url, PROFILE)
+    Base.metadata.create_all(bind=writer)
+    reader = create_sqlite_engine(url, PROFILE, read_only=True)
+    yield writer, reader
+    reader.dispose()
+    writer.dispose()
+
+
+def _pragma(engine, name):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+def test_writer_pragmas(engines):
+    writer, _ = engines
+    assert _pragma(writer, "journal_mode") == "wal"
+    assert _pragma(writer, "synchronous") == 1  # NORMAL
+    assert _pragma(writer, "mmap_size") == 1024 * 1024
+    assert _pragma(writer, "cache_size") == -2048
+    assert _pragma(writer, "busy_timeout") == 1234
+    assert _pragma(writer, "query_only") == 0
+
+
+def test_reader_is_query_only(engines):
+    _, reader = engines
+    assert _pragma(reader, "query_only") == 1
+    assert _pragma(reader, "busy_timeout") == 1234
+    with reader.connect() as conn, pytest.raises(OperationalError):
+        conn.execute(text("DELETE FROM documents"))
+
+
+def test_reader_not_blocked_by_open_write_transaction(engines):
+    writer, reader = engines
+    with Session(writer) as db:
+        import_documents(generate_xml(4, seed=1), db)
+
+    with writer.connect() as write_conn:
+        write_conn.execute(text("UPDATE documents SET title = 'rakstīšanā'"))
+        # Rakstīšanas transakcija vēl nav apstiprināta — lasītājs redz iepriekšējo stāvokli
+        with reader.connect() as read_conn:
+            titles = read_conn.execute(text("SELECT title FROM documents")).scalars().all()
+        assert len(titles) == 4
+        assert "rakstīšanā" not in titles
+        write_conn.rollback()
+
+
+def test_writer_pool_has_single_connection(engines):
+    writer, reader = engines
+    assert writer.pool.size() == 1
+    assert reader.pool.size() == 2
+
+
+def test_writer_pool_wait_is_bounded(engines):
+    writer, _ = engines
+    with writer.connect():
+        # Otrs rakstītājs negaida, kamēr beigsies pirmais — pūls atsakās pēc writer_pool_timeout
+        with pytest.raises(PoolTimeoutError):
+            writer.connect()
+
+
+def test_profile_from_env(monkeypatch):
+    monkeypatch.setenv("SQLITE_SYNCHRONOUS", "FULL")
+    monkeypatch.setenv("SQLITE_MMAP_SIZE", "0")
+    monkeypatch.setenv("DB_READER_POOL_SIZE", "16")
+    monkeypatch.setenv("DB_WRITER_POOL_TIMEOUT", "2.5")
+    profile = EngineProfile.from_env()
+    assert profile.synchronous == "FULL"
+    assert profile.mmap_size == 0
+    assert profile.reader_pool_size == 16
+    assert profile.writer_pool_timeout == 2.5
+    assert profile.journal_mode == "WAL"
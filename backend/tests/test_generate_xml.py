@@ -0,0 +1,31 @@
+"""Testi straumējošajam testa datu ģeneratoram."""
+
+import gzip
+
+from app.parser import iter_xml_file, parse_documents_xml
+from scripts.generate_xml import SHARD_SIZE, generate_xml, write_xml
+
+
+class TestGenerateXml:
+    def test_same_seed_same_output(self):
+        assert generate_xml(50, seed=1) == generate_xml(50, seed=1)
+        assert generate_xml(50, seed=1) != generate_xml(50, seed=2)
+
+    def test_output_is_valid_feed(self):
+        documents = parse_documents_xml(generate_xml(120, seed=4))
+        assert len(documents) == 120
+        assert len({doc.url for doc in documents}) == 120
+
+    def test_parallel_output_matches_sequential(self, tmp_path):
+        n = SHARD_SIZE * 2 + 17
+        sequential, parallel = tmp_path / "seq.xml", tmp_path / "par.xml"
+        write_xml(sequential, n, seed=9)
+        write_xml(parallel, n, seed=9, workers=2)
+        assert sequential.read_bytes() == parallel.read_bytes()
+        assert sequential.read_text(encoding="utf-8") == generate_xml(n, seed=9)
+        assert sum(1 for _ in iter_xml_file(sequential)) == n
+
+    def test_gzip_output(self, tmp_path):
+        path = tmp_path / "feed.xml.gz"
+        write_xml(path, 30, seed=3)
+        assert gzip.decompress(path.read_bytes()).decode("utf-8") == generate_xml(30, seed=3)
@@ -0,0 +1,98 @@
+"""Vārdnīcu tabulu testi: rindās glabājas veseli skaitļi, kešatmiņa aizstāj vaicājumus."""
+
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event, text
+
+from app.import_service import import_documents
+from app.lookups import lookup_cache
+from app.models import LOOKUP_TABLES, Document
+from app.schemas import DocumentOut
+from scripts.generate_xml import generate_xml
+
+
+def _lookup_selects(engine) -> list[str]:
+    """Reģistrē SELECT vaicājumus, kas lasa vārdnīcu tabulas (bez dokumentu rindām)."""
+    statements = []
+    tables = tuple(f"FROM {table.name}" for table in LOOKUP_TABLES.values())
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and any(t in statement for t in tables):
+            statements.append(statement)
+
+    return statements
+
+
+def test_documents_store_integer_keys(engine, Session):
+    with Session() as db:
+        import_documents(generate_xml(40, seed=3), db)
+
+    with engine.connect() as conn:
+        columns = {row[1]: row[2] for row in conn.execute(text("PRAGMA table_info(documents)"))}
+        categories = conn.execute(text("SELECT count(*) FROM categories")).scalar()
+    for field in LOOKUP_TABLES:
+        assert field not in columns
+        assert columns[f"{field}_id"] == "INTEGER"
+    assert 0 < categories <= 40
+
+
+def test_names_are_read_back_unchanged(Session):
+    xml = generate_xml(10, seed=4)
+    with Session() as db:
+        import_documents(xml, db)
+        docs = db.query(Document).order_by(Document.id).all()
+        out = [DocumentOut.model_validate(doc).model_dump() for doc in docs]
+
+    assert set(out[0]) == set(DocumentOut.model_fields)
+    assert {doc["file_type"] for doc in out} <= {"pdf", "docx", "xlsx", "html"}
+    assert all(isinstance(doc["responsible_unit"], str) and doc["responsible_unit"] for doc in out)
+
+
+def test_cached_vocabulary_needs_no_queries(engine, Session):
+    xml = generate_xml(30, seed=5)
+    with Session() as db:
+        import_documents(xml, db)
+
+    # Tās pašas vērtības jauniem dokumentiem — visi id jau ir kešatmiņā
+    statements = _lookup_selects(engine)
+    with Session() as db:
+        result = import_documents(xml.replace("example.com", "mirror.example.com"), db)
+
+    assert result.inserted == 30
+    assert statements == []
+
+
+def test_rollback_discards_cached_ids(engine, Session):
+    with Session() as db:
+        lookup_cache.encode_rows(db, [_row(category="pagaidu")])
+        db.rollback()
+
+    # Atceltā transakcija — id vairs nedrīkst būt kešatmiņā, vērtība tiek ievietota no jauna
+    with Session() as db:
+        encoded = lookup_cache.encode_rows(db, [_row(category="pagaidu")])
+        db.commit()
+    with engine.connect() as conn:
+        stored = conn.execute(text("SELECT id FROM categories WHERE name = 'pagaidu'")).scalar()
+    assert encoded[0]["category_id"] == stored
+
+
+def _row(**overrides) -> dict:
+    row = {"responsible_unit": "IT", "file_type": "pdf", "importance": "high", "category": "internal"}
+    return {**row, **overrides}
+
+
+def test_failed_batch_does_not_cache_uncommitted_ids(client, Session):
+    xml = generate_xml(20, seed=6)
+    # Partija krīt pēc jauno vārdnīcas vērtību ievietošanas; sesija tiek tikai aizvērta
+    with patch("app.import_service._classify", side_effect=RuntimeError("partija neizdevās")):
+        with Session() as db, pytest.raises(RuntimeError):
+            import_documents(xml, db)
+    with Session() as db:
+        assert db.execute(text("SELECT count(*) FROM categories")).scalar() == 0
+        import_documents(xml, db)
+
+    docs = client.get("/api/documents", params={"limit": 200}).json()
+    assert len(docs) == 20
+    assert all(doc[field] is not None for doc in docs for field in LOOKUP_TABLES)
@@ -0,0 +1,142 @@
+"""Mērījumu reģistra, SQL notikumu un `/metrics` galapunkta testi."""
+
+import pytest
+from sqlalchemy import text
+
+from app.import_service import import_documents
+from app.metrics import (
+    DB_STATEMENT_SECONDS,
+    DOCUMENTS_REQUEST_SECONDS,
+    HTTP_REQUEST_SECONDS,
+    IMPORT_COMMIT_SECONDS,
+    IMPORT_PARSE_RATE,
+    IMPORT_ROWS,
+    IMPORT_WRITE_RATE,
+    Counter,
+    Histogram,
+    Registry,
+    instrument_engine,
+    registry,
+)
+from scripts.generate_xml import generate_xml
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    registry.clear()
+    yield
+    registry.clear()
+
+
+@pytest.fixture(autouse=True)
+def instrumented(engine):
+    instrument_engine(engine, "test")
+
+
+class TestRegistry:
+    def test_histogram_buckets_are_cumulative(self):
+        reg = Registry()
+        hist = reg.register(Histogram("op_seconds", "Ilgums", buckets=(0.1, 1), labelnames=("op",)))
+        for value in (0.05, 0.1, 0.5, 3):
+            hist.observe(value, op="read")
+
+        lines = reg.render().splitlines()
+        assert lines[:2] == ["# HELP op_seconds Ilgums", "# TYPE op_seconds histogram"]
+        assert lines[2:] == [
+            'op_seconds_bucket{op="read",le="0.1"} 2',
+            'op_seconds_bucket{op="read",le="1"} 3',
+            'op_seconds_bucket{op="read",le="+Inf"} 4',
+            'op_seconds_sum{op="read"} 3.65',
+            'op_seconds_count{op="read"} 4',
+        ]
+
+    def test_counter_escapes_labels(self):
+        reg = Registry()
+        counter = reg.register(Counter("events_total", "Notikumi", labelnames=("kind",)))
+        counter.inc(kind='a"b\\c')
+        counter.inc(2, kind='a"b\\c')
+        assert 'events_total{kind="a\\"b\\\\c"} 3' in reg.render()
+
+    def test_duplicate_name_rejected(self):
+        reg = Registry()
+        reg.register(Counter("x_total", "X"))
+        with pytest.raises(ValueError, match="jau reģistrēta"):
+            reg.register(Counter("x_total", "X"))
+
+
+class TestInstrumentation:
+    def test_sql_statements_are_timed_per_operation(self, Session):
+        with Session() as db:
+            db.execute(text("SELECT 1"))
+            db.execute(text("SELECT 2"))
+            db.execute(text("CREATE TABLE piezimes (teksts TEXT)"))
+        assert DB_STATEMENT_SECONDS.count(engine="test", operation="SELECT") == 2
+        assert DB_STATEMENT_SECONDS.count(engine="test", operation="CREATE") == 1
+
+    def test_failed_statement_does_not_leak_timer(self, Session):
+        with Session() as db:
+            with pytest.raises(Exception):
+                db.execute(text("SELECT * FROM nav_tabulas"))
+            db.rollback()
+            db.execute(text("SELECT 1"))
+        assert DB_STATEMENT_SECONDS.count(engine="test", operation="SELECT") == 1
+
+    def test_import_records_stages(self, Session):
+        with Session() as db:
+            import_documents(generate_xml(25, seed=5), db, batch_size=10)
+            import_documents(generate_xml(25, seed=5), db, batch_size=10)
+
+        assert IMPORT_PARSE_RATE.count() == 2
+        assert IMPORT_WRITE_RATE.count() == IMPORT_COMMIT_SECONDS.count() == 6
+        assert IMPORT_ROWS.value(status="inserted") == 25
+        assert IMPORT_ROWS.value(status="unchanged") == 25
+
+
+class TestMetricsEndpoint:
+    def test_request_latency_by_route_template(self, client):
+        client.get("/api/import/abc")
+        client.get("/api/import/def")
+        client.get("/nav-tada-cela")
+
+        assert HTTP_REQUEST_SECONDS.count(method="GET", route="/api/import/{job_id}", status="404") == 2
+        assert HTTP_REQUEST_SECONDS.count(method="GET", route="unmatched", status="404") == 1
+
+    def test_documents_latency_by_query_shape(self, client):
+        client.get("/api/documents", params={"sort": "title", "importance": "high", "active": "true"})
+        client.get("/api/documents", params={"offset": 50})
+        client.get("/api/documents", params={"sort": "nav"})
+
+        assert DOCUMENTS_REQUEST_SECONDS.count(sort="title", filters="importance,active", paging="first") == 1
+        assert DOCUMENTS_REQUEST_SECONDS.count(sort="created_at", filters="none", paging="offset") == 1
+        # Nederīgi parametri — forma nav zināma, tiek mērīts tikai maršruts
+        assert HTTP_REQUEST_SECONDS.count(method="GET", route="/api/documents", status="400") == 1
+
+    def test_explain_is_not_counted_as_list_request(self, client):
+        client.get("/api/documents/explain", params={"sort": "title", "category": "public"})
+
+        assert HTTP_REQUEST_SECONDS.count(method="GET", route="/api/documents/explain", status="200") == 1
+        assert DOCUMENTS_REQUEST_SECONDS.count(sort="title", filters="category", paging="first") == 0
+
+    def test_exposition_format(self, client, Session):
+        client.get("/api/documents")
+        # ASYNC_DB versijā saraksts iet caur aiosqlite dzinēju — SQL mērījums no sinhronā
+        with Session() as db:
+            db.execute(text("SELECT 1"))
+        resp = client.get("/metrics")
+
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = resp.text
+        for name in (
+            "http_request_duration_seconds",
+            "documents_request_duration_seconds",
+            "import_fetch_seconds",
+            "import_parse_docs_per_second",
+            "import_write_rows_per_second",
+            "import_commit_seconds",
+            "db_statement_duration_seconds",
+            "db_file_size_bytes",
+        ):
+            assert f"# TYPE {name} " in body
+        assert 'db_statement_duration_seconds_count{engine="test",operation="SELECT"}' in body
+        assert 'db_file_size_bytes{file="main"}' in body
@@ -0,0 +1,221 @@
+"""Vairāku avotu importa testi: sadalījums pa avotiem, kļūdas, atkārtojumi un paralēlisms."""
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+from sqlalchemy import event, func, select
+
+from app.jobs import ImportFailed, ImportJob
+from app.models import Document
+from app.multi_import import Source, SyncWriter, import_sources, run_import_job
+from app.parser import DocumentStreamParser
+from scripts.generate_xml import generate_xml
+
+
+def _feed(name: str, n: int, seed: int) -> bytes:
+    """Ģenerēta plūsma ar avotam unikāliem dokumentu URL."""
+    return generate_xml(n, seed).replace("https://example.com/", f"https://{name}.example.com/").encode()
+
+
+FEEDS = {
+    "http://a/feed.xml": _feed("a", 25, seed=1),
+    "http://b/feed.xml": _feed("b", 40, seed=2),
+    "http://c/feed.xml": _feed("c", 15, seed=3),
+}
+
+
+def _handler(feeds: dict[str, bytes], etag: str | None = None):
+    def handler(request: httpx.Request) -> httpx.Response:
+        content = feeds[str(request.url)]
+
+        async def chunks():
+            for i in range(0, len(content), 4096):
+                yield content[i : i + 4096]
+
+        return httpx.Response(200, content=chunks(), headers={"ETag": etag} if etag else {})
+
+    return handler
+
+
+def _import(Session, handler, urls=tuple(FEEDS), timeout=30.0, **kwargs):
+    with Session() as db:
+        return asyncio.run(
+            import_sources(
+                [Source(url, timeout=timeout, retries=2) for url in urls],
+                SyncWriter(db),
+                transport=httpx.MockTransport(handler),
+                backoff=0,
+                **kwargs,
+            )
+        )
+
+
+def _count(Session) -> int:
+    with Session() as db:
+        return db.scalar(select(func.count()).select_from(Document))
+
+
+class TestImportSources:
+    def test_per_source_breakdown(self, Session):
+        result = _import(Session, _handler(FEEDS), batch_size=16)
+
+        assert [s.url for s in result.sources] == list(FEEDS)
+        for source, content in zip(result.sources, FEEDS.values()):
+            assert source.error is None
+            assert source.attempts == 1
+            assert source.bytes == len(content)
+        assert [s.inserted for s in result.sources] == [25, 40, 15]
+        assert result.inserted == _count(Session) == 80
+
+        again = _import(Session, _handler(FEEDS), batch_size=16)
+        assert (again.inserted, again.unchanged) == (0, 80)
+
+    def test_failing_source_does_not_stop_others(self, Session):
+        bad = FEEDS["http://b/feed.xml"].replace(b"<importance>", b"<importance>x", 1)
+        feeds = {**FEEDS, "http://b/feed.xml": bad}
+        result = _import(Session, _handler(feeds))
+
+        failed = result.sources[1]
+        assert "XML parsēšanas kļūda" in failed.error
+        assert failed.attempts == 1
+        assert [s.error for s in (result.sources[0], result.sources[2])] == [None, None]
+        assert result.inserted == _count(Session) == 40
+
+    def test_retries_transient_errors(self, Session):
+        calls = []
+
+        def flaky(request: httpx.Request) -> httpx.Response:
+            calls.append(str(request.url))
+            if calls.count(str(request.url)) == 1:
+                return httpx.Response(503)
+            return _handler(FEEDS)(request)
+
+        result = _import(Session, flaky, urls=["http://a/feed.xml"])
+        assert result.sources[0].attempts == 2
+        assert result.inserted == 25
+
+    def test_gives_up_after_retries(self, Session):
+        def refused(request: httpx.Request) -> httpx.Response:
+            raise httpx.ConnectError("connection refused")
+
+        result = _import(Session, refused, urls=["http://a/feed.xml"])
+        assert result.sources[0].attempts == 3
+        assert "Neizdevās ielādēt XML" in result.sources[0].error
+
+    def test_client_errors_are_not_retried(self, Session):
+        result = _import(Session, lambda request: httpx.Response(404), urls=["http://a/feed.xml"])
+        assert result.sources[0].attempts == 1
+        assert result.sources[0].error is not None
+
+    def test_concurrency_is_bounded(self, Session):
+        feeds = {f"http://{i}/feed.xml": _feed(str(i), 5, seed=i) for i in range(8)}
+        lock = threading.Lock()
+        in_flight, peak = 0, 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            content = feeds[str(request.url)]
+
+            async def chunks():
+                nonlocal in_flight, peak
+                with lock:
+                    in_flight += 1
+                    peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                yield content
+                with lock:
+                    in_flight -= 1
+
+            return httpx.Response(200, content=chunks())
+
+        result = _import(Session, handler, urls=list(feeds), concurrency=3)
+        assert result.inserted == 40
+        assert 1 < peak <= 3
+
+    def test_not_modified_only_when_all_sources_are(self, Session):
+        _import(Session, _handler(FEEDS, etag='"v1"'))
+
+        def conditional(request: httpx.Request) -> httpx.Response:
+            if str(request.url) != "http://c/feed.xml" and request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return _handler(FEEDS)(request)
+
+        result = _import(Session, conditional)
+        assert [s.not_modified for s in result.sources] == [True, True, False]
+        assert result.not_modified is False
+        assert result.unchanged == 15
+
+    def test_feed_state_is_not_queried_on_event_loop_thread(self, engine, Session):
+        _import(Session, _handler(FEEDS, etag='"v1"'))
+        loop_thread = threading.get_ident()
+        queries = []
+
+        def record(conn, cursor, statement, *args):
+            if "feed_state" in statement:
+                queries.append(threading.get_ident())
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            result = _import(Session, _handler(FEEDS), concurrency=1, batch_size=10)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        assert result.unchanged == 80
+        assert queries
+        assert loop_thread not in queries
+
+    def test_parsing_runs_off_event_loop_thread(self, Session, monkeypatch):
+        loop_thread = threading.get_ident()
+        threads = set()
+
+        class RecordingParser(DocumentStreamParser):
+            def feed(self, chunk):
+                threads.add(threading.get_ident())
+                return super().feed(chunk)
+
+        monkeypatch.setattr("app.multi_import.DocumentStreamParser", RecordingParser)
+        result = _import(Session, _handler(FEEDS))
+
+        assert result.inserted == 80
+        assert threads
+        assert loop_thread not in threads
+
+    def test_timeout_limits_whole_source(self, Session):
+        content = FEEDS["http://a/feed.xml"]
+
+        def trickle(request: httpx.Request) -> httpx.Response:
+            async def chunks():
+                # Katrs lasījums ir ātrs — httpx taimauts neiestājas, bet kopā avots ir lēns
+                for i in range(0, len(content), 256):
+                    await asyncio.sleep(0.02)
+                    yield content[i : i + 256]
+
+            return httpx.Response(200, content=chunks())
+
+        result = _import(Session, trickle, urls=["http://a/feed.xml"], timeout=0.2)
+
+        assert "pārsniedza 0.2 s taimautu" in result.sources[0].error
+        assert result.sources[0].seconds < 1
+
+
+class TestRunImportJob:
+    def _run(self, Session, handler, monkeypatch, urls):
+        monkeypatch.setattr("app.multi_import.REMOTE_URLS", urls)
+        monkeypatch.setattr("app.multi_import.IMPORT_RETRIES", 0)
+        with Session() as db:
+            return asyncio.run(run_import_job(ImportJob(id="t"), SyncWriter(db), httpx.MockTransport(handler)))
+
+    def test_partial_failure_succeeds(self, Session, monkeypatch):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if str(request.url) not in FEEDS:
+                return httpx.Response(404)
+            return _handler(FEEDS)(request)
+
+        result = self._run(Session, handler, monkeypatch, [*FEEDS, "http://missing/feed.xml"])
+        assert result.inserted == 80
+        assert result.sources[-1].error is not None
+
+    def test_all_sources_failing_raises(self, Session, monkeypatch):
+        with pytest.raises(ImportFailed, match="Neizdevās importēt nevienu avotu"):
+            self._run(Session, lambda request: httpx.Response(500), monkeypatch, list(FEEDS))
@@ -1,11 +1,32 @@
 """Testi XML parsēšanas modulim."""
 
+import asyncio
 from datetime import date
+from types import GeneratorType
 
 import pytest
 
-from app.parser import parse_documents_xml
+from app.parser import (
+    BACKENDS,
+    DocumentStreamParser,
+    aiter_documents,
+    iter_documents,
+    iter_xml_file,
+    iter_xml_file_parallel,
+    parse_documents_xml,
+    parse_xml_file,
+    split_document_ranges,
+)
 from app.schemas import DocumentCreate
+from scripts.generate_xml import generate_xml
+
+
+@pytest.fixture(autouse=True, params=sorted(BACKENDS))
+def backend(request, monkeypatch):
+    """Visi testi tiek izpildīti ar katru pieejamo parsera aizmuguri."""
+    monkeypatch.setenv("PARSER_BACKEND", request.param)
+    return request.param
+
 
 # --- Palīgdati ---
 
@@ -114,3 +135,147 @@ class TestParseDocumentsXml:
     def test_invalid_xml_raises_error(self):
         with pytest.raises(Exception):
             parse_documents_xml("<not-valid-xml")
+
+
+class TestIterDocuments:
+    """Inkrementālā (plūsmas) parsēšana."""
+
+    def test_returns_generator(self):
+        assert isinstance(iter_documents([VALID_DOC_XML]), GeneratorType)
+
+    def test_byte_chunks_match_full_parse(self):
+        data = VALID_DOC_XML.encode("utf-8")
+        # Sīki bloki sadala arī daudzbaitu UTF-8 rakstzīmes
+        chunks = [data[i : i + 7] for i in range(0, len(data), 7)]
+        assert list(iter_documents(chunks)) == parse_documents_xml(VALID_DOC_XML)
+
+    def test_yields_before_stream_ends(self):
+        head, _, _ = VALID_DOC_XML.partition("  <document>\n    <title>Otrs")
+        docs = iter_documents([head])
+        assert next(docs).title == "Testa dokuments"
+
+    def test_error_reports_document_number(self):
+        xml = VALID_DOC_XML.replace("zems", "nezināms")
+        docs = iter_documents([xml])
+        assert next(docs).importance == "high"
+        with pytest.raises(ValueError, match="Kļūda dokumentā #2"):
+            next(docs)
+
+    def test_nested_document_tags_ignored(self):
+        xml = VALID_DOC_XML.replace(
+            "<description>Apraksts</description>",
+            "<description>Apraksts</description><document>x</document>",
+        )
+        assert len(list(iter_documents([xml]))) == 2
+
+    def test_xml_file(self, tmp_path):
+        path = tmp_path / "documents.xml"
+        path.write_text(VALID_DOC_XML, encoding="utf-8")
+        assert list(iter_xml_file(path, chunk_size=16)) == parse_xml_file(path)
+        assert len(parse_xml_file(path)) == 2
+
+    def test_async_chunks_match_sync(self):
+        data = VALID_DOC_XML.encode("utf-8")
+
+        async def chunks():
+            for i in range(0, len(data), 7):
+                yield data[i : i + 7]
+
+        async def collect():
+            return [doc async for doc in aiter_documents(chunks())]
+
+        assert asyncio.run(collect()) == parse_documents_xml(VALID_DOC_XML)
+
+
+class TestParallelParse:
+    """Faila sadalīšana pa <document> robežām un parsēšana vairākos procesos."""
+
+    @pytest.fixture
+    def feed(self, tmp_path):
+        path = tmp_path / "feed.xml"
+        path.write_text(generate_xml(200, seed=3), encoding="utf-8")
+        return path
+
+    def test_ranges_cover_documents(self, feed):
+        head, foot, ranges = split_document_ranges(feed, chunk_size=2000)
+        data = feed.read_bytes()
+        assert len(ranges) > 1
+        assert head + b"".join(data[start:end] for start, end in ranges) + foot == data
+        assert all(data[start:end].startswith(b"<document>") for start, end in ranges)
+
+    def test_matches_sequential_parse(self, feed):
+        assert list(iter_xml_file_parallel(feed, workers=2, chunk_size=2000)) == parse_xml_file(feed)
+
+    def test_error_keeps_document_number(self, feed):
+        parts = feed.read_text(encoding="utf-8").split("<importance>")
+        # parts[150] seko 150. dokumenta <importance> tagam
+        parts[150] = "ļoti " + parts[150]
+        feed.write_text("<importance>".join(parts), encoding="utf-8")
+
+        with pytest.raises(ValueError, match="Kļūda dokumentā #150"):
+            list(iter_documents([feed.read_bytes()]))
+        with pytest.raises(ValueError, match="Kļūda dokumentā #150: Nederīga vērtība"):
+            list(iter_xml_file_parallel(feed, workers=2, chunk_size=2000))
+
+    def test_malformed_xml_keeps_document_number(self, feed):
+        parts = feed.read_text(encoding="utf-8").split("</importance>")
+        # 120. dokumentā aizvēršanas tags neatbilst atvēršanas tagam
+        parts[119] += "</svarīgums>"
+        feed.write_text("</importance>".join(parts), encoding="utf-8")
+
+        with pytest.raises(SyntaxError, match="Kļūda dokumentā #120"):
+            list(iter_xml_file_parallel(feed, workers=2, chunk_size=2000))
+
+    def test_syntax_error_position_is_relative_to_file(self, feed):
+        parts = feed.read_text(encoding="utf-8").split("</importance>")
+        parts[149] += "</svarīgums>"
+        feed.write_text("</importance>".join(parts), encoding="utf-8")
+
+        with pytest.raises(SyntaxError) as sequential:
+            list(iter_xml_file(feed))
+        with pytest.raises(SyntaxError) as parallel:
+            list(iter_xml_file_parallel(feed, workers=2, chunk_size=2000))
+        assert str(parallel.value) == str(sequential.value)
+        assert parallel.value.position == sequential.value.position
+        assert parallel.value.position[0] > 1000
+
+    @pytest.mark.parametrize(
+        "old, new",
+        [
+            ("<description>", "<description><![CDATA[skat. <document>]]>"),
+            ("<document>", "<!-- <document> --><document>"),
+            ("<document>", '<document id="x">'),
+        ],
+    )
+    def test_document_tag_variants_match_sequential(self, feed, old, new):
+        feed.write_text(feed.read_text(encoding="utf-8").replace(old, new), encoding="utf-8")
+        _, _, ranges = split_document_ranges(feed, chunk_size=2000)
+        assert len(ranges) > 1
+        assert list(iter_xml_file_parallel(feed, workers=2, chunk_size=2000)) == parse_xml_file(feed)
+
+    def test_file_without_documents(self, tmp_path):
+        path = tmp_path / "empty.xml"
+        path.write_text("<documents></documents>", encoding="utf-8")
+        assert list(iter_xml_file_parallel(path, workers=2)) == []
+
+
+class TestBackends:
+    def test_backends_produce_identical_documents(self):
+        data = generate_xml(300, seed=5).encode("utf-8")
+        chunks = [data[i : i + 4096] for i in range(0, len(data), 4096)]
+        results = {}
+        for name, backend in BACKENDS.items():
+            stream = DocumentStreamParser(backend)
+            results[name] = [doc for chunk in chunks for doc in stream.feed(chunk)] + list(stream.close())
+        expected = results.pop("stdlib-find")
+        assert len(expected) == 300
+        assert all(docs == expected for docs in results.values())
+
+    def test_malformed_xml_raises_syntax_error(self):
+        with pytest.raises(SyntaxError):
+            list(iter_documents(["<documents><document>"]))
+
+    def test_unknown_backend(self, monkeypatch):
+        monkeypatch.setenv("PARSER_BACKEND", "nav")
+        with pytest.raises(ValueError, match="Nezināma parsera aizmugure"):
+            DocumentStreamParser()
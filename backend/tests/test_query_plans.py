@@ -0,0 +1,126 @@
+"""Saraksta vaicājuma plāni: indeksētās filtra/kārtošanas formas izmanto indeksu bez pagaidu B-koka."""
+
+from datetime import date
+from itertools import combinations
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import Base
+from app.models import Document
+from app.queries import (
+    VALID_SORT_FIELDS,
+    DocumentFilters,
+    apply_cursor,
+    apply_filters,
+    apply_sort,
+    encode_cursor,
+    explain_query_plan,
+    facet_query,
+)
+
+engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+Session = sessionmaker(bind=engine)
+
+FILTER_VALUES = {
+    "importance": {"importance": "high"},
+    "category": {"category": "internal"},
+    "active": {"active": True},
+    "created_range": {"created_from": date(2024, 1, 1), "created_to": date(2024, 12, 31)},
+}
+
+FILTER_COMBINATIONS = [
+    combo for r in range(len(FILTER_VALUES) + 1) for combo in combinations(FILTER_VALUES, r)
+]
+
+# Nosaukuma kārtošanai indekss ir tikai bez filtriem
+INDEXED_SHAPES = [
+    (combo, sort)
+    for combo in FILTER_COMBINATIONS
+    for sort in sorted(VALID_SORT_FIELDS)
+    if not (combo and sort == "title")
+]
+
+
+@pytest.fixture(scope="module")
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = Session()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def _plan(db, filter_names, sort, order, cursor=None) -> str:
+    filters = DocumentFilters(**{k: v for name in filter_names for k, v in FILTER_VALUES[name].items()})
+    query = apply_sort(apply_filters(db.query(Document), filters, sort), sort, order)
+    if cursor is not None:
+        query = apply_cursor(query, sort, order, cursor)
+    return "; ".join(explain_query_plan(db, query.offset(100).limit(50)))
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize(
+    "filter_names,sort",
+    INDEXED_SHAPES,
+    ids=[f"{'+'.join(combo) or 'none'}-{sort}" for combo, sort in INDEXED_SHAPES],
+)
+def test_list_query_avoids_temp_btree_sort(db, filter_names, sort, order):
+    plan = _plan(db, filter_names, sort, order)
+    assert "TEMP B-TREE" not in plan
+    assert "USING INDEX" in plan or "USING COVERING INDEX" in plan
+
+
+@pytest.mark.parametrize("sort", sorted(VALID_SORT_FIELDS))
+def test_cursor_query_avoids_temp_btree_sort(db, sort):
+    last = Document(
+        id=10, title="x", created_at=date(2024, 1, 1), importance_rank=2, active=True
+    )
+    filter_names = ("category",) if sort != "title" else ()
+    plan = _plan(db, filter_names, sort, "desc", encode_cursor(last, sort, "desc"))
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.parametrize("filter_name", ["importance", "category", "active"])
+def test_filtered_title_sort_searches_index(db, filter_name):
+    # (filtrs, title, id) indeksu nav (apzināti) — filtrētā daļa tiek kārtota pagaidu B-kokā
+    plan = _plan(db, (filter_name,), "title", "asc")
+    assert "SEARCH documents USING" in plan
+
+
+@pytest.mark.parametrize("filter_names", [(), ("category",)], ids=["none", "category"])
+def test_facet_query_uses_covering_index(db, filter_names):
+    filters = DocumentFilters(**{k: v for name in filter_names for k, v in FILTER_VALUES[name].items()})
+    plan = "; ".join(explain_query_plan(db, facet_query(db, filters)))
+    assert "USING COVERING INDEX ix_documents_facets" in plan
+
+
+SELECTIVE_FILTER_VALUES = {
+    "responsible_unit": {"responsible_unit": "IT"},
+    "file_type": {"file_type": "pdf"},
+}
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize("filter_name", sorted(SELECTIVE_FILTER_VALUES))
+def test_selective_filter_uses_integer_index(db, filter_name, order):
+    filters = DocumentFilters(**SELECTIVE_FILTER_VALUES[filter_name])
+    query = apply_sort(apply_filters(db.query(Document), filters, "created_at"), "created_at", order)
+    plan = "; ".join(explain_query_plan(db, query.offset(100).limit(50)))
+    assert f"ix_documents_{filter_name}_id_created_at_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.parametrize("sort", sorted(VALID_SORT_FIELDS - {"created_at"}))
+def test_selective_filter_with_other_sort_searches_index(db, sort):
+    # Citām kārtošanām indeksa nav (apzināti) — filtrētā daļa tiek kārtota pagaidu B-kokā
+    filters = DocumentFilters(**SELECTIVE_FILTER_VALUES["responsible_unit"])
+    query = apply_sort(apply_filters(db.query(Document), filters, sort), sort, "desc")
+    plan = "; ".join(explain_query_plan(db, query.offset(100).limit(50)))
+    assert "SEARCH documents USING" in plan
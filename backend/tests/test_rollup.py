@@ -0,0 +1,207 @@
+"""Rollup tabulas testi: importa deltas pret pilnu pārrēķinu, laika rindas, pārbaudes komanda."""
+
+import asyncio
+import re
+
+import pytest
+from sqlalchemy import func, select, update
+
+from app import db as app_db
+from app.db import init_db
+from app.import_service import async_import_documents, document_row, import_documents, upsert_rows
+from app.models import DocumentRollup
+from app.parser import iter_documents_xml
+from app.rollup import check_rollup, rebuild_rollup
+from scripts import check_rollup as check_rollup_command
+from scripts.generate_xml import generate_xml
+
+
+def _import(Session, xml: str, batch_size: int = 25):
+    with Session() as db:
+        return import_documents(xml, db, batch_size=batch_size)
+
+
+def _edit(xml: str, index: int, tag: str, value: str) -> str:
+    """Aizstāj `index`-tā dokumenta `<tag>` vērtību."""
+    docs = xml.split("</document>")
+    docs[index] = re.sub(f"<{tag}>[^<]*</{tag}>", f"<{tag}>{value}</{tag}>", docs[index])
+    return "</document>".join(docs)
+
+
+def _rollup_rows(Session) -> dict:
+    with Session() as db:
+        query = select(DocumentRollup.month, func.sum(DocumentRollup.doc_count)).group_by(DocumentRollup.month)
+        return dict(db.execute(query).all())
+
+
+def test_import_matches_full_recomputation(Session):
+    _import(Session, generate_xml(200, seed=31))
+    with Session() as db:
+        assert check_rollup(db) == []
+        total = db.execute(select(func.sum(DocumentRollup.doc_count))).scalar()
+    assert total == 200
+
+
+@pytest.mark.parametrize(
+    "tag, value",
+    [
+        ("importance", "kritisks"),
+        ("category", "ierobežotas pieejamības"),
+        ("active", "nē"),
+        ("created_at", "2019-02-03"),
+        ("reading_time_minutes", "7"),
+    ],
+)
+def test_updates_move_rows_between_keys(Session, tag, value):
+    xml = generate_xml(60, seed=32)
+    _import(Session, xml)
+
+    changed = xml
+    for index in (0, 17, 42):
+        changed = _edit(changed, index, tag, value)
+    result = _import(Session, changed)
+
+    assert result.updated >= 1
+    with Session() as db:
+        assert check_rollup(db) == []
+
+
+def test_title_only_change_keeps_rollup(Session):
+    xml = generate_xml(30, seed=33)
+    _import(Session, xml)
+    before = _rollup_rows(Session)
+
+    result = _import(Session, _edit(xml, 3, "title", "Jauns virsraksts"))
+    assert result.updated == 1
+    assert _rollup_rows(Session) == before
+
+
+def test_duplicate_url_in_one_batch(Session):
+    xml = generate_xml(5, seed=34)
+    docs = xml.split("</document>")
+    # Tas pats URL divreiz vienā partijā ar citu datumu — spēkā pēdējā versija
+    first = docs[0][docs[0].index("<document>") :]
+    duplicate = re.sub("<created_at>[^<]*</created_at>", "<created_at>2018-05-05</created_at>", first)
+    xml = "</document>".join(docs[:-1] + [duplicate, docs[-1]])
+    result = _import(Session, xml)
+
+    assert (result.inserted, result.updated) == (5, 1)
+    with Session() as db:
+        assert check_rollup(db) == []
+
+
+def test_rolled_back_batch_leaves_rollup_unchanged(Session):
+    _import(Session, generate_xml(20, seed=35))
+    before = _rollup_rows(Session)
+
+    xml = generate_xml(20, seed=36).replace("example.com", "mirror.example.com")
+    with Session() as db:
+        upsert_rows([document_row(doc) for doc in iter_documents_xml(xml)], db)
+        db.rollback()
+        assert check_rollup(db) == []
+    assert _rollup_rows(Session) == before
+
+
+def test_async_import_maintains_rollup(Session, AsyncSession):
+    xml = generate_xml(40, seed=37)
+    _import(Session, xml)
+
+    async def run():
+        async def documents():
+            for doc in iter_documents_xml(_edit(xml, 5, "importance", "zems")):
+                yield doc
+
+        async with AsyncSession() as db:
+            await async_import_documents(documents(), db, batch_size=10)
+
+    asyncio.run(run())
+    with Session() as db:
+        assert check_rollup(db) == []
+
+
+def test_check_detects_and_rebuild_repairs(Session):
+    _import(Session, generate_xml(50, seed=38))
+    with Session() as db:
+        first_month = select(func.min(DocumentRollup.month)).scalar_subquery()
+        db.execute(
+            update(DocumentRollup)
+            .where(DocumentRollup.month == first_month)
+            .values(doc_count=DocumentRollup.doc_count + 1)
+        )
+        db.commit()
+        mismatches = check_rollup(db)
+        assert len(mismatches) >= 1
+        assert mismatches[0].actual[0] == mismatches[0].expected[0] + 1
+
+        rebuild_rollup(db)
+        db.commit()
+        assert check_rollup(db) == []
+
+
+class TestCheckCommand:
+    @pytest.fixture(autouse=True)
+    def use_test_db(self, monkeypatch, engine, Session):
+        monkeypatch.setattr(app_db, "writer_engine", engine)
+        monkeypatch.setattr(app_db, "WriterSession", Session)
+        monkeypatch.setattr(check_rollup_command, "WriterSession", Session)
+
+    def test_consistent_rollup_exits_zero(self, Session, capsys):
+        _import(Session, generate_xml(20, seed=39))
+        assert check_rollup_command.main([]) == 0
+        assert "atbilst" in capsys.readouterr().out
+
+    def test_mismatch_exits_one_and_repair_fixes(self, Session, capsys):
+        _import(Session, generate_xml(20, seed=40))
+        with Session() as db:
+            db.execute(update(DocumentRollup).values(reading_time_total=0))
+            db.commit()
+
+        assert check_rollup_command.main([]) == 1
+        assert "Atšķirīgas atslēgas" in capsys.readouterr().out
+        assert check_rollup_command.main(["--repair"]) == 0
+        assert check_rollup_command.main([]) == 0
+
+    def test_init_db_backfills_missing_rollup(self, engine, Session):
+        _import(Session, generate_xml(20, seed=41))
+        DocumentRollup.__table__.drop(engine)
+
+        init_db()
+        with Session() as db:
+            assert check_rollup(db) == []
+            assert db.execute(select(func.sum(DocumentRollup.doc_count))).scalar() == 20
+
+
+class TestTimeseriesEndpoint:
+    def test_counts_per_month_match_documents(self, client, Session):
+        _import(Session, generate_xml(120, seed=42))
+        points = client.get("/api/stats/timeseries").json()["points"]
+        docs = client.get("/api/documents/facets").json()["created_month"]
+
+        assert {point["month"]: point["count"] for point in points} == docs
+        assert [point["month"] for point in points] == sorted(docs)
+
+    def test_group_by_and_filters(self, client, Session):
+        _import(Session, generate_xml(120, seed=43))
+        params = {"group_by": "importance", "category": "internal", "active": "true"}
+        data = client.get("/api/stats/timeseries", params=params).json()
+        facets = client.get("/api/documents/facets", params={"category": "internal", "active": "true"}).json()
+
+        assert data["group_by"] == ["importance"]
+        counts = {}
+        for point in data["points"]:
+            counts[point["key"]["importance"]] = counts.get(point["key"]["importance"], 0) + point["count"]
+        assert counts == facets["importance"]
+
+    def test_month_range(self, client, Session):
+        _import(Session, generate_xml(120, seed=44))
+        params = {"month_from": "2022-03", "month_to": "2022-08"}
+        points = client.get("/api/stats/timeseries", params=params).json()["points"]
+        assert points
+        assert all("2022-03" <= point["month"] <= "2022-08" for point in points)
+
+    @pytest.mark.parametrize(
+        "params",
+        [{"group_by": "file_type"}, {"month_from": "2022-3"}, {"month_to": "2022-13"}],
+    )
+    def test_invalid_params_return_400(self, client, params):
+        assert client.get("/api/stats/timeseries", params=params).status_code == 400
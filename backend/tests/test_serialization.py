@@ -0,0 +1,117 @@
+"""Ātrās serializācijas saderība ar Pydantic DocumentOut izvadi."""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+from pydantic import TypeAdapter
+
+from app.parser import ACTIVE_MAP, CATEGORY_MAP, IMPORTANCE_MAP, VALID_FILE_TYPES, parse_documents_xml
+from app.schemas import DocumentCreate, DocumentOut
+from app.serialization import (
+    DOCUMENT_OUT_FIELDS,
+    XML_FOOTER,
+    XML_HEADER,
+    _dumps_stdlib,
+    dump_document_rows,
+    dump_xml_rows,
+    rows_to_dicts,
+)
+
+adapter = TypeAdapter(list[DocumentOut])
+
+TRICKY_TEXTS = [
+    "Drošības politika",
+    'Pēdiņas " un \\ slīpsvītra',
+    "Vadības\tzīmes\n\x01\x7f",
+    "\u2028\u2029 rindu atdalītāji",
+    "Emocijzīme 😀",
+    "<script>&amp;</script>",
+]
+
+
+def _row(title: str, description: str | None = "Apraksts", doc_id: int = 1) -> tuple:
+    values = {
+        "title": title,
+        "description": description,
+        "responsible_unit": "IT nodaļa",
+        "created_at": date(2024, 3, 15),
+        "url": f"https://example.com/docs/{doc_id}.pdf",
+        "file_type": "pdf",
+        "reading_time_minutes": 10,
+        "importance": "high",
+        "category": "internal",
+        "active": True,
+        "id": doc_id,
+    }
+    return tuple(values[name] for name in DOCUMENT_OUT_FIELDS)
+
+
+def _pydantic_bytes(rows) -> bytes:
+    return adapter.dump_json(adapter.validate_python(rows_to_dicts(rows)))
+
+
+@pytest.mark.parametrize("title", TRICKY_TEXTS)
+def test_matches_pydantic_bytes(title):
+    rows = [_row(title), _row("Otrs", description=None, doc_id=2)]
+    assert dump_document_rows(rows) == _pydantic_bytes(rows)
+
+
+@pytest.mark.parametrize("title", TRICKY_TEXTS)
+def test_stdlib_fallback_matches_pydantic_bytes(title):
+    rows = [_row(title)]
+    assert _dumps_stdlib(rows_to_dicts(rows)) == _pydantic_bytes(rows)
+
+
+def test_extra_trailing_columns_ignored():
+    rows = [_row("Testa dokuments") + (2,)]
+    assert dump_document_rows(rows) == _pydantic_bytes([_row("Testa dokuments")])
+
+
+def test_empty_list():
+    assert dump_document_rows([]) == b"[]"
+
+
+# --- Avota XML eksports: izvade jāparsē atpakaļ identiskos ierakstos ---
+
+# XML 1.0 atļautās rakstzīmes, ieskaitot speciālās un atstarpju rakstzīmes
+XML_ALPHABET = "aāčēģīķļņšūž AZ09 &<>\"'\t\n\r]]>—😀\u2028\x7f"
+
+
+def _random_text(rng: random.Random) -> str:
+    text = "".join(rng.choice(XML_ALPHABET) for _ in range(rng.randint(1, 40))).strip()
+    # Parsētājs apgriež atstarpes un prasa netukšu vērtību
+    return text or "x"
+
+
+def _random_document(rng: random.Random, doc_id: int) -> DocumentCreate:
+    return DocumentCreate(
+        title=_random_text(rng),
+        description=rng.choice([None, _random_text(rng)]),
+        responsible_unit=_random_text(rng),
+        created_at=date(1990, 1, 1) + timedelta(days=rng.randint(0, 20000)),
+        url=f"https://example.com/{doc_id}/{_random_text(rng)}",
+        file_type=rng.choice(sorted(VALID_FILE_TYPES)),
+        reading_time_minutes=rng.randint(0, 10**6),
+        importance=rng.choice(list(IMPORTANCE_MAP.values())),
+        category=rng.choice(list(CATEGORY_MAP.values())),
+        active=rng.choice(list(ACTIVE_MAP.values())),
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_xml_export_round_trips(seed):
+    rng = random.Random(seed)
+    documents = [_random_document(rng, doc_id) for doc_id in range(1, 201)]
+    rows = [
+        tuple({**doc.model_dump(), "id": doc_id}[name] for name in DOCUMENT_OUT_FIELDS)
+        for doc_id, doc in enumerate(documents, start=1)
+    ]
+    xml = XML_HEADER + dump_xml_rows(rows[:120]) + dump_xml_rows(rows[120:]) + XML_FOOTER
+    assert parse_documents_xml(xml.decode("utf-8")) == documents
+
+
+def test_xml_export_rejects_unmapped_value():
+    row = dict(zip(DOCUMENT_OUT_FIELDS, _row("Testa dokuments")), importance="unknown")
+    with pytest.raises(ValueError, match="importance"):
+        dump_xml_rows([tuple(row.values())])
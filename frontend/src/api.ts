@@ -39,8 +39,62 @@ export async function fetchDocuments(
   return res.json();
 }
 
-export async function importDocuments(): Promise<{ imported: number }> {
-  const res = await fetch(`${BASE}/import`, { method: "POST" });
+export interface SourceResult {
+  url: string;
+  inserted: number;
+  updated: number;
+  unchanged: number;
+  imported: number;
+  not_modified: boolean;
+  bytes: number;
+  attempts: number;
+  seconds: number;
+  error: string | null;
+}
+
+export interface ImportResult {
+  inserted: number;
+  updated: number;
+  unchanged: number;
+  imported: number;
+  not_modified: boolean;
+  sources: SourceResult[];
+}
+
+export interface ImportJob {
+  id: string;
+  phase: "queued" | "fetching" | "parsing" | "writing" | "done" | "failed";
+  processed: number;
+  throughput: number;
+  started_at: string;
+  finished_at: string | null;
+  result: ImportResult | null;
+  error: string | null;
+}
+
+const IMPORT_POLL_MS = 1000;
+
+export async function fetchImportJob(id: string): Promise<ImportJob> {
+  const res = await fetch(`${BASE}/import/${id}`);
   if (!res.ok) throw new Error(`HTTP ${res.status}`);
   return res.json();
 }
+
+export async function importDocuments(
+  onProgress?: (job: ImportJob) => void
+): Promise<ImportResult> {
+  const res = await fetch(`${BASE}/import`, { method: "POST" });
+  if (!res.ok) throw new Error(`HTTP ${res.status}`);
+  let job: ImportJob = await res.json();
+
+  while (job.phase !== "done" && job.phase !== "failed") {
+    onProgress?.(job);
+    await new Promise((resolve) => setTimeout(resolve, IMPORT_POLL_MS));
+    job = await fetchImportJob(job.id);
+  }
+
+  if (job.phase === "failed" || !job.result) {
+    throw new Error(job.error ?? "Importa kļūda");
+  }
+  return job.result;
+}